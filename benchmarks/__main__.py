@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+
+from . import cases
+from .runner import compare, dump, format_comparison, format_result, load
+
+
+parser = argparse.ArgumentParser(prog='python -m benchmarks')
+parser.add_argument(
+    '-s', '--sizes', type=lambda x: [int(i) for i in x.split(',')],
+    default=[1000, 10000], help='Comma separated dataset sizes',
+)
+parser.add_argument(
+    '--only', type=lambda x: set(x.split(',')), default=None,
+    help='Comma separated cases: %s,fields' % ','.join(
+        name for name, _ in cases.SUITE
+    ),
+)
+parser.add_argument('-o', '--output', help='Write the results as JSON')
+parser.add_argument('-b', '--baseline', help='Compare with the stored run')
+parser.add_argument(
+    '-t', '--threshold', type=float, default=0.1,
+    help='Throughput drop reported as the regression (default 0.1)',
+)
+parser.add_argument(
+    '--fail', action='store_true',
+    help='Exit with non-zero status when regressions found',
+)
+
+
+def main():
+    arguments = parser.parse_args()
+    results = []
+
+    for result in cases.run(arguments.sizes, arguments.only):
+        print(format_result(result))
+        sys.stdout.flush()
+        results.append(result)
+
+    if arguments.output:
+        dump(results, arguments.output)
+
+    if not arguments.baseline:
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        print('Baseline %s not found, skipping comparison' % (
+            arguments.baseline
+        ))
+        return 0
+
+    comparisons, regressions = compare(
+        load(arguments.baseline), results, arguments.threshold,
+    )
+
+    print('')
+    print('Compared with %s' % arguments.baseline)
+
+    for item in comparisons:
+        print(format_comparison(item))
+
+    if regressions:
+        print('')
+        print('%d regression(s) beyond %.0f%%' % (
+            len(regressions), arguments.threshold * 100
+        ))
+
+        if arguments.fail:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
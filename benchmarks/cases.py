@@ -0,0 +1,222 @@
+import ipaddress
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from enum import IntEnum
+from random import Random
+
+from sonya import Environment, Schema, fields
+
+from .runner import measure
+
+
+class Color(IntEnum):
+    red = 1
+    green = 2
+
+
+class IntSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    value = fields.UInt64Field()
+
+
+class StringSchema(Schema):
+    key = fields.StringField(index=0)
+    value = fields.BytesField()
+
+
+SCHEMAS = (
+    ('int', IntSchema, lambda i: {'key': i, 'value': i * 2}),
+    ('string', StringSchema, lambda i: {
+        'key': 'key-%010d' % i, 'value': b'v' * 100,
+    }),
+)
+
+
+# field factory and the sample python value
+FIELDS = (
+    ('BytesField', fields.BytesField, b'x' * 100),
+    ('StringField', fields.StringField, u'x' * 100),
+    ('Int8Field', fields.Int8Field, -100),
+    ('Int16Field', fields.Int16Field, -30000),
+    ('Int32Field', fields.Int32Field, 100000),
+    ('Int64Field', fields.Int64Field, 2 ** 40),
+    ('UInt8Field', fields.UInt8Field, 200),
+    ('UInt16Field', fields.UInt16Field, 60000),
+    ('UInt32Field', fields.UInt32Field, 2 ** 31),
+    ('UInt64Field', fields.UInt64Field, 2 ** 40),
+    ('UInt8ReverseField', fields.UInt8ReverseField, 200),
+    ('UInt16ReverseField', fields.UInt16ReverseField, 60000),
+    ('UInt32ReverseField', fields.UInt32ReverseField, 2 ** 31),
+    ('UInt64ReverseField', fields.UInt64ReverseField, 2 ** 40),
+    ('FloatField', fields.FloatField, 3.14159),
+    ('PickleField', fields.PickleField, {'a': [1, 2, 3]}),
+    ('JSONField', fields.JSONField, {'a': [1, 2, 3]}),
+    ('UUIDField', fields.UUIDField, uuid.uuid4()),
+    ('IPv4Field', fields.IPv4Field, ipaddress.IPv4Address(u'10.0.0.1')),
+    ('IPv6Field', fields.IPv6Field, ipaddress.IPv6Address(u'::1')),
+    ('IntEnumField', lambda: fields.IntEnumField(Color), Color.green),
+    ('ExpireField', fields.ExpireField, None),
+)
+
+if hasattr(fields, 'MessagePackField'):
+    FIELDS += (
+        ('MessagePackField', fields.MessagePackField, {'a': [1, 2, 3]}),
+    )
+
+
+@contextmanager
+def environment():
+    path = tempfile.mkdtemp(prefix='sonya-bench-')
+    env = Environment(path)
+
+    try:
+        yield env
+    finally:
+        env.close()
+        shutil.rmtree(path, ignore_errors=True)
+
+
+@contextmanager
+def database(schema, rows=0, make_row=None):
+    """ Opened database filled with ``rows`` documents """
+    with environment() as env:
+        db = env.database('bench', schema())
+        env.open()
+
+        if rows:
+            db.set_many([make_row(i) for i in range(rows)])
+
+        yield db
+
+
+def bench_set(size, label, schema, make_row):
+    with database(schema) as db:
+        yield measure(
+            'set.%s' % label, size,
+            lambda i: db.set(db.document(**make_row(i))), size,
+        )
+
+
+def bench_get(size, label, schema, make_row):
+    random = Random(size)
+    keys = [make_row(random.randrange(size))['key'] for _ in range(size)]
+
+    with database(schema, size, make_row) as db:
+        yield measure(
+            'get.%s' % label, size, lambda i: db.get(key=keys[i]), size,
+        )
+
+        batch = 100
+        yield measure(
+            'get_many.%s' % label, size,
+            lambda i: db.get_many(keys[i * batch:(i + 1) * batch]),
+            max(size // batch, 1), batch,
+        )
+
+
+def bench_set_many(size, label, schema, make_row, batch=1000):
+    rows = [make_row(i) for i in range(size)]
+    calls = max(size // batch, 1)
+
+    with database(schema) as db:
+        yield measure(
+            'set_many.%s' % label, size,
+            lambda i: db.set_many(rows[i * batch:(i + 1) * batch]),
+            calls, min(batch, size),
+        )
+
+
+def bench_transaction(size, label, schema, make_row, batch=10):
+    calls = max(size // batch, 1)
+
+    def commit(i):
+        with db.transaction() as tx:
+            for j in range(i * batch, (i + 1) * batch):
+                tx.set(db.document(**make_row(j)))
+
+    with database(schema) as db:
+        yield measure(
+            'transaction.%s' % label, size, commit, calls, batch,
+        )
+
+
+def bench_cursor(size, label, schema, make_row, runs=5, window=100):
+    random = Random(size)
+    starts = [
+        make_row(random.randrange(size))['key'] for _ in range(size // 10)
+    ]
+
+    def scan(_):
+        for _ in db.cursor():
+            pass
+
+    def scan_range(i):
+        for _ in db.cursor(limit=window, key=starts[i]):
+            pass
+
+    with database(schema, size, make_row) as db:
+        yield measure('cursor.full.%s' % label, size, scan, runs, size)
+        yield measure(
+            'cursor.range.%s' % label, size, scan_range,
+            len(starts), window,
+        )
+
+
+def bench_delete_many(size, label, schema, make_row):
+    with database(schema, size, make_row) as db:
+        yield measure(
+            'delete_many.%s' % label, size,
+            lambda _: db.delete_many(batch_size=1000), 1, size,
+        )
+
+
+def bench_fields(size):
+    """ Document encode and decode of every field type """
+    for name, factory, sample in FIELDS:
+        schema = type(name + 'Schema', (Schema,), {
+            'key': fields.UInt32Field(index=0),
+            'value': factory(),
+        })
+
+        with database(schema) as db:
+            db.set(db.document(key=0, value=sample))
+
+            yield measure(
+                'encode.%s' % name, size,
+                lambda i: db.document(key=i, value=sample), size,
+            )
+
+            document = db.get(key=0)
+
+            yield measure(
+                'decode.%s' % name, size, lambda _: dict(document), size,
+            )
+
+
+SUITE = (
+    ('set', bench_set),
+    ('get', bench_get),
+    ('set_many', bench_set_many),
+    ('transaction', bench_transaction),
+    ('cursor', bench_cursor),
+    ('delete_many', bench_delete_many),
+)
+
+
+def run(sizes, only=None):
+    """ Runs the suite (or the ``only`` cases and ``"fields"``)
+    for every dataset size """
+    for size in sizes:
+        for name, case in SUITE:
+            if only and name not in only:
+                continue
+
+            for label, schema, make_row in SCHEMAS:
+                for result in case(size, label, schema, make_row):
+                    yield result
+
+        if not only or 'fields' in only:
+            for result in bench_fields(size):
+                yield result
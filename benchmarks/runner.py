@@ -0,0 +1,117 @@
+import json
+import platform
+import sys
+import time
+from collections import namedtuple
+from timeit import default_timer as clock
+
+
+Result = namedtuple('Result', (
+    'name', 'size', 'ops', 'seconds', 'ops_per_sec', 'p50', 'p99',
+))
+
+
+def percentile(values, fraction):
+    """ Nearest-rank percentile of the sorted ``values`` """
+    if not values:
+        return None
+
+    idx = int(round(fraction * (len(values) - 1)))
+    return values[idx]
+
+
+def measure(name, size, func, iterations, ops_per_call=1):
+    """ Calls ``func(i)`` ``iterations`` times. Latencies are measured
+    per call, the throughput is ``ops_per_call`` operations per call. """
+    latencies = []
+
+    started = clock()
+
+    for i in range(iterations):
+        call_started = clock()
+        func(i)
+        latencies.append(clock() - call_started)
+
+    seconds = clock() - started
+    latencies.sort()
+    ops = iterations * ops_per_call
+
+    return Result(
+        name=name,
+        size=size,
+        ops=ops,
+        seconds=seconds,
+        ops_per_sec=ops / seconds if seconds else None,
+        p50=percentile(latencies, 0.5),
+        p99=percentile(latencies, 0.99),
+    )
+
+
+def metadata():
+    from sonya import sophia
+
+    env = sophia.Environment()
+
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'sophia': env.get('sophia.version'),
+        'sophia_build': env.get('sophia.build'),
+        'time': time.time(),
+    }
+
+
+def dump(results, path):
+    with open(path, 'w') as fp:
+        json.dump({
+            'meta': metadata(),
+            'results': [result._asdict() for result in results],
+        }, fp, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as fp:
+        data = json.load(fp)
+
+    return [Result(**item) for item in data['results']]
+
+
+Comparison = namedtuple('Comparison', (
+    'name', 'size', 'baseline', 'current', 'change',
+))
+
+
+def compare(baseline, current, threshold=0.1):
+    """ Throughput changes of the results present in both runs.
+    Returns the comparisons and the regressions beyond ``threshold``. """
+    previous = {(item.name, item.size): item for item in baseline}
+    comparisons = []
+
+    for item in current:
+        base = previous.get((item.name, item.size))
+
+        if base is None or not base.ops_per_sec or not item.ops_per_sec:
+            continue
+
+        comparisons.append(Comparison(
+            item.name, item.size, base.ops_per_sec, item.ops_per_sec,
+            item.ops_per_sec / base.ops_per_sec - 1,
+        ))
+
+    regressions = [item for item in comparisons if item.change < -threshold]
+    return comparisons, regressions
+
+
+def format_result(result):
+    return '%-32s %8d %12.0f ops/s  p50 %9.2f us  p99 %9.2f us' % (
+        result.name, result.size, result.ops_per_sec or 0,
+        (result.p50 or 0) * 1e6, (result.p99 or 0) * 1e6,
+    )
+
+
+def format_comparison(item):
+    return '%-32s %8d %12.0f -> %12.0f ops/s  %+7.1f%%' % (
+        item.name, item.size, item.baseline, item.current, item.change * 100,
+    )
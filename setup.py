@@ -1,7 +1,11 @@
+import sys
+
 try:
     from setuptools import setup, Extension, find_packages
+    from setuptools.command.build_py import build_py
 except ImportError:
     from distutils.core import setup, Extension, find_packages
+    from distutils.command.build_py import build_py
 
 
 try:
@@ -24,6 +28,23 @@ except ImportError:
         ),
     ]
 
+
+class BuildPy(build_py):
+    # sonya.aio uses the async/await syntax
+    ASYNC_MODULES = {('sonya', 'aio')}
+
+    def find_package_modules(self, package, package_dir):
+        modules = build_py.find_package_modules(self, package, package_dir)
+
+        if sys.version_info >= (3, 5):
+            return modules
+
+        return [
+            module for module in modules
+            if module[:2] not in self.ASYNC_MODULES
+        ]
+
+
 setup(
     name='sonya',
     version='0.6.6',
@@ -32,9 +53,10 @@ setup(
     author='Dmitry Orlov',
     author_email="me@mosquito.su",
     ext_modules=extensions,
+    cmdclass={'build_py': BuildPy},
     license='BSD',
     include_package_data=True,
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     classifiers=[
         'License :: OSI Approved :: BSD License',
         'Topic :: Software Development',
@@ -65,6 +87,6 @@ setup(
         'msgpack': [
             'msgpack-python',
         ],
-        ':python_version < "3"': ['py2-ipaddress', 'enum34'],
+        ':python_version < "3"': ['py2-ipaddress', 'enum34', 'futures'],
     },
 )
@@ -15,12 +15,17 @@
 from sonya import fields
 from sonya.db import Database
 from sonya.env import Environment
+from sonya.options import DatabaseOptions, EnvironmentOptions
 from sonya.schema import Schema
+from sonya.writer import GroupCommitWriter
 
 
 __all__ = (
     'fields',
     'Database',
+    'DatabaseOptions',
     'Environment',
+    'EnvironmentOptions',
+    'GroupCommitWriter',
     'Schema'
 )
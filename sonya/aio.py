@@ -0,0 +1,280 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+
+from .document import Document
+from .env import Environment
+
+
+class AsyncEnvironment:
+    """ :class:`sonya.Environment` running the engine calls on the bounded
+    thread pool. The native layer releases the GIL around the disk access,
+    so the event loop is not blocked by the slow reads. """
+
+    def __init__(self, path, max_workers=4, loop=None):
+        self.env = Environment(path)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.databases = dict()
+        self._loop = loop
+
+    @property
+    def loop(self):
+        return self._loop or asyncio.get_event_loop()
+
+    def run(self, func, *args, **kwargs):
+        return self.loop.run_in_executor(
+            self.executor, partial(func, *args, **kwargs)
+        )
+
+    def database(self, name, schema, batch_size=128, **kwargs):
+        db = AsyncDatabase(
+            self, self.env.database(name, schema, **kwargs),
+            batch_size=batch_size,
+        )
+
+        self.databases[name] = db
+        return db
+
+    @property
+    def is_closed(self):
+        return self.env.is_closed
+
+    @property
+    def is_opened(self):
+        return self.env.is_opened
+
+    async def open(self):
+        return await self.run(self.env.open)
+
+    async def close(self):
+        try:
+            await self.run(self.env.close)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncTransaction:
+    __slots__ = 'db', 'tx'
+
+    def __init__(self, db, tx):
+        self.db = db
+        self.tx = tx
+
+    def __run(self, func, *args, **kwargs):
+        return self.db.env.run(func, *args, **kwargs)
+
+    async def get(self, **kwargs):
+        return await self.__run(self.tx.get, **kwargs)
+
+    async def get_many(self, keys, sort=False):
+        return await self.__run(self.tx.get_many, list(keys), sort)
+
+    async def set(self, document):
+        return await self.__run(self.tx.set, document)
+
+    async def set_many(self, rows):
+        return await self.__run(self.tx.set_many, list(rows))
+
+    async def upsert(self, **kwargs):
+        return await self.__run(self.tx.upsert, **kwargs)
+
+    async def delete(self, **kwargs):
+        return await self.__run(self.tx.delete, **kwargs)
+
+    async def commit(self):
+        return await self.__run(self.tx.commit)
+
+    async def rollback(self):
+        return await self.__run(self.tx.rollback)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.rollback()
+
+
+class AsyncCursor:
+    """ Async iterator over the :class:`sonya.db.Cursor`. The documents
+    are read by ``batch_size`` chunks per executor call. The cursor
+    document is valid until the next step only, so the rows are yielded
+    as dicts (or key tuples for the ``keys_only`` cursor). """
+
+    __slots__ = 'db', 'cursor', 'batch_size', '_iterator', '_buffer'
+
+    def __init__(self, db, cursor, batch_size=128):
+        self.db = db
+        self.cursor = cursor
+        self.batch_size = batch_size
+        self._iterator = None
+        self._buffer = []
+
+    def _read(self, size):
+        if self._iterator is None:
+            self._iterator = iter(self.cursor)
+
+        return [
+            dict(item) if isinstance(item, Document) else item
+            for item in islice(self._iterator, size)
+        ]
+
+    async def fetchmany(self, size):
+        """ Returns up to ``size`` rows as tuples in ``fields`` order """
+        return await self.db.env.run(self.cursor.fetchmany, size)
+
+    async def close(self):
+        return await self.db.env.run(self.cursor.close)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._buffer:
+            self._buffer = await self.db.env.run(self._read, self.batch_size)
+            self._buffer.reverse()
+
+        if not self._buffer:
+            raise StopAsyncIteration
+
+        return self._buffer.pop()
+
+
+class AsyncDatabase:
+    """ Awaitable front-end of the :class:`sonya.Database`.
+
+    Concurrent :meth:`get` calls issued in the same event loop iteration
+    are coalesced, so up to ``batch_size`` lookups take one executor job
+    and one :meth:`sonya.Database.get_many` call.
+    """
+
+    def __init__(self, env, db, batch_size=128):
+        self.env = env
+        self.db = db
+        self.batch_size = batch_size
+        self._pending = []
+
+    @property
+    def name(self):
+        return self.db.name
+
+    @property
+    def schema(self):
+        return self.db.schema
+
+    def document(self, **kwargs):
+        return self.db.document(**kwargs)
+
+    def get(self, **kwargs):
+        """ Returns the future of the document """
+        future = self.env.loop.create_future()
+        self._pending.append((kwargs, future))
+
+        if len(self._pending) == 1:
+            self.env.loop.call_soon(self._flush)
+
+        return future
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+
+        for idx in range(0, len(pending), self.batch_size):
+            chunk = pending[idx:idx + self.batch_size]
+            job = self.env.run(self._get_batch, [query for query, _ in chunk])
+            job.add_done_callback(partial(self._resolve, chunk))
+
+    def _get_batch(self, queries):
+        names = tuple(name for name, _ in self.schema.key_fields)
+        results = []
+        keys = []
+        positions = []
+
+        for idx, query in enumerate(queries):
+            try:
+                keys.append(tuple(query[name] for name in names))
+            except KeyError:
+                results.append((False, ValueError('Not enough key fields')))
+                continue
+
+            positions.append(idx)
+            results.append(None)
+
+        for idx, doc in zip(positions, self.db.get_many(keys, sort=True)):
+            if doc is None:
+                results[idx] = (False, LookupError())
+            else:
+                results[idx] = (True, doc)
+
+        return results
+
+    @staticmethod
+    def _resolve(chunk, job):
+        if job.cancelled() or job.exception() is not None:
+            for _, future in chunk:
+                if future.done():
+                    continue
+                elif job.cancelled():
+                    future.cancel()
+                else:
+                    future.set_exception(job.exception())
+            return
+
+        for (_, future), (ok, value) in zip(chunk, job.result()):
+            if future.done():
+                continue
+            elif ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    async def get_many(self, keys, sort=False):
+        return await self.env.run(self.db.get_many, list(keys), sort)
+
+    async def set(self, document):
+        return await self.env.run(self.db.set, document)
+
+    async def set_many(self, rows):
+        return await self.env.run(self.db.set_many, list(rows))
+
+    async def upsert(self, **kwargs):
+        return await self.env.run(self.db.upsert, **kwargs)
+
+    async def delete(self, **kwargs):
+        return await self.env.run(self.db.delete, **kwargs)
+
+    async def delete_many(self, **query):
+        return await self.env.run(self.db.delete_many, **query)
+
+    async def count(self, exact=False):
+        return await self.env.run(self.db.count, exact)
+
+    def transaction(self):
+        return AsyncTransaction(self, self.db.transaction())
+
+    def cursor(self, batch_size=None, **kwargs):
+        """ Accepts the :meth:`sonya.Database.cursor` arguments """
+        return AsyncCursor(
+            self, self.db.cursor(**kwargs),
+            batch_size=batch_size or self.batch_size,
+        )
+
+    def __aiter__(self):
+        return self.cursor().__aiter__()
+
+
+__all__ = (
+    'AsyncCursor',
+    'AsyncDatabase',
+    'AsyncEnvironment',
+    'AsyncTransaction',
+)
@@ -0,0 +1,98 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+)
+
+from .db import BatchResult, Cursor, Database, Row, Transaction
+from .document import Document
+from .env import Environment
+from .schema import Schema
+
+
+class AsyncEnvironment:
+    env = ...           # type: Environment
+    executor = ...      # type: ThreadPoolExecutor
+    databases = ...     # type: Dict[str, AsyncDatabase]
+
+    def __init__(self, path: str, max_workers: int = 4,
+                 loop: asyncio.AbstractEventLoop = None): ...
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop: ...
+
+    def run(self, func: Callable, *args, **kwargs) -> asyncio.Future: ...
+    def database(self, name: str, schema: Schema, batch_size: int = 128,
+                 **kwargs) -> AsyncDatabase: ...
+
+    @property
+    def is_closed(self) -> bool: ...
+
+    @property
+    def is_opened(self) -> bool: ...
+
+    async def open(self) -> bool: ...
+    async def close(self): ...
+    async def __aenter__(self) -> AsyncEnvironment: ...
+    async def __aexit__(self, exc_type, exc_val, exc_tb): ...
+
+
+class AsyncTransaction:
+    db = ...    # type: AsyncDatabase
+    tx = ...    # type: Transaction
+
+    def __init__(self, db: AsyncDatabase, tx: Transaction): ...
+    async def get(self, **kwargs) -> Document: ...
+    async def get_many(self, keys: Iterable[Union[tuple, Any]],
+                       sort: bool = False) -> List[Optional[Document]]: ...
+    async def set(self, document: Document) -> int: ...
+    async def set_many(self, rows: Iterable[Row]) -> BatchResult: ...
+    async def upsert(self, **kwargs) -> int: ...
+    async def delete(self, **kwargs) -> int: ...
+    async def commit(self) -> int: ...
+    async def rollback(self) -> int: ...
+    async def __aenter__(self) -> AsyncTransaction: ...
+    async def __aexit__(self, exc_type, exc_val, exc_tb): ...
+
+
+class AsyncCursor:
+    db = ...            # type: AsyncDatabase
+    cursor = ...        # type: Cursor
+    batch_size = ...    # type: int
+
+    def __init__(self, db: AsyncDatabase, cursor: Cursor,
+                 batch_size: int = 128): ...
+    async def fetchmany(self, size: int) -> List[tuple]: ...
+    async def close(self): ...
+    def __aiter__(self) -> AsyncCursor: ...
+    async def __anext__(self) -> Union[Dict[str, Any], tuple]: ...
+
+
+class AsyncDatabase:
+    env = ...           # type: AsyncEnvironment
+    db = ...            # type: Database
+    batch_size = ...    # type: int
+
+    def __init__(self, env: AsyncEnvironment, db: Database,
+                 batch_size: int = 128): ...
+
+    @property
+    def name(self) -> str: ...
+
+    @property
+    def schema(self) -> Schema: ...
+
+    def document(self, **kwargs) -> Document: ...
+    def get(self, **kwargs) -> Awaitable[Document]: ...
+    async def get_many(self, keys: Iterable[Union[tuple, Any]],
+                       sort: bool = False) -> List[Optional[Document]]: ...
+    async def set(self, document: Document): ...
+    async def set_many(self, rows: Iterable[Row]) -> BatchResult: ...
+    async def upsert(self, **kwargs) -> int: ...
+    async def delete(self, **kwargs) -> int: ...
+    async def delete_many(self, **query) -> int: ...
+    async def count(self, exact: bool = False) -> int: ...
+    def transaction(self) -> AsyncTransaction: ...
+    def cursor(self, batch_size: Optional[int] = None,
+               **kwargs) -> AsyncCursor: ...
+    def __aiter__(self) -> AsyncCursor: ...
@@ -0,0 +1,262 @@
+import json
+import os
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import islice
+
+try:
+    import msgpack
+except ImportError:     # pragma: no cover
+    msgpack = None
+
+
+LoadResult = namedtuple('LoadResult', ('count', 'errors', 'skipped'))
+
+FORMATS = {
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.msgpack': 'msgpack',
+    '.mpk': 'msgpack',
+}
+
+
+def read_ndjson(path):
+    """ Rows of the newline delimited JSON file, blank lines are skipped """
+    with open(path, 'rb') as fp:
+        for line in fp:
+            line = line.strip()
+
+            if line:
+                yield json.loads(line.decode('utf-8'))
+
+
+def read_msgpack(path):
+    """ Rows of the file of the concatenated MessagePack objects """
+    if msgpack is None:
+        raise RuntimeError('msgpack is not installed')
+
+    with open(path, 'rb') as fp:
+        for row in msgpack.Unpacker(fp, raw=False):
+            yield row
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'msgpack': read_msgpack,
+}
+
+
+def read(path, format=None):
+    """ Rows of the file, the ``format`` ("ndjson" or "msgpack") is
+    detected by the file extension when omitted """
+    if format is None:
+        format = FORMATS.get(os.path.splitext(path)[1].lower())
+
+    if format not in READERS:
+        raise ValueError('Unknown format of %r' % path)
+
+    return READERS[format](path)
+
+
+def read_marker(path):
+    """ Number of the source rows loaded durably by the interrupted load """
+    if path is None or not os.path.exists(path):
+        return 0
+
+    with open(path) as fp:
+        return json.load(fp)['offset']
+
+
+def write_marker(path, offset, count):
+    temp = path + '.tmp'
+
+    with open(temp, 'w') as fp:
+        json.dump({'offset': offset, 'count': count}, fp)
+
+    getattr(os, 'replace', os.rename)(temp, path)
+
+
+def _reopen(env, log_enable):
+    """ ``log.enable`` is an offline setting, so the environment is closed
+    and opened again with the new value """
+    if not env.is_closed and env.status == 'online':
+        env.close()
+
+    env.options.update(log_enable=log_enable)
+
+    if not env.is_closed:
+        env.options.apply(env)
+
+    env.open()
+
+
+@contextmanager
+def without_log(env):
+    """ Disables the write-ahead log of the environment """
+    previous = env.options.log_enable
+
+    if previous is False:
+        yield
+        return
+
+    _reopen(env, False)
+
+    try:
+        yield
+    finally:
+        _reopen(env, previous)
+
+
+def checkpoint(env, names, compact=False, interval=0.001):
+    """ Dumps the in-memory indexes of the databases to the disk and waits
+    for the completion running the scheduler in the calling thread """
+    pending = list(names)
+
+    while pending:
+        for name in pending:
+            if not env['db.%s.scheduler.checkpoint' % name]:
+                env.checkpoint(name)
+
+        if not env.run_scheduler(1):
+            time.sleep(interval)
+
+        pending = [
+            name for name in pending
+            if env['db.%s.index.memory_used' % name] or
+            env['db.%s.scheduler.checkpoint' % name]
+        ]
+
+    if compact:
+        for name in names:
+            env.compact(name)
+
+
+def _sort_key(schema):
+    codec = schema.codec
+    fields = [
+        (name, codec.position(name), field,
+         field.TYPE.value.endswith(b'_rev'))
+        for name, field in schema.key_fields
+    ]
+
+    def key(row):
+        values = []
+
+        try:
+            for name, position, field, reverse in fields:
+                value = field.from_python(
+                    row[name] if isinstance(row, dict) else row[position]
+                )
+                values.append(-value if reverse else value)
+        except Exception:
+            # broken rows go first and get reported by the write
+            return ()
+
+        return tuple(values)
+
+    return key
+
+
+def load(db, rows, sorted=True, format=None, batch_size=10000,
+         checkpoint_every=1000000, resume=None, wal=False, compact=False,
+         progress=None):
+    """ Loads the rows (dicts or tuples in the schema field order) into
+    the database by the batches written in one transaction through
+    the native encoder.
+
+    The write-ahead log is disabled during the load unless ``wal`` is set,
+    so the environment is reopened before and after the load and must not
+    be written by others meanwhile. The data is made durable by the
+    checkpoints every ``checkpoint_every`` rows and at the end.
+
+    :param rows: iterable or the path of NDJSON or msgpack file
+    :param sorted: rows come in the key order, otherwise every batch
+                   is sorted before the write
+    :param format: "ndjson" or "msgpack", detected by the file extension
+    :param resume: path of the marker file keeping the number of the rows
+                   loaded durably, an interrupted load started with the same
+                   marker skips them. Removed when the load completes.
+    :param compact: run the compaction after the final checkpoint
+    :param progress: ``progress(loaded)`` called after every batch
+    :return: LoadResult(count, errors, skipped), ``errors`` are
+             ``(position in the source, exception)`` pairs
+    """
+    if batch_size <= 0:
+        raise ValueError('Batch size must be positive')
+
+    if isinstance(rows, str):
+        rows = read(rows, format)
+
+    env = db.environment
+    names = [db.name] + [index.db.name for index in db.indexes.values()]
+    skipped = read_marker(resume)
+    source = islice(enumerate(rows), skipped, None)
+    sort_key = None if sorted else _sort_key(db.schema)
+
+    count = 0
+    durable = 0
+    errors = []
+
+    def write(batch, positions):
+        if sort_key is not None:
+            order = list(range(len(batch)))
+            order.sort(key=lambda idx: sort_key(batch[idx]))
+            batch = [batch[idx] for idx in order]
+            positions = [positions[idx] for idx in order]
+
+        with db.transaction() as tx:
+            result = tx.set_many(batch)
+
+        errors.extend((positions[idx], exc) for idx, exc in result.errors)
+        return result.count
+
+    context = without_log(env) if not wal else _nothing()
+
+    with context:
+        offset = skipped
+
+        while True:
+            chunk = list(islice(source, batch_size))
+
+            if not chunk:
+                break
+
+            count += write(
+                [row for _, row in chunk], [idx for idx, _ in chunk]
+            )
+            offset = chunk[-1][0] + 1
+
+            if count - durable >= checkpoint_every:
+                checkpoint(env, names)
+                durable = count
+
+                if resume is not None:
+                    write_marker(resume, offset, count)
+
+            if progress is not None:
+                progress(count)
+
+        checkpoint(env, names, compact=compact)
+
+    if resume is not None and os.path.exists(resume):
+        os.remove(resume)
+
+    return LoadResult(count, errors, skipped)
+
+
+@contextmanager
+def _nothing():
+    yield
+
+
+__all__ = (
+    'LoadResult',
+    'checkpoint',
+    'load',
+    'read',
+    'read_marker',
+    'read_msgpack',
+    'read_ndjson',
+    'without_log',
+)
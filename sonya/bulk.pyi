@@ -0,0 +1,35 @@
+from typing import (
+    Any, Callable, ContextManager, Dict, Generator, Iterable, List,
+    NamedTuple, Sequence, Tuple, Union,
+)
+
+from .db import Database
+from .env import Environment
+
+
+Row = Union[Dict[str, Any], Sequence[Any]]
+
+LoadResult = NamedTuple('LoadResult', [
+    ('count', int),
+    ('errors', List[Tuple[int, Exception]]),
+    ('skipped', int),
+])
+
+FORMATS = ...   # type: Dict[str, str]
+READERS = ...   # type: Dict[str, Callable[[str], Generator[Row, None, None]]]
+
+
+def read_ndjson(path: str) -> Generator[Row, None, None]: ...
+def read_msgpack(path: str) -> Generator[Row, None, None]: ...
+def read(path: str, format: str = None) -> Generator[Row, None, None]: ...
+def read_marker(path: str) -> int: ...
+def write_marker(path: str, offset: int, count: int): ...
+def without_log(env: Environment) -> ContextManager[None]: ...
+def checkpoint(env: Environment, names: Iterable[str], compact: bool = False,
+               interval: float = 0.001): ...
+def load(
+    db: Database, rows: Union[str, Iterable[Row]], sorted: bool = True,
+    format: str = None, batch_size: int = 10000,
+    checkpoint_every: int = 1000000, resume: str = None, wal: bool = False,
+    compact: bool = False, progress: Callable[[int], Any] = None
+) -> LoadResult: ...
@@ -0,0 +1,129 @@
+import sys
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+
+CacheStats = namedtuple('CacheStats', (
+    'hits', 'misses', 'evictions', 'entries', 'bytes',
+))
+
+
+def _sizeof(value):
+    if isinstance(value, memoryview):
+        # the view keeps the whole result document alive
+        return sys.getsizeof(value) + value.nbytes
+
+    return sys.getsizeof(value)
+
+
+def sizeof(values):
+    """ Approximate size of the decoded document values """
+    return sum(_sizeof(value) for value in values.values())
+
+
+class LRUCache(object):
+    """ Least recently used cache of the decoded documents bounded by
+    the number of entries and/or their approximate size in bytes.
+
+    Every invalidation increments the ``generation``, the reader takes it
+    before the engine read and passes to :meth:`put`, so the value read
+    before the concurrent write is not cached after its invalidation. """
+
+    __slots__ = (
+        'max_entries', 'max_bytes', 'hits', 'misses', 'evictions',
+        'generation', '_entries', '_bytes', '_lock',
+    )
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        if max_entries is None and max_bytes is None:
+            raise ValueError('max_entries or max_bytes must be set')
+
+        for value in (max_entries, max_bytes):
+            if value is not None and value <= 0:
+                raise ValueError('Cache bounds must be positive')
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """ Returns the cached value or None """
+        with self._lock:
+            item = self._entries.get(key)
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            # move to the most recently used end
+            self._entries[key] = self._entries.pop(key)
+            return item[0]
+
+    def put(self, key, value, size=0, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._discard(key)
+
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while (
+                (self.max_entries is not None and
+                 len(self._entries) > self.max_entries) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def _discard(self, key):
+        item = self._entries.pop(key, None)
+
+        if item is not None:
+            self._bytes -= item[1]
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            self._discard(key)
+
+    def invalidate_many(self, keys):
+        with self._lock:
+            self.generation += 1
+
+            for key in keys:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return CacheStats(
+            self.hits, self.misses, self.evictions,
+            len(self._entries), self._bytes,
+        )
+
+
+__all__ = ('CacheStats', 'LRUCache', 'sizeof')
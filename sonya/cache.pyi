@@ -0,0 +1,32 @@
+from typing import Any, Dict, Hashable, Iterable, NamedTuple, Optional
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+def sizeof(values: Dict[str, Any]) -> int: ...
+
+
+class LRUCache(object):
+    max_entries = ...   # type: Optional[int]
+    max_bytes = ...     # type: Optional[int]
+    hits = ...          # type: int
+    misses = ...        # type: int
+    evictions = ...     # type: int
+    generation = ...    # type: int
+
+    def __init__(self, max_entries: int = None, max_bytes: int = None): ...
+    def __len__(self) -> int: ...
+    def __contains__(self, key: Hashable) -> bool: ...
+    def get(self, key: Hashable) -> Any: ...
+    def put(self, key: Hashable, value: Any, size: int = 0,
+            generation: int = None): ...
+    def invalidate(self, key: Hashable): ...
+    def invalidate_many(self, keys: Iterable[Hashable]): ...
+    def clear(self): ...
+    def stats(self) -> CacheStats: ...
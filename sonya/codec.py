@@ -0,0 +1,145 @@
+from . import sophia
+
+
+class SchemaCodec(object):
+    """ Field table of the schema built once per schema class. Encodes
+    and decodes whole documents through the :class:`sophia.Codec`. """
+
+    __slots__ = (
+        'names', 'positions', 'fields', 'spec', 'keys', 'key_spec', 'native',
+        'encoders', 'decoders', 'auto', 'views', '_defaults', '_filled',
+    )
+
+    def __init__(self, fields):
+        fields = tuple(fields)
+
+        self.names = tuple(name for name, _ in fields)
+        self.positions = {name: idx for idx, name in enumerate(self.names)}
+        self.fields = tuple(field for _, field in fields)
+        self.keys = tuple(sorted(
+            (idx for idx, field in enumerate(self.fields)
+             if field.index is not None),
+            key=lambda idx: self.fields[idx].index
+        ))
+        self.spec = tuple(
+            (name, field.TYPE.is_bytes) for name, field in fields
+        )
+        self.key_spec = tuple(self.spec[idx] for idx in self.keys)
+        # bytes fields read as the views over the result document memory
+        self.views = tuple(
+            idx for idx, field in enumerate(self.fields) if field.zero_copy
+        )
+        self.native = sophia.Codec(self.spec, self.views)
+        self.encoders = tuple(field.from_python for field in self.fields)
+        self.decoders = tuple(
+            None if field.ARRAY_TYPECODE else field.to_python
+            for field in self.fields
+        )
+        # fields filled by the engine unless they are set explicitly
+        self.auto = tuple(
+            idx for idx, field in enumerate(self.fields)
+            if field.AUTO and field.default is None
+        )
+        self._defaults = None
+        self._filled = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def defaults(self):
+        """ Encoded defaults, None for the ``auto`` fields """
+        if self._defaults is None:
+            self._defaults = tuple(
+                None if idx in self.auto else field.from_python(field.default)
+                for idx, field in enumerate(self.fields)
+            )
+
+        return self._defaults
+
+    def position(self, key):
+        try:
+            return self.positions[key]
+        except KeyError:
+            raise KeyError('Unknown key %r for schema' % (key,))
+
+    def key(self, document):
+        """ Native values of the key fields in the index order """
+        return tuple(self.native.get(document, idx) for idx in self.keys)
+
+    def row_key(self, values):
+        """ Key of the encoded row (the native values in field order) """
+        return tuple(values[idx] for idx in self.keys)
+
+    def write_defaults(self, document):
+        if not self.auto:
+            return self.native.encode(document, self.defaults)
+
+        if self._filled is None:
+            positions = tuple(
+                idx for idx in range(len(self.fields)) if idx not in self.auto
+            )
+            self._filled = (
+                tuple(self.defaults[idx] for idx in positions), positions
+            )
+
+        return self.native.encode(document, *self._filled)
+
+    def encode(self, values):
+        return tuple(
+            encoder(value) for encoder, value in zip(self.encoders, values)
+        )
+
+    def encode_dict(self, values):
+        result = list(self.defaults)
+
+        for key, value in values.items():
+            idx = self.position(key)
+            result[idx] = self.encoders[idx](value)
+
+        for idx in self.auto:
+            if result[idx] is None:
+                result[idx] = self.encoders[idx](None)
+
+        return tuple(result)
+
+    def update(self, document, values):
+        """ Writes the subset of the fields in one native pass """
+        positions = []
+        encoded = []
+
+        for key, value in values.items():
+            idx = self.position(key)
+            positions.append(idx)
+            encoded.append(self.encoders[idx](value))
+
+        return self.native.encode(document, tuple(encoded), tuple(positions))
+
+    def set(self, document, key, value):
+        idx = self.position(key)
+        return self.native.set(document, idx, self.encoders[idx](value))
+
+    def get(self, document, key):
+        idx = self.position(key)
+        value = self.native.get(document, idx)
+
+        if value is None:
+            raise KeyError('Key %r not found in the document' % key)
+
+        decoder = self.decoders[idx]
+        return value if decoder is None else decoder(value)
+
+    def decode(self, values):
+        return tuple(
+            value if decoder is None or value is None else decoder(value)
+            for decoder, value in zip(self.decoders, values)
+        )
+
+    def items(self, document):
+        for name, decoder, value in zip(
+            self.names, self.decoders, self.native.decode(document)
+        ):
+            if value is None:
+                continue
+
+            yield name, value if decoder is None else decoder(value)
@@ -0,0 +1,41 @@
+from typing import (
+    Any, Callable, Dict, Generator, Iterable, Optional, Tuple, Union
+)
+
+from . import sophia
+from .fields import BaseField
+
+
+class SchemaCodec(object):
+    names = ...         # type: Tuple[str, ...]
+    positions = ...     # type: Dict[str, int]
+    fields = ...        # type: Tuple[BaseField, ...]
+    spec = ...          # type: Tuple[Tuple[str, bool], ...]
+    keys = ...          # type: Tuple[int, ...]
+    key_spec = ...      # type: Tuple[Tuple[str, bool], ...]
+    native = ...        # type: sophia.Codec
+    encoders = ...      # type: Tuple[Callable[[Any], Union[bytes, int]], ...]
+    decoders = ...      # type: Tuple[Optional[Callable], ...]
+    auto = ...          # type: Tuple[int, ...]
+    views = ...         # type: Tuple[int, ...]
+
+    def __init__(self, fields: Iterable[Tuple[str, BaseField]]): ...
+    def __len__(self) -> int: ...
+
+    @property
+    def defaults(self) -> tuple: ...
+
+    def position(self, key: str) -> int: ...
+    def key(self, document: sophia.Document) -> tuple: ...
+    def row_key(self, values: tuple) -> tuple: ...
+    def write_defaults(self, document: sophia.Document) -> int: ...
+    def encode(self, values: Iterable) -> tuple: ...
+    def encode_dict(self, values: Dict[str, Any]) -> tuple: ...
+    def update(self, document: sophia.Document,
+               values: Dict[str, Any]) -> int: ...
+    def set(self, document: sophia.Document, key: str, value) -> int: ...
+    def get(self, document: sophia.Document, key: str) -> Any: ...
+    def decode(self, values: tuple) -> tuple: ...
+    def items(
+        self, document: sophia.Document
+    ) -> Generator[Tuple[str, Any], None, None]: ...
@@ -1,19 +1,162 @@
-from .document import Document
+from collections import namedtuple
+from functools import wraps
+from itertools import islice
+from timeit import default_timer as clock
+
+from . import sophia
+from .cache import LRUCache, sizeof
+from .document import CachedDocument, Document
+from .index import SecondaryIndex, index_name, index_schema
+from .options import DatabaseOptions
+from .parallel import _UNSET, parallel_scan
+from .retry import ConflictStats, run_in_transaction
+from .writer import GroupCommitWriter
+
+
+BatchResult = namedtuple('BatchResult', ('count', 'errors'))
+
+# hidden u64 field of the databases with the merge operators keeping
+# the bits of the fields set by the upsert statement
+MERGE_MASK = '_merge_mask'
+
+IndexStats = namedtuple('IndexStats', (
+    'count', 'count_dup', 'memory_used', 'size', 'size_uncompressed',
+    'node_count', 'page_count',
+))
+
+
+def encode_rows(schema, rows):
+    """ Converts dicts or tuples (in the schema field order) to the tuples
+    of the native values. Returns encoded rows, their positions in the
+    source iterable and the list of ``(index, exception)`` for broken rows.
+    """
+    codec = schema.codec
+
+    encoded = []
+    positions = []
+    errors = []
+
+    for idx, row in enumerate(rows):
+        try:
+            if isinstance(row, dict):
+                values = codec.encode_dict(row)
+            else:
+                if len(row) != len(codec):
+                    raise ValueError(
+                        'Expected %d values got %d' % (len(codec), len(row))
+                    )
+
+                values = codec.encode(row)
+        except Exception as e:
+            errors.append((idx, e))
+            continue
+
+        encoded.append(values)
+        positions.append(idx)
+
+    return codec.spec, encoded, positions, errors
+
+
+def encode_keys(schema, keys):
+    """ Converts the key tuples (or plain values for the single key field)
+    to the tuples of the native values """
+    key_fields = schema.key_fields
+    encoded = []
+
+    for key in keys:
+        if not isinstance(key, (tuple, list)):
+            key = (key,)
+
+        if len(key) != len(key_fields):
+            raise ValueError('Not enough key fields')
+
+        encoded.append(tuple(
+            field.from_python(value)
+            for (_, field), value in zip(key_fields, key)
+        ))
+
+    return encoded
+
+
+def read_rows(reader, schema, keys, sort=False):
+    docs = reader(schema.codec.key_spec, encode_keys(schema, keys), sort)
+
+    return [
+        None if doc is None else Document(doc, schema, readonly=True)
+        for doc in docs
+    ]
+
+
+def write_rows(writer, schema, rows, written_keys=None):
+    spec, encoded, positions, errors = encode_rows(schema, rows)
+
+    if written_keys is not None:
+        written_keys.extend(schema.codec.row_key(row) for row in encoded)
+
+    count, failed = writer(spec, encoded)
+
+    errors.extend((positions[idx], exc) for idx, exc in failed)
+    errors.sort(key=lambda item: item[0])
+    return BatchResult(count, errors)
 
 
 class Transaction:
-    __slots__ = 'tx', 'db'
+    __slots__ = 'tx', 'db', 'written_keys', 'track_keys'
 
-    def __init__(self, db):
+    def __init__(self, db, tx=None, track_keys=False):
         self.db = db
-        self.tx = db.db.transaction()
+        self.tx = db.db.transaction() if tx is None else tx
+        # keys to drop from the database cache on commit
+        self.written_keys = []
+        # collect the written keys without the cache as well
+        self.track_keys = track_keys
+
+    def _tracking(self):
+        return self.track_keys or self.db.cache is not None
+
+    def _written(self, document):
+        if self._tracking():
+            self.written_keys.append(self.db.schema.codec.key(document.value))
 
     def set(self, document):
         if not isinstance(document, Document):
             raise ValueError
 
+        self._written(document)
+        self.db._update_indexes(self.tx, document.value)
         return self.tx.set(document.value)
 
+    def upsert(self, **kwargs):
+        return self._upsert(self.db._upsert_document(kwargs))
+
+    def _upsert(self, doc):
+        self._written(doc)
+        self.db._update_indexes(self.tx, doc.value, upsert=True)
+        return self.tx.upsert(doc.value)
+
+    def set_many(self, rows):
+        if self.db.indexes:
+            writer = lambda spec, encoded: self.db._write_indexed(
+                self.tx, encoded
+            )
+        else:
+            writer = lambda spec, encoded: self.tx.set_many(
+                self.db.db, spec, encoded
+            )
+
+        return write_rows(
+            writer, self.db.schema, rows,
+            self.written_keys if self._tracking() else None
+        )
+
+    def get_many(self, keys, sort=False):
+        return read_rows(
+            lambda spec, encoded, sort: self.tx.get_many(
+                self.db.db, spec, encoded, sort
+            ),
+            self.db.schema, keys, sort
+        )
+
     def get(self, **kwargs):
         if frozenset(kwargs.keys()) != self.db.schema.keys:
             raise ValueError('Not enough key fields')
@@ -28,22 +171,249 @@ class Transaction:
         if self.db is None:
             raise RuntimeError("Can not get object on environment transaction")
 
-        return self.tx.delete(self.db.document(**kwargs).value)
+        return self._delete(self.db.document(**kwargs))
+
+    def _delete(self, doc):
+        self._written(doc)
+        self.db._update_indexes(self.tx, doc.value, deleted=True)
+        return self.tx.delete(doc.value)
 
     def commit(self):
-        return self.tx.commit()
+        """ Raises :class:`sophia.TransactionLocked` keeping
+        the transaction open, the commit may be retried then """
+        try:
+            return self.tx.commit()
+        finally:
+            # the keys of the locked transaction wait for the retry
+            if self.tx.closed:
+                if self.db.cache is not None:
+                    self.db.cache.invalidate_many(self.written_keys)
+
+                self.written_keys = []
 
     def rollback(self):
+        self.written_keys = []
         return self.tx.rollback()
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is None:
-            self.tx.commit()
+        if exc_type is not None:
+            self.rollback()
+            return
+
+        try:
+            self.commit()
+        except sophia.TransactionLocked:
+            self.rollback()
+            raise
+
+
+class EnvironmentTransaction:
+    """ Transaction covering any databases of the environment. The methods
+    take the :class:`Database` (or its name) first, ``tx[db]`` returns
+    the :class:`Transaction` bound to the database.
+
+    :meth:`freeze` ends the statements phase, then :meth:`commit` runs
+    the engine conflict check and writes the log. A locked commit keeps
+    the transaction open, so it may be retried. ``statements_time`` is
+    the time from the beginning of the transaction to :meth:`freeze`
+    (the statements phase, user code included), ``commit_time`` is
+    the duration of the engine commit (seconds).
+    """
+
+    __slots__ = (
+        'environment', 'tx', 'views', 'frozen', 'started',
+        'statements_time', 'commit_time',
+    )
+
+    def __init__(self, environment):
+        self.environment = environment
+        self.tx = environment.env.transaction()
+        self.views = {}
+        self.frozen = False
+        self.started = clock()
+        self.statements_time = None
+        self.commit_time = None
+
+    def __getitem__(self, db):
+        if not isinstance(db, Database):
+            db = self.environment.databases[db][0]
+
+        view = self.views.get(db.name)
+
+        if view is None:
+            if db.environment is not self.environment:
+                raise ValueError(
+                    'Database %r belongs to another environment' % db.name
+                )
+
+            view = self.views[db.name] = Transaction(db, self.tx)
+
+        return view
+
+    def _writer(self, db):
+        if self.frozen:
+            raise sophia.TransactionError('Transaction is frozen')
+
+        return self[db]
+
+    def set(self, db, document):
+        return self._writer(db).set(document)
+
+    def set_many(self, db, rows):
+        return self._writer(db).set_many(rows)
+
+    def upsert(self, db, **kwargs):
+        return self._writer(db).upsert(**kwargs)
+
+    def delete(self, db, **kwargs):
+        return self._writer(db).delete(**kwargs)
+
+    def get(self, db, **kwargs):
+        return self[db].get(**kwargs)
+
+    def get_many(self, db, keys, sort=False):
+        return self[db].get_many(keys, sort)
+
+    def freeze(self):
+        """ Write-phase fence: rejects the further writes, the reads are
+        still allowed. It detects no conflicts, the bundled engine has no
+        prepare step for the transactions, so the conflicts are reported
+        by :meth:`commit` only (before anything is written to the log). """
+        if self.tx.closed:
+            raise sophia.TransactionError('Transaction closed')
+
+        if not self.frozen:
+            self.frozen = True
+            self.statements_time = clock() - self.started
+
+    def _invalidate(self):
+        for view in self.views.values():
+            if view.db.cache is not None and view.written_keys:
+                view.db.cache.invalidate_many(view.written_keys)
+
+            view.written_keys = []
+
+    def commit(self):
+        """ Commits the writes to all databases atomically. Raises
+        :class:`sophia.TransactionRollback` on the conflict and
+        :class:`sophia.TransactionLocked` when the concurrent transaction
+        holds the keys (the transaction stays open then). """
+        self.freeze()
+        started = clock()
+
+        try:
+            return self.tx.commit()
+        finally:
+            self.commit_time = clock() - started
+
+            if self.tx.closed:
+                self._invalidate()
+
+    def rollback(self):
+        for view in self.views.values():
+            view.written_keys = []
+
+        return self.tx.rollback()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.rollback()
+            return
+
+        try:
+            self.commit()
+        except sophia.TransactionLocked:
+            self.rollback()
+            raise
+
+
+class Cursor:
+    """ Iterable over the documents of the database cursor. Besides the
+    iteration rows might be fetched in chunks by :meth:`fetchmany` and
+    :meth:`iter_batches` without creating a :class:`Document` per row. """
+
+    __slots__ = 'db', 'cursor', 'fields', '_spec', '_converters'
+
+    def __init__(self, db, cursor):
+        self.db = db
+        self.cursor = cursor
+
+        if cursor.keys_only:
+            fields = db.schema.key_fields
         else:
-            self.tx.rollback()
+            fields = tuple(db.schema)
+
+        self.fields = tuple(name for name, _ in fields)
+        self._spec = tuple(
+            (name, field.TYPE.is_bytes, field.ARRAY_TYPECODE)
+            for name, field in fields
+        )
+        self._converters = tuple(
+            None if field.ARRAY_TYPECODE else field.to_python
+            for _, field in fields
+        )
+
+    def __iter__(self):
+        for doc in self.cursor:
+            if self.cursor.keys_only:
+                yield self.db._decode_key(doc)
+            else:
+                yield Document(doc, self.db.schema, readonly=True)
+
+    def fetchmany(self, size):
+        """ Returns up to ``size`` rows as tuples in ``fields`` order """
+        rows = self.cursor.fetch(size, self._spec)
+        converters = self._converters
+
+        if not any(converters):
+            return rows
+
+        return [
+            tuple(
+                value if conv is None else conv(value)
+                for conv, value in zip(converters, row)
+            )
+            for row in rows
+        ]
+
+    def fetch_columns(self, size):
+        """ Returns up to ``size`` rows as dict of columns. Plain integer
+        fields are returned as ``array.array`` """
+        columns = self.cursor.fetch(size, self._spec, columnar=True)
+        result = {}
+
+        for name, conv, column in zip(self.fields, self._converters, columns):
+            if conv is not None:
+                column = [conv(value) for value in column]
+
+            result[name] = column
+
+        return result
+
+    def iter_batches(self, size, columnar=False):
+        if size <= 0:
+            raise ValueError('Size must be positive')
+
+        while True:
+            if columnar:
+                batch = self.fetch_columns(size)
+                if not batch or not len(batch[self.fields[0]]):
+                    return
+            else:
+                batch = self.fetchmany(size)
+                if not batch:
+                    return
+
+            yield batch
+
+    def close(self):
+        self.cursor.close()
 
 
 class Database:
@@ -52,8 +422,27 @@ class Database:
         self.schema = schema
         self.environment = None
         self.db = None
+        self.cache = None
+        self.options = None
+        # secondary indexes by the field name
+        self.indexes = {}
+        self.conflict_stats = ConflictStats()
+        # upsert statements carry the mask of the fields set
+        self.merge_mask = False
+
+    def define(self, environment, options=None, **kwargs):
+        """ Declares the database in the environment.
 
-    def define(self, environment, **kwargs):
+        :param options: :class:`sonya.DatabaseOptions`, preset name or dict.
+                        The known options passed as ``kwargs`` are validated
+                        too, the rest are written as ``db.<name>.<key>``.
+        """
+        known = DatabaseOptions.names()
+        options = DatabaseOptions.create(options, **{
+            key: value for key, value in kwargs.items() if key in known
+        })
+
+        self.options = options
         self.environment = environment
         self.environment["db"] = self.name.encode()
 
@@ -64,16 +453,127 @@ class Database:
             k = ".".join((key_base, field_name))
             self.environment[k] = field_type.value()
 
+        operators = self.schema.merge_operators
+        self.merge_mask = operators is not None
+
+        if self.merge_mask:
+            if MERGE_MASK in self.schema.fields:
+                raise ValueError('Field name %r is reserved' % MERGE_MASK)
+
+            self.environment[key_base] = MERGE_MASK.encode()
+            self.environment[".".join((key_base, MERGE_MASK))] = (
+                sophia.Types.u64.value
+            )
+
+        if self.schema.ttl:
+            if self.schema.expire_field is None:
+                raise ValueError('Schema with ttl requires the ExpireField')
+
+            self.environment['.'.join(('db', self.name, 'expire'))] = int(
+                self.schema.ttl
+            )
+            self.environment[
+                '.'.join(('db', self.name, 'compaction', 'expire_period'))
+            ] = int(self.schema.expire_period or self.schema.ttl)
+
+        prefix = '.'.join(('db', self.name, ''))
+        options.apply(self.environment, prefix)
+
         for key, value in kwargs.items():
+            if key in known:
+                continue
+
             if isinstance(value, str):
                 value = value.encode()
 
-            self.environment['.'.join(('db', self.name, key))] = value
+            self.environment[prefix + key] = value
+
+        if operators is not None:
+            self.environment.env.set_upsert(
+                self.name, sophia.MergeOperators(
+                    operators + [(None, False)], mask=len(operators)
+                )
+            )
+
+        self.indexes = {}
+
+        for name, _ in self.schema.secondary_fields:
+            companion = Database(
+                index_name(self.name, name), index_schema(self.schema, name)
+            )
+            companion.define(environment, options=options)
+            self.indexes[name] = SecondaryIndex(self, name, companion)
 
         return self
 
-    def transaction(self):
-        return Transaction(self)
+    def attach(self):
+        """ Binds the defined database and its secondary indexes to
+        the engine objects """
+        self.db = self.environment.env.get_object(
+            '.'.join(('db', self.name))
+        )
+
+        for index in self.indexes.values():
+            index.db.attach()
+
+        return self
+
+    @property
+    def effective_options(self):
+        """ :class:`sonya.DatabaseOptions` read back from the engine """
+        return DatabaseOptions.read(
+            self.environment, '.'.join(('db', self.name, ''))
+        )
+
+    def enable_cache(self, max_entries=None, max_bytes=None):
+        """ Attaches the LRU cache of the decoded documents. :meth:`get`
+        and :meth:`get_many` serve the cached documents as
+        :class:`CachedDocument`, the writes through this object
+        invalidate them.
+
+        :param max_entries: maximum number of the cached documents
+        :param max_bytes: maximum approximate size of the cached values
+        """
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        return self.cache
+
+    def disable_cache(self):
+        self.cache = None
+
+    def _cache_put(self, key, document, generation):
+        values = dict(document)
+        self.cache.put(key, values, sizeof(values), generation)
+        return CachedDocument(values)
+
+    def transaction(self, track_keys=False):
+        return Transaction(self, track_keys=track_keys)
+
+    def run_in_transaction(self, fn, retries=5, backoff=0.001,
+                           max_backoff=0.1):
+        """ Calls ``fn(tx)`` and commits, retrying the conflicts with the
+        jittered exponential backoff. Counted by ``conflict_stats``.
+        See :func:`sonya.retry.run_in_transaction`. """
+        return run_in_transaction(
+            self, fn, retries=retries, backoff=backoff,
+            max_backoff=max_backoff,
+        )
+
+    def transactional(self, retries=5, backoff=0.001, max_backoff=0.1):
+        """ Decorator running the function in :meth:`run_in_transaction`,
+        the transaction is passed as the first argument """
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.run_in_transaction(
+                    lambda tx: func(tx, *args, **kwargs),
+                    retries=retries, backoff=backoff, max_backoff=max_backoff,
+                )
+            return wrapper
+        return decorator
+
+    def writer(self, max_rows=1000, max_delay=0.0005):
+        """ :class:`sonya.writer.GroupCommitWriter` of the database """
+        return GroupCommitWriter(self, max_rows, max_delay)
 
     def document(self, **kwargs):
         doc = Document(self.db.document(), self.schema)
@@ -84,28 +584,467 @@ class Database:
         if not isinstance(document, Document):
             raise ValueError
 
-        self.db.set(document.value)
+        key = self._cache_key(document.value)
+
+        try:
+            if self.indexes:
+                with self.db.transaction() as tx:
+                    self._update_indexes(tx, document.value)
+                    tx.set(document.value)
+                return
+
+            self.db.set(document.value)
+        finally:
+            self._invalidate(key)
+
+    def set_many(self, rows):
+        """ Writes the dicts or tuples (in the schema field order) without
+        building a :class:`Document` for each of them. Rows are submitted
+        to the engine in a single native call. Broken rows are reported in
+        ``errors`` of the result and do not stop the batch.
+
+        :return: BatchResult(count, errors)
+        """
+        writer = self.db.set_many
+
+        if self.indexes:
+            def writer(spec, encoded):
+                with self.db.transaction() as tx:
+                    return self._write_indexed(tx, encoded)
+
+        if self.cache is None:
+            return write_rows(writer, self.schema, rows)
+
+        keys = []
+
+        try:
+            return write_rows(writer, self.schema, rows, keys)
+        finally:
+            self.cache.invalidate_many(keys)
+
+    def _upsert_document(self, values):
+        doc = self.document(**values)
+
+        if self.merge_mask:
+            positions = self.schema.codec.positions
+            doc.value.set_int(MERGE_MASK, sum(
+                1 << positions[name] for name in values
+            ))
+
+        return doc
+
+    def upsert(self, **kwargs):
+        """ Writes the document merging it with the stored one by the
+        schema ``merge`` operators without reading it first. Fields
+        without the operator are replaced, omitted ones keep the stored
+        values (or get defaults when nothing is stored). """
+        doc = self._upsert_document(kwargs)
+        key = self._cache_key(doc.value)
+
+        try:
+            if self.indexes:
+                with self.db.transaction() as tx:
+                    self._update_indexes(tx, doc.value, upsert=True)
+                    return tx.upsert(doc.value)
+
+            return self.db.upsert(doc.value)
+        finally:
+            self._invalidate(key)
 
     def get(self, **kwargs):
         if frozenset(kwargs.keys()) & self.schema.keys != self.schema.keys:
             raise ValueError('Not enough key fields')
 
+        key = None
+        generation = None
+
+        if self.cache is not None:
+            generation = self.cache.generation
+            key = tuple(
+                field.from_python(kwargs[name])
+                for name, field in self.schema.key_fields
+            )
+
+            values = self.cache.get(key)
+
+            if values is not None:
+                return CachedDocument(values)
+
         doc = self.document(**kwargs)
-        return Document(self.db.get(doc.value), self.schema, readonly=True)
+        doc = Document(self.db.get(doc.value), self.schema, readonly=True)
+
+        if key is None:
+            return doc
+
+        return self._cache_put(key, doc, generation)
+
+    def get_many(self, keys, sort=False):
+        """ Reads the documents by the key tuples (values of the key fields
+        in the index order) in a single native call.
+
+        :param sort: lookup the keys in the sorted order for the
+                     better disk locality
+        :return: documents in the ``keys`` order, None for the missing ones
+        """
+        if self.cache is None:
+            return read_rows(self.db.get_many, self.schema, keys, sort)
+
+        encoded = encode_keys(self.schema, keys)
+        generation = self.cache.generation
+        result = [self.cache.get(key) for key in encoded]
+        missing = [idx for idx, values in enumerate(result) if values is None]
+
+        if missing:
+            docs = self.db.get_many(
+                self.schema.codec.key_spec,
+                [encoded[idx] for idx in missing], sort
+            )
+
+            for idx, doc in zip(missing, docs):
+                if doc is not None:
+                    result[idx] = self._cache_put(
+                        encoded[idx],
+                        Document(doc, self.schema, readonly=True),
+                        generation,
+                    )
+
+        return [
+            values if values is None or isinstance(values, CachedDocument)
+            else CachedDocument(values)
+            for values in result
+        ]
 
     def delete(self, **kwargs):
         doc = self.document(**kwargs)
-        return self.db.delete(doc.value)
+        key = self._cache_key(doc.value)
+
+        try:
+            if self.indexes:
+                with self.db.transaction() as tx:
+                    self._update_indexes(tx, doc.value, deleted=True)
+                    return tx.delete(doc.value)
+
+            return self.db.delete(doc.value)
+        finally:
+            self._invalidate(key)
+
+    def _cache_key(self, document):
+        # the engine frees the written document, so the key is taken first
+        if self.cache is not None:
+            return self.schema.codec.key(document)
+
+    def _invalidate(self, key):
+        # after the engine write, see LRUCache.generation
+        if self.cache is not None and key is not None:
+            self.cache.invalidate(key)
+
+    def _stored(self, reader, key):
+        """ Stored native document of the encoded primary ``key`` """
+        codec = self.schema.codec
+        query = self.db.document()
+        codec.native.encode(query, key, codec.keys)
+
+        try:
+            return reader.get(query)
+        except LookupError:
+            return None
+
+    def _update_indexes(self, tx, document, deleted=False, upsert=False):
+        """ Writes the secondary index changes of the native ``document``
+        write (or delete) to the native transaction ``tx``.
+
+        The engine allows no other statements on the upserted key in
+        the transaction, so the upsert reads the previous version outside
+        of it and the concurrent upserts of the key may leave the stale
+        entries (skipped by :meth:`scan_by`, see :meth:`rebuild_indexes`).
+        """
+        if not self.indexes:
+            return
+
+        codec = self.schema.codec
+        key = codec.key(document)
+        stored = self._stored(self.db if upsert else tx, key)
+        mask = -1
+
+        if upsert and self.merge_mask:
+            mask = document.get_int(MERGE_MASK)
+
+        for index in self.indexes.values():
+            previous = None if stored is None else codec.native.get(
+                stored, index.position
+            )
+
+            if deleted:
+                value = None
+            elif stored is not None and not mask >> index.position & 1:
+                # omitted by the upsert, the stored value is kept
+                value = previous
+            else:
+                value = codec.native.get(document, index.position)
+
+            index.update(tx, key, previous, value)
+
+    def _write_indexed(self, tx, encoded):
+        """ Writes the encoded rows with their index entries one by one
+        to the native transaction. Returns ``(count, errors)`` like
+        the native ``set_many``. """
+        codec = self.schema.codec
+
+        for row in encoded:
+            document = self.db.document()
+            codec.native.encode(document, row)
+            self._update_indexes(tx, document)
+            tx.set(document)
 
-    def cursor(self, **query):
-        for doc in self.db.cursor(query):
-            yield Document(doc, self.schema, readonly=True)
+        return len(encoded), []
+
+    def find_by(self, limit=None, **query):
+        """ Documents which secondary index field equals the value,
+        e.g. ``db.find_by(age=30)``, in the primary key order """
+        if len(query) != 1:
+            raise ValueError('Exactly one indexed field expected')
+
+        (name, value), = query.items()
+        return self.scan_by(name, value, value, inclusive=True, limit=limit)
+
+    def scan_by(self, name, start=None, stop=None, inclusive=True,
+                limit=None, batch_size=128):
+        """ Documents which secondary index field value is between
+        ``start`` and ``stop`` in the field value order. The documents are
+        read by ``batch_size`` keys with :meth:`get_many`. """
+        index = self.indexes.get(name)
+
+        if index is None:
+            raise KeyError('Field %r has no secondary index' % name)
+
+        keys = index.keys(
+            start=start, stop=stop, inclusive=inclusive, limit=limit
+        )
+
+        while True:
+            batch = list(islice(keys, batch_size))
+
+            if not batch:
+                return
+
+            documents = self.get_many([key for _, key in batch])
+
+            for (value, _), document in zip(batch, documents):
+                # the stale entries (expired documents, concurrent upserts)
+                # are skipped
+                if document is not None and document[name] == value:
+                    yield document
+
+    def rebuild_indexes(self, batch_size=1000):
+        """ Fills the secondary indexes from the stored documents,
+        e.g. after the index was added to the existing database """
+        for index in self.indexes.values():
+            index.db.delete_many(batch_size=batch_size)
+
+        codec = self.schema.codec
+        count = 0
+
+        for document in self.cursor():
+            key = codec.key(document.value)
+
+            for index in self.indexes.values():
+                value = codec.native.get(document.value, index.position)
+
+                if value is not None:
+                    index.db.db.set(index.entry(value, key))
+
+            count += 1
+
+        return count
+
+    def _key_spec(self):
+        return tuple(
+            (name, field.TYPE.is_bytes, field.TYPE.value.endswith(b'_rev'))
+            for name, field in self.schema.key_fields
+        )
+
+    def _encode_query(self, query):
+        fields = self.schema.fields
+        result = {}
+
+        for key, value in query.items():
+            if key not in fields:
+                raise KeyError('Unknown key for schema %r' % self.schema)
+
+            result[key] = fields[key].from_python(value)
+
+        return result
+
+    def _encode_key(self, values):
+        values = dict(values)
+        result = []
+
+        for name, field in self.schema.key_fields:
+            if name not in values:
+                break
+
+            result.append(field.from_python(values.pop(name)))
+
+        if values:
+            raise ValueError(
+                'Key fields %r must be set continuously' % tuple(values)
+            )
+
+        return tuple(result)
+
+    def _encode_prefix(self, prefix):
+        name, field = self.schema.key_fields[0]
+
+        if not field.TYPE.is_bytes:
+            raise ValueError(
+                'Prefix requires the string or bytes first key field, '
+                '%r is %s' % (name, type(field).__name__)
+            )
+
+        return field.from_python(prefix)
+
+    def _decode_key(self, values):
+        return tuple(
+            field.to_python(value)
+            for (_, field), value in zip(self.schema.key_fields, values)
+        )
+
+    def _range_cursor(self, start=None, stop=None, keys_only=False):
+        """ Cursor over the ``[start, stop)`` range of the native keys """
+        spec = self._key_spec()
+        query = {} if start is None else dict(
+            zip((name for name, _, _ in spec), start)
+        )
+        query['order'] = '>='
+
+        return Cursor(self, self.db.cursor(
+            query, keys=spec, stop=stop, inclusive=False, keys_only=keys_only,
+        ))
+
+    def parallel_scan(self, fn, workers=4, reducer=None, initial=_UNSET,
+                      ordered=True, batch_size=1024, partitions=None,
+                      keys_only=False):
+        """ Scans the key ranges by the thread pool calling ``fn`` for
+        every batch of rows, see :func:`sonya.parallel.parallel_scan` """
+        return parallel_scan(
+            self, fn, workers=workers, reducer=reducer, initial=initial,
+            ordered=ordered, batch_size=batch_size, partitions=partitions,
+            keys_only=keys_only,
+        )
+
+    def cursor(self, order='>=', prefix=None, stop=None, inclusive=False,
+               limit=None, keys_only=False, **query):
+        """ Iterates the documents starting from the key fields passed
+        as keyword arguments.
+
+        :param order: ">=", ">", "<=" or "<"
+        :param prefix: the value prefix of the first (string) key field
+        :param stop: dict of the first key fields, iteration ends there
+        :param inclusive: yield the documents equal to ``stop``
+        :param limit: maximum number of the documents
+        :param keys_only: yield tuples of key values instead of documents
+        """
+        query = self._encode_query(query)
+        query['order'] = order
+
+        if prefix is not None:
+            query['prefix'] = self._encode_prefix(prefix)
+
+        cursor = self.db.cursor(
+            query,
+            keys=self._key_spec(),
+            stop=self._encode_key(stop) if stop else None,
+            inclusive=inclusive,
+            keys_only=keys_only,
+            limit=limit,
+        )
+
+        return Cursor(self, cursor)
 
     def __iter__(self):
-        return self.cursor()
+        return iter(self.cursor())
 
     def __len__(self):
         return len(self.db)
 
-    def delete_many(self, **query):
-        return self.db.delete_many(**query)
+    def count(self, exact=False):
+        return self.db.count(exact)
+
+    def stats(self):
+        prefix = '.'.join(('db', self.name, 'index', ''))
+        env = self.environment.env
+
+        return IndexStats(*[
+            env.get_int(prefix + key) for key in IndexStats._fields
+        ])
+
+    def delete_many(self, order='>=', prefix=None, stop=None,
+                    inclusive=False, limit=None, batch_size=0, progress=None,
+                    **query):
+        """ Deletes the documents selected like :meth:`cursor` does.
+
+        :param batch_size: commit every ``batch_size`` deletes instead of
+                           the single transaction for the whole range
+        :param progress: ``callable(deleted, batches)`` called after
+                         each commit
+        :return: number of the deleted documents
+        """
+        if self.indexes:
+            keys = iter(self.cursor(
+                order=order, prefix=prefix, stop=stop, inclusive=inclusive,
+                limit=limit, keys_only=True, **query
+            ))
+
+            try:
+                return self._delete_indexed(keys, batch_size, progress)
+            finally:
+                if self.cache is not None:
+                    self.cache.clear()
+
+        query = self._encode_query(query)
+        query['order'] = order
+
+        if prefix is not None:
+            query['prefix'] = self._encode_prefix(prefix)
+
+        try:
+            return self.db.delete_many(
+                query,
+                stop=self._encode_key(stop) if stop else None,
+                inclusive=inclusive,
+                limit=limit,
+                batch_size=batch_size,
+                progress=progress,
+                keys=self._key_spec(),
+            )
+        finally:
+            if self.cache is not None:
+                self.cache.clear()
+
+    def _delete_indexed(self, keys, batch_size=0, progress=None):
+        """ Deletes the documents by the primary keys with their index
+        entries, commits every ``batch_size`` deletes """
+        names = tuple(name for name, _ in self.schema.key_fields)
+        deleted = 0
+        batches = 0
+
+        while True:
+            batch = list(islice(keys, batch_size or None))
+
+            if not batch:
+                return deleted
+
+            with self.db.transaction() as tx:
+                for key in batch:
+                    doc = self.document(**dict(zip(names, key)))
+                    self._update_indexes(tx, doc.value, deleted=True)
+                    tx.delete(doc.value)
+
+            deleted += len(batch)
+            batches += 1
+
+            if progress is not None:
+                progress(deleted, batches)
+
+            if not batch_size:
+                return deleted
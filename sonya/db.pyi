@@ -1,41 +1,227 @@
-from typing import Generator
+from array import array
+from typing import (
+    Any, Callable, Dict, Generator, Iterable, List, NamedTuple, Sequence,
+    Optional, Tuple, Union,
+)
 
 from . import sophia
 from .env import Environment
-from .document import Document
+from .cache import LRUCache
+from .document import CachedDocument, Document
+from .index import SecondaryIndex
+from .options import DatabaseOptions
+from .retry import ConflictStats
 from .schema import Schema
+from .writer import GroupCommitWriter
+
+
+Row = Union[Dict[str, Any], Sequence[Any]]
+FieldSpec = Tuple[Tuple[str, bool], ...]
+OptionsArg = Union[DatabaseOptions, str, Dict[str, Any], None]
+
+MERGE_MASK = ...    # type: str
+
+
+class BatchResult(NamedTuple):
+    count: int
+    errors: List[Tuple[int, Exception]]
+
+
+class IndexStats(NamedTuple):
+    count: int
+    count_dup: int
+    memory_used: int
+    size: int
+    size_uncompressed: int
+    node_count: int
+    page_count: int
+
+
+def encode_rows(
+    schema: Schema, rows: Iterable[Row]
+) -> Tuple[FieldSpec, List[tuple], List[int], List[Tuple[int, Exception]]]: ...
+
+def encode_keys(
+    schema: Schema, keys: Iterable[Union[tuple, Any]]
+) -> List[tuple]: ...
+
+def read_rows(
+    reader: Callable[[FieldSpec, List[tuple], bool], List[Optional[Any]]],
+    schema: Schema, keys: Iterable[Union[tuple, Any]], sort: bool = False
+) -> List[Optional[Document]]: ...
+
+def write_rows(
+    writer: Callable[[FieldSpec, List[tuple]], Tuple[int, list]],
+    schema: Schema, rows: Iterable[Row], written_keys: List[tuple] = None
+) -> BatchResult: ...
 
 
 class Transaction:
     db = ...  # type: Database
     tx = ...  # type: sophia.Transaction
+    written_keys = ...  # type: List[tuple]
 
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, tx: sophia.Transaction = None,
+                 track_keys: bool = False):
         self.db = ...   # type: Database
         self.tx = ...   # type: sophia.Transaction
+        self.written_keys = ...     # type: List[tuple]
+        self.track_keys = ...       # type: bool
+
+    def _tracking(self) -> bool: ...
+    def _written(self, document: Document): ...
 
     def set(self, document: Document): ...
+    def set_many(self, rows: Iterable[Row]) -> BatchResult: ...
+    def upsert(self, **kwargs) -> int: ...
+    def _upsert(self, doc: Document) -> int: ...
     def get(self, **kwargs) -> Document: ...
+    def get_many(
+        self, keys: Iterable[Union[tuple, Any]], sort: bool = False
+    ) -> List[Optional[Document]]: ...
     def delete(self, **kwargs): ...
+    def _delete(self, doc: Document): ...
     def commit(self) -> int: ...
     def rollback(self) -> int: ...
     def __enter__(self) -> "Transaction": ...
     def __exit__(self, exc_type, exc_val, exc_tb): ...
 
 
+class EnvironmentTransaction:
+    environment = ...   # type: Environment
+    tx = ...            # type: sophia.Transaction
+    views = ...         # type: Dict[str, Transaction]
+    frozen = ...        # type: bool
+    started = ...       # type: float
+    statements_time = ...   # type: Optional[float]
+    commit_time = ...   # type: Optional[float]
+
+    def __init__(self, environment: Environment): ...
+    def __getitem__(self, db: Union[str, Database]) -> Transaction: ...
+    def _writer(self, db: Union[str, Database]) -> Transaction: ...
+    def set(self, db: Union[str, Database], document: Document): ...
+    def set_many(self, db: Union[str, Database],
+                 rows: Iterable[Row]) -> BatchResult: ...
+    def upsert(self, db: Union[str, Database], **kwargs) -> int: ...
+    def delete(self, db: Union[str, Database], **kwargs): ...
+    def get(self, db: Union[str, Database], **kwargs) -> Document: ...
+    def get_many(
+        self, db: Union[str, Database], keys: Iterable[Union[tuple, Any]],
+        sort: bool = False
+    ) -> List[Optional[Document]]: ...
+    def freeze(self): ...
+    def _invalidate(self): ...
+    def commit(self) -> int: ...
+    def rollback(self) -> int: ...
+    def __enter__(self) -> "EnvironmentTransaction": ...
+    def __exit__(self, exc_type, exc_val, exc_tb): ...
+
+
+class Cursor:
+    db = ...        # type: Database
+    cursor = ...    # type: sophia.Cursor
+    fields = ...    # type: Tuple[str, ...]
+
+    def __init__(self, db: Database, cursor: sophia.Cursor): ...
+    def __iter__(self) -> Generator[Union[Document, tuple]]: ...
+    def fetchmany(self, size: int) -> List[tuple]: ...
+    def fetch_columns(
+        self, size: int
+    ) -> Dict[str, Union[List[Any], array]]: ...
+    def iter_batches(
+        self, size: int, columnar: bool = False
+    ) -> Generator[Union[List[tuple], Dict[str, Union[List[Any], array]]]]: ...
+    def close(self): ...
+
+
 class Database:
     def __init__(self, name: str, schema: Schema):
         self.name = ...         # type: str
         self.schema = ...       # type: Schema
         self.environment = ...  # type: Environment
         self.db = ...           # type: sophia.Database
+        self.cache = ...        # type: Optional[LRUCache]
+        self.options = ...      # type: Optional[DatabaseOptions]
+        self.indexes = ...      # type: Dict[str, SecondaryIndex]
+        self.conflict_stats = ...   # type: ConflictStats
+        self.merge_mask = ...   # type: bool
+
+    def define(self, environment: Environment,
+               options: OptionsArg = None, **kwargs) -> "Database": ...
 
-    def define(self, environment: Environment, **kwargs) -> "Database": ...
-    def transaction(self) -> Transaction: ...
+    def attach(self) -> "Database": ...
+
+    @property
+    def effective_options(self) -> DatabaseOptions: ...
+
+    def enable_cache(self, max_entries: int = None,
+                     max_bytes: int = None) -> LRUCache: ...
+    def disable_cache(self): ...
+    def _cache_put(self, key: tuple, document: Document,
+                   generation: Optional[int]) -> CachedDocument: ...
+    def _cache_key(self, document: sophia.Document) -> Optional[tuple]: ...
+    def _invalidate(self, key: Optional[tuple]): ...
+    def transaction(self, track_keys: bool = False) -> Transaction: ...
+    def run_in_transaction(
+        self, fn: Callable[[Transaction], Any], retries: int = 5,
+        backoff: float = 0.001, max_backoff: float = 0.1
+    ) -> Any: ...
+    def transactional(
+        self, retries: int = 5, backoff: float = 0.001,
+        max_backoff: float = 0.1
+    ) -> Callable[[Callable], Callable]: ...
+    def writer(self, max_rows: int = 1000,
+               max_delay: float = 0.0005) -> GroupCommitWriter: ...
     def document(self, **kwargs) -> Document: ...
     def set(self, document: Document): ...
-    def get(self, **kwargs) -> Document: ...
+    def set_many(self, rows: Iterable[Row]) -> BatchResult: ...
+    def _upsert_document(self, values: Dict[str, Any]) -> Document: ...
+    def upsert(self, **kwargs) -> int: ...
+    def get(self, **kwargs) -> Union[Document, CachedDocument]: ...
+    def get_many(
+        self, keys: Iterable[Union[tuple, Any]], sort: bool = False
+    ) -> List[Optional[Union[Document, CachedDocument]]]: ...
     def delete(self, **kwargs): ...
-    def cursor(self, **query) -> Generator[Document]: ...
+    def _stored(self, reader: Union[sophia.Database, sophia.Transaction],
+                key: tuple) -> Optional[sophia.Document]: ...
+    def _update_indexes(self, tx: sophia.Transaction,
+                        document: sophia.Document, deleted: bool = False,
+                        upsert: bool = False): ...
+    def _write_indexed(
+        self, tx: sophia.Transaction, encoded: List[tuple]
+    ) -> Tuple[int, List[Tuple[int, Exception]]]: ...
+    def find_by(self, limit: int = None,
+                **query) -> Generator[Union[Document, CachedDocument]]: ...
+    def scan_by(
+        self, name: str, start: Any = None, stop: Any = None,
+        inclusive: bool = True, limit: int = None, batch_size: int = 128
+    ) -> Generator[Union[Document, CachedDocument]]: ...
+    def rebuild_indexes(self, batch_size: int = 1000) -> int: ...
+    def _key_spec(self) -> Tuple[Tuple[str, bool, bool], ...]: ...
+    def _encode_query(self, query: Dict[str, Any]) -> Dict[str, Any]: ...
+    def _encode_key(self, values: Dict[str, Any]) -> tuple: ...
+    def _encode_prefix(self, prefix: Any) -> bytes: ...
+    def _decode_key(self, values: tuple) -> tuple: ...
+    def _range_cursor(self, start: tuple = None, stop: tuple = None,
+                      keys_only: bool = False) -> Cursor: ...
+    def parallel_scan(
+        self, fn: Callable[[List[tuple]], Any], workers: int = 4,
+        reducer: Callable[[Any, Any], Any] = None, initial: Any = ...,
+        ordered: bool = True, batch_size: int = 1024,
+        partitions: int = None, keys_only: bool = False
+    ) -> Any: ...
+    def cursor(self, order: str = '>=', prefix: Any = None,
+               stop: Dict[str, Any] = None, inclusive: bool = False,
+               limit: int = None, keys_only: bool = False,
+               **query) -> Cursor: ...
     def __iter__(self) -> Generator[Document]: ...
-    def delete_many(self, **query) -> int: ...
+    def __len__(self) -> int: ...
+    def count(self, exact: bool = False) -> int: ...
+    def stats(self) -> IndexStats: ...
+    def delete_many(self, order: str = '>=', prefix: Any = None,
+                    stop: Dict[str, Any] = None, inclusive: bool = False,
+                    limit: int = None, batch_size: int = 0,
+                    progress: Callable[[int, int], Any] = None,
+                    **query) -> int: ...
+    def _delete_indexed(self, keys: Iterable[tuple], batch_size: int = 0,
+                        progress: Callable[[int, int], Any] = None) -> int: ...
@@ -1,52 +1,37 @@
 class Document:
-    __slots__ = 'value', '__schema', '__types', '__readonly'
+    __slots__ = 'value', '__schema', '__codec', '__readonly'
 
     def __init__(self, doc, schema, readonly=False):
         self.value = doc
         self.__schema = schema
-        self.__types = {}
+        self.__codec = schema.codec
         self.__readonly = readonly
 
-        for field_name, field_type in self.__schema:
-            self.__types[field_name] = field_type
-
-            if not self.__readonly:
-                self[field_name] = field_type.default
+        if not self.__readonly:
+            self.__codec.write_defaults(self.value)
 
     def update(self, **kwargs):
-        for key, value in kwargs.items():
-            self[key] = value
+        self.__codec.update(self.value, kwargs)
 
     def __setitem__(self, key, value):
-        if key not in self.__types:
+        if key not in self.__codec.positions:
             raise KeyError('Unknown key for schema %r' % self.__schema)
 
-        typ = self.__types[key]
-        value = typ.from_python(value)
-
-        if typ.TYPE.is_bytes:
-            self.value.set_string(key, value)
-        else:
-            self.value.set_int(key, value)
+        self.__codec.set(self.value, key, value)
 
     def __getitem__(self, key):
-        typ = self.__types[key]
-        if typ.TYPE.is_bytes:
-            return typ.to_python(self.value.get_string(key))
-        else:
-            return typ.to_python(self.value.get_int(key))
+        return self.__codec.get(self.value, key)
 
     def __contains__(self, item):
-        try:
-            self.value.get_string(item)
-            return True
-        except KeyError:
+        idx = self.__codec.positions.get(item)
+
+        if idx is None:
             return False
 
+        return self.__codec.native.get(self.value, idx) is not None
+
     def __iter__(self):
-        for key in self.__types:
-            if key in self:
-                yield key, self[key]
+        return self.__codec.items(self.value)
 
     @property
     def __dict__(self):
@@ -54,3 +39,29 @@ class Document:
 
     def __repr__(self):
         return '%r' % dict(self)
+
+
+class CachedDocument:
+    """ Read-only document served by the database cache.
+    Holds the decoded values only. """
+
+    __slots__ = 'values',
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __contains__(self, item):
+        return item in self.values
+
+    def __iter__(self):
+        return iter(self.values.items())
+
+    @property
+    def __dict__(self):
+        return dict(self.values)
+
+    def __repr__(self):
+        return '%r' % self.values
@@ -1,15 +1,15 @@
-from typing import Union, Tuple, Dict
+from typing import Any, Dict, Iterator, Union, Tuple
 
 from . import sophia
 from .schema import Schema
-from .fields import BaseField
+from .codec import SchemaCodec
 
 
 class Document:
     def __init__(self, doc: Document, schema: Schema, readonly=False):
         self.value = ...        # type: sophia.Document
         self.__schema = ...     # type: Schema
-        self.__types = ...      # type: Dict[str, BaseField]
+        self.__codec = ...      # type: SchemaCodec
         self.__readonly = ...   # type: bool
 
     def update(self, **kwargs): ...
@@ -21,3 +21,16 @@ class Document:
 
     @property
     def __dict__(self) -> dict: ...
+
+
+class CachedDocument:
+    values = ...    # type: Dict[str, Any]
+
+    def __init__(self, values: Dict[str, Any]): ...
+    def __getitem__(self, key) -> Any: ...
+    def __contains__(self, item) -> bool: ...
+    def __iter__(self) -> Iterator[Tuple[str, Any]]: ...
+    def __repr__(self) -> str: ...
+
+    @property
+    def __dict__(self) -> dict: ...
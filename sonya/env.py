@@ -1,28 +1,71 @@
-from . import sophia
-from .db import Database
+import time
+
+from . import metrics, sophia
+from .db import Database, EnvironmentTransaction
+from .options import EnvironmentOptions
+from .scheduler import SchedulerWorker
 
 
 class Environment:
-    def __init__(self, path):
+    def __init__(self, path, options=None, **kwargs):
+        """
+        :param options: :class:`sonya.EnvironmentOptions`, preset name or
+                        dict, applied again when the environment reopens
+        """
         self.path = path
         self.env = None
+        self.options = EnvironmentOptions.create(options, **kwargs)
         self.databases = dict()
+        self.backup_path = None
+        self.scheduler = None
+        self._config = None
         self._create_env()
 
     def _create_env(self):
+        self._config = None
         self.env = sophia.Environment()
         self.env.set_string("sophia.path", self.path.encode())
+        self.options.apply(self)
+
+        if self.backup_path is not None:
+            self.env.set_string("backup.path", self.backup_path.encode())
 
         for db_name, db_kwargs in self.databases.items():
             db, kwargs = db_kwargs
-            db.define(self, **kwargs)
-            db.db = self.env.get_object(".".join(('db', db_name)))
+            db.define(self, **kwargs).attach()
 
     @property
     def engine_config(self):
-        return self.env.configuration
+        """ Full dump of the engine configuration """
+        self._config = self.env.configuration
+        return self._config
+
+    def config(self, refresh=False):
+        """ Cached typed dump of the engine configuration. Statistics
+        are changing, pass ``refresh`` to read them again. """
+        if self._config is None or refresh:
+            return self.engine_config
+        return self._config
+
+    def get_int(self, key):
+        value = self.env.get(key)
+
+        if not isinstance(value, int):
+            raise TypeError('Setting %r is not an integer' % key)
+
+        return value
+
+    def get_string(self, key):
+        value = self.env.get(key)
+
+        if not isinstance(value, str):
+            raise TypeError('Setting %r is not a string' % key)
+
+        return value
 
     def __setitem__(self, key, value):
+        self._config = None
+
         if isinstance(value, bytes):
             return self.env.set_string(key, value)
         elif isinstance(value, int):
@@ -36,6 +79,20 @@ class Environment:
 
         return self.env.open() == 0
 
+    @property
+    def effective_options(self):
+        """ :class:`sonya.EnvironmentOptions` read back from the engine """
+        return EnvironmentOptions.read(self)
+
+    def metrics(self):
+        """ :class:`sonya.metrics.EnvironmentMetrics` snapshot """
+        return metrics.snapshot(self)
+
+    @property
+    def status(self):
+        """ Engine status: "offline", "online", "recover", "shutdown"... """
+        return self.env.get('sophia.status')
+
     @property
     def is_closed(self):
         return self.env.is_closed
@@ -49,20 +106,150 @@ class Environment:
             self.close()
 
     def __getitem__(self, item):
-        return self.engine_config[item]
+        return self.env.get(item)
 
     def __iter__(self):
         return iter(self.engine_config.items())
 
     def close(self):
+        self.stop_scheduler()
         self.env.close()
 
-    def database(self, name, schema, **kwargs):
-        db = Database(name, schema)
-        db.define(self, **kwargs)
+    def _database_names(self, db):
+        if db is None:
+            return list(self.databases)
+        elif isinstance(db, Database):
+            return [db.name]
+
+        return [db]
+
+    def _db_call(self, db, command):
+        names = self._database_names(db)
+
+        for name in names:
+            self.env.set_int('.'.join(('db', name, 'compaction', command)), 0)
+
+        return len(names)
+
+    def checkpoint(self, db=None):
+        """ Schedules the in-memory index dump of the database
+        (name or :class:`Database`) or of all databases """
+        return self._db_call(db, 'checkpoint')
+
+    def gc(self, db=None):
+        """ Schedules the garbage collection of the database(s) """
+        return self._db_call(db, 'gc')
+
+    def compact(self, db=None):
+        """ Runs the compaction step of the database(s) """
+        return self._db_call(db, 'compact')
+
+    def backup(self, path=None, wait=False):
+        """ Starts the backup. ``backup.path`` is an offline-only setting,
+        so the ``path`` must be passed before :meth:`open` (and then
+        it's kept across reopen) or match the configured one.
+
+        :param wait: run the scheduler in the calling thread until
+                     the backup completes
+        :return: the number of the completed backup when ``wait``
+        """
+        online = self.status == 'online'
+
+        if path is not None and path != self.backup_path:
+            if online:
+                raise RuntimeError(
+                    'Backup path must be set before the environment opened'
+                )
 
-        database = self.env.get_object(".".join(('db', name)))
-        db.db = database
+            self.backup_path = path
+            self.env.set_string('backup.path', path.encode())
+
+        if not online:
+            return None
+
+        if self.backup_path is None:
+            raise RuntimeError('Backup path is not set')
+
+        self.env.set_int('backup.run', 0)
+
+        if not wait:
+            return None
+
+        while self.backup_active:
+            if not self.run_scheduler(1):
+                time.sleep(0.01)
+
+        return self.env.get_int('backup.last')
+
+    @property
+    def backup_active(self):
+        return bool(self.env.get_int('backup.active'))
+
+    def run_scheduler(self, steps=1):
+        """ Performs up to ``steps`` scheduler steps in the calling thread,
+        stops when the scheduler has nothing to do.
+
+        :return: number of the steps which did the work
+        """
+        done = 0
+
+        for _ in range(steps):
+            if self.env.set_int('scheduler.run', 0) <= 0:
+                break
+
+            done += 1
+
+        return done
+
+    def start_scheduler(self, rate=100, idle_interval=0.1):
+        """ Starts the :class:`sonya.scheduler.SchedulerWorker` thread
+        performing up to ``rate`` scheduler steps per second """
+        if self.scheduler is not None and self.scheduler.is_alive():
+            raise RuntimeError('Scheduler worker is already running')
+
+        self.scheduler = SchedulerWorker(
+            self, rate=rate, idle_interval=idle_interval
+        )
+        self.scheduler.start()
+        return self.scheduler
+
+    def stop_scheduler(self, timeout=None):
+        if self.scheduler is None:
+            return
+
+        self.scheduler.stop(timeout)
+        self.scheduler = None
+
+    def expire(self, db=None):
+        """ Schedules the expire pass for the database (or for all
+        databases with ttl). Expired documents are dropped during the
+        following compaction. """
+        if db is None:
+            db = [
+                name for name, (database, _) in self.databases.items()
+                if database.schema.ttl
+            ]
+
+            for name in db:
+                self._db_call(name, 'expire')
+
+            return len(db)
+
+        return self._db_call(db, 'expire')
+
+    def transaction(self):
+        """ :class:`sonya.db.EnvironmentTransaction` covering all
+        databases of the environment """
+        return EnvironmentTransaction(self)
+
+    def database(self, name, schema, options=None, **kwargs):
+        """ Declares the database. ``options`` and ``kwargs`` are passed
+        to :meth:`sonya.Database.define` """
+        if options is not None:
+            kwargs['options'] = options
+
+        db = Database(name, schema)
+        db.define(self, **kwargs).attach()
 
         self.databases[name] = db, kwargs
         return db
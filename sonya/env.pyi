@@ -1,15 +1,28 @@
-from typing import Dict, Union, Generator, Tuple, Any
+from typing import Any, Dict, Generator, List, Optional, Tuple, Union
 
 from . import sophia
-from .db import Database
+from .db import Database, EnvironmentTransaction
+from .metrics import EnvironmentMetrics
+from .options import DatabaseOptions, EnvironmentOptions
+from .scheduler import SchedulerWorker
 from .schema import Schema
 
+DatabaseRef = Union[str, Database, None]
+
 
 class Environment:
-    def __init__(self, path: str):
+    def __init__(
+        self, path: str,
+        options: Union[EnvironmentOptions, str, Dict[str, Any], None] = None,
+        **kwargs
+    ):
         self.path = ...         # type: str
         self.env = ...          # type: sophia.Environment
+        self.options = ...      # type: EnvironmentOptions
         self.databases = ...    # type: Dict[str, Tuple[Database, Dict[str, Any]]]
+        self.backup_path = ...  # type: Optional[str]
+        self.scheduler = ...    # type: Optional[SchedulerWorker]
+        self._config = ...      # type: Optional[Dict[str, Union[int, str]]]
 
     def _create_env(self): ...
     def __setitem__(self, key, value): ...
@@ -18,11 +31,43 @@ class Environment:
     def __getitem__(self, item: str) -> Union[str, int]: ...
     def __iter__(self): Generator[str, Union[int, str]]: ...
     def close(self): ...
-    def database(self, name: str, schema: Schema, **kwargs) -> Database: ...
+    def _database_names(self, db: DatabaseRef) -> List[str]: ...
+    def _db_call(self, db: DatabaseRef, command: str) -> int: ...
+    def checkpoint(self, db: DatabaseRef = None) -> int: ...
+    def gc(self, db: DatabaseRef = None) -> int: ...
+    def compact(self, db: DatabaseRef = None) -> int: ...
+    def expire(self, db: DatabaseRef = None) -> int: ...
+    def backup(self, path: str = None, wait: bool = False) -> Optional[int]: ...
+
+    @property
+    def backup_active(self) -> bool: ...
+
+    def run_scheduler(self, steps: int = 1) -> int: ...
+    def start_scheduler(self, rate: float = 100,
+                        idle_interval: float = 0.1) -> SchedulerWorker: ...
+    def stop_scheduler(self, timeout: float = None): ...
+    def transaction(self) -> EnvironmentTransaction: ...
+    def database(
+        self, name: str, schema: Schema,
+        options: Union[DatabaseOptions, str, Dict[str, Any], None] = None,
+        **kwargs
+    ) -> Database: ...
 
     @property
     def engine_config(self) -> Dict[str, Union[int, str]]: ...
 
+    def config(self, refresh: bool = False) -> Dict[str, Union[int, str]]: ...
+    def get_int(self, key: str) -> int: ...
+    def get_string(self, key: str) -> str: ...
+
+    @property
+    def effective_options(self) -> EnvironmentOptions: ...
+
+    def metrics(self) -> EnvironmentMetrics: ...
+
+    @property
+    def status(self) -> str: ...
+
     @property
     def is_closed(self) -> bool: ...
 
@@ -22,11 +22,13 @@ from .uuid_field import UUIDField
 from .ip_field import IPv6Field, IPv4Field
 from .json_field import JSONField
 from .enum_field import IntEnumField
+from .expire_field import ExpireField
 
 
 __all__ = (
     "BaseField",
     "BytesField",
+    "ExpireField",
     "FloatField",
     "Int8Field",
     "Int16Field",
@@ -2,25 +2,64 @@ import abc
 
 
 class BaseField(object):
-    __slots__ = 'index', 'default'
+    __slots__ = 'index', 'default', 'merge', 'secondary'
 
     TYPE = None
     DEFAULT = None
+    SIGNED = False
+    ARRAY_TYPECODE = None
+    # the value is filled by the engine when it's not set explicitly
+    AUTO = False
     _DEFAULT = object()
 
-    def __init__(self, default=_DEFAULT, index=None):
+    # BytesField option, the values are read as the memoryview objects
+    zero_copy = False
+
+    NUMERIC_MERGE = frozenset({'replace', 'add', 'max', 'min'})
+    BYTES_MERGE = frozenset({'replace', 'append'})
+
+    def __init__(self, default=_DEFAULT, index=None, merge=None,
+                 secondary=False):
         """ Base field for the sophia document definition
 
         :param name: field name
         :param index: if not None the
+        :param merge: upsert merge operator ("add", "max", "min" for
+                      numeric fields, "append" for bytes fields)
+        :param secondary: maintain the secondary index for the field
+                          (see :meth:`sonya.Database.find_by`)
         :type name: str
         :type index: int
+        :type merge: str
         """
 
         if index is not None and index < 0:
             raise ValueError('Index must be grater then zero')
 
+        if merge is not None:
+            if index is not None:
+                raise ValueError('Key fields could not be merged')
+
+            allowed = (
+                self.BYTES_MERGE if self.TYPE.is_bytes else self.NUMERIC_MERGE
+            )
+
+            if merge not in allowed:
+                raise ValueError(
+                    'Merge operator %r is not supported by %s' % (
+                        merge, self.__class__.__name__
+                    )
+                )
+
+        if secondary and (index is not None or merge is not None):
+            raise ValueError(
+                'Secondary index could not be declared on the key or '
+                'merged field'
+            )
+
         self.index = index
+        self.merge = merge
+        self.secondary = secondary
 
         if default is self._DEFAULT:
             default = self.DEFAULT
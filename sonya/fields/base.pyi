@@ -1,14 +1,24 @@
-from typing import Union, Any
+from typing import Union, Any, FrozenSet, Optional
 
 
 class BaseField(object):
     TYPE = ...
     DEFAULT = ...
+    SIGNED = ...            # type: bool
+    ARRAY_TYPECODE = ...    # type: Optional[str]
+    AUTO = ...              # type: bool
     _DEFAULT = ...
+    zero_copy = ...         # type: bool
 
-    def __init__(self, default=..., index=None):
+    NUMERIC_MERGE = ...     # type: FrozenSet[str]
+    BYTES_MERGE = ...       # type: FrozenSet[str]
+
+    def __init__(self, default=..., index=None, merge: str = None,
+                 secondary: bool = False):
         self.index = ...        # type: int
         self.default = ...      # type: Any
+        self.merge = ...        # type: str
+        self.secondary = ...    # type: bool
 
     def value(self) -> str: ...
 
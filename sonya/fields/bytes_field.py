@@ -1,3 +1,5 @@
+import codecs
+
 from sonya import sophia
 from .base import BaseField
 
@@ -6,6 +8,21 @@ class BytesField(BaseField):
     TYPE = sophia.Types.string
     DEFAULT = b''
 
+    def __init__(self, default=BaseField._DEFAULT, index=None, merge=None,
+                 secondary=False, zero_copy=False):
+        """ :param zero_copy: pass the read-only ``memoryview`` over
+                              the engine memory of the result document
+                              to :meth:`to_python` instead of the bytes
+                              copy. The view keeps the document alive. """
+        super(BytesField, self).__init__(
+            default=default, index=index, merge=merge, secondary=secondary
+        )
+
+        if zero_copy and (index is not None or secondary):
+            raise ValueError('Key fields could not be zero-copy')
+
+        self.zero_copy = zero_copy
+
     def from_python(self, value):
         """
         :type value: bytes
@@ -32,4 +49,7 @@ class StringField(BytesField):
         return value.encode()
 
     def to_python(self, value):
+        if isinstance(value, memoryview):
+            return codecs.utf_8_decode(value)[0]
+
         return value.decode()
@@ -1,3 +1,5 @@
+from typing import Union
+
 from .base import BaseField
 
 
@@ -5,12 +7,16 @@ class BytesField(BaseField):
     TYPE = ...
     DEFAULT = ...
 
+    def __init__(self, default=..., index=None, merge: str = None,
+                 secondary: bool = False, zero_copy: bool = False):
+        self.zero_copy = ...    # type: bool
+
     def from_python(self, value) -> bytes: ...
-    def to_python(self, value) -> bytes: ...
+    def to_python(self, value) -> Union[bytes, memoryview]: ...
 
 
 class StringField(BytesField):
     DEFAULT = ...
 
     def from_python(self, value) -> bytes: ...
-    def to_python(self, value) -> str: ...
+    def to_python(self, value: Union[bytes, memoryview]) -> str: ...
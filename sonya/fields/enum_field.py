@@ -5,7 +5,8 @@ from .integer_field import Int16Field
 class IntEnumField(Int16Field):
     __slots__ = ('enum',)
 
-    def __init__(self, int_enum, default=Int16Field._DEFAULT, index=None):
+    def __init__(self, int_enum, default=Int16Field._DEFAULT, index=None,
+                 merge=None, secondary=False):
         if not issubclass(int_enum, IntEnum):
             raise ValueError('Not IntEnum argument')
 
@@ -14,7 +15,10 @@ class IntEnumField(Int16Field):
         if default is self._DEFAULT:
             default = list(int_enum.__members__.items())[0][1]
 
-        Int16Field.__init__(self, default=default, index=index)
+        Int16Field.__init__(
+            self, default=default, index=index, merge=merge,
+            secondary=secondary,
+        )
 
     def from_python(self, value):
         return Int16Field.from_python(self, value.value)
@@ -5,7 +5,8 @@ from .integer_field import Int16Field
 
 
 class IntEnumField(Int16Field):
-    def __init__(self, int_enum: Type[IntEnum], default=..., index=None):
+    def __init__(self, int_enum: Type[IntEnum], default=..., index=None,
+                 merge: str = None, secondary: bool = False):
         self.enum = ...     # type: Type[IntEnum]
     def from_python(self, value) -> int: ...
     def to_python(self, value) -> IntEnum: ...
@@ -0,0 +1,28 @@
+import calendar
+import time
+from datetime import datetime
+
+from .integer_field import UInt32Field
+
+
+class ExpireField(UInt32Field):
+    """ Unix timestamp the document TTL is counted from. When the field
+    is omitted the engine fills it with the write time. """
+
+    DEFAULT = None
+    AUTO = True
+
+    def value(self):
+        return super(ExpireField, self).value() + b',timestamp,expire'
+
+    def from_python(self, value):
+        """
+        :type value: int, datetime or None for the current time
+        """
+        if value is None:
+            return int(time.time())
+
+        if isinstance(value, datetime):
+            return calendar.timegm(value.utctimetuple())
+
+        return int(value)
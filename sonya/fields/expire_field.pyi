@@ -0,0 +1,12 @@
+from datetime import datetime
+from typing import Union
+
+from .integer_field import UInt32Field
+
+
+class ExpireField(UInt32Field):
+    DEFAULT = ...
+    AUTO = ...
+
+    def value(self) -> bytes: ...
+    def from_python(self, value: Union[int, datetime, None]) -> int: ...
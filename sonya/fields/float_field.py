@@ -4,6 +4,9 @@ from .integer_field import UInt64Field
 
 class FloatField(UInt64Field):
     DEFAULT = 0.0
+    ARRAY_TYPECODE = None
+    # the engine merges the stored bit patterns as integers
+    NUMERIC_MERGE = frozenset({'replace'})
 
     def from_python(self, value):
         return struct.unpack('>q', struct.pack('>d', value))[0]
@@ -3,5 +3,6 @@ from .integer_field import UInt64Field
 
 class FloatField(UInt64Field):
     DEFAULT = ...
+    ARRAY_TYPECODE = ...
     def from_python(self, value) -> int: ...
     def to_python(self, value) -> float: ...
@@ -7,6 +7,7 @@ from .base import BaseField
 class UInt64Field(BaseField):
     TYPE = sophia.Types.u64
     DEFAULT = 0
+    ARRAY_TYPECODE = 'Q'
 
     def from_python(self, value):
         return int(value)
@@ -45,6 +46,8 @@ class UInt32ReverseField(UInt64Field):
 
 class Int64Field(UInt64ReverseField):
     DEFAULT = 0
+    SIGNED = True
+    ARRAY_TYPECODE = None
     FORMAT = 'Q', 'q'
 
     def from_python(self, value):
@@ -5,6 +5,7 @@ from .base import BaseField
 class UInt64Field(BaseField):
     TYPE = ...
     DEFAULT = ...
+    ARRAY_TYPECODE = ...
 
     def from_python(self, value) -> int: ...
     def to_python(self, value) -> int: ...
@@ -40,6 +41,8 @@ class UInt32ReverseField(UInt64Field):
 
 class Int64Field(UInt64ReverseField):
     DEFAULT = 0
+    SIGNED = True
+    ARRAY_TYPECODE = None
     FORMAT = 'Q', 'q'
 
     def from_python(self, value):
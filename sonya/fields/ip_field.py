@@ -4,6 +4,8 @@ from .integer_field import UInt64Field, UInt32Field
 
 class IPv6Field(UInt64Field):
     DEFAULT = ipaddress.IPv6Address('::')
+    ARRAY_TYPECODE = None
+    NUMERIC_MERGE = frozenset({'replace'})
 
     def from_python(self, value):
         return int(ipaddress.IPv6Address(value))
@@ -14,6 +16,8 @@ class IPv6Field(UInt64Field):
 
 class IPv4Field(UInt32Field):
     DEFAULT = ipaddress.IPv4Address('0.0.0.0')
+    ARRAY_TYPECODE = None
+    NUMERIC_MERGE = frozenset({'replace'})
 
     def from_python(self, value):
         return int(ipaddress.IPv4Address(value))
@@ -6,6 +6,7 @@ from .integer_field import UInt64Field, UInt32Field
 
 class IPv6Field(UInt64Field):
     DEFAULT = ...
+    ARRAY_TYPECODE = ...
 
     def from_python(self, value: Union[ipaddress.IPv6Address, str]) -> int: ...
     def to_python(self, value) -> ipaddress.IPv6Address: ...
@@ -13,6 +14,7 @@ class IPv6Field(UInt64Field):
 
 class IPv4Field(UInt32Field):
     DEFAULT = ...
+    ARRAY_TYPECODE = ...
 
     def from_python(self, value: Union[ipaddress.IPv4Address, str]) -> int: ...
     def to_python(self, value: int) -> ipaddress.IPv4Address: ...
@@ -0,0 +1,89 @@
+import copy
+
+from .schema import Schema
+
+
+def index_name(db_name, field_name):
+    """ Name of the companion database of the secondary index """
+    return '%s__%s' % (db_name, field_name)
+
+
+def index_schema(schema, name):
+    """ Schema of the companion database. Every field is the key field:
+    the indexed value followed by the primary key, so the documents sharing
+    the value are kept in the primary key order. """
+    sources = ((name, schema.fields[name]),) + tuple(schema.key_fields)
+    fields = {}
+
+    for idx, (field_name, field) in enumerate(sources):
+        if field.AUTO:
+            raise ValueError(
+                'Field %r is filled by the engine and could not be '
+                'indexed' % field_name
+            )
+
+        key = copy.copy(field)
+        key.index = idx
+        key.merge = None
+        key.secondary = False
+        fields[field_name] = key
+
+    return type(Schema)(
+        '%sIndex' % type(schema).__name__, (Schema,), fields
+    )()
+
+
+class SecondaryIndex(object):
+    """ Secondary index of the ``field`` kept in the companion database
+    mapping the field value to the primary keys. The entries are written
+    in the same transaction as the primary documents. """
+
+    __slots__ = 'field', 'position', 'db'
+
+    def __init__(self, primary, field, db):
+        self.field = field
+        self.position = primary.schema.codec.position(field)
+        self.db = db
+
+    def entry(self, value, key):
+        """ Native companion document of the encoded ``value`` and
+        the primary ``key`` """
+        document = self.db.db.document()
+        self.db.schema.codec.native.encode(document, (value,) + key)
+        return document
+
+    def update(self, tx, key, old, new):
+        """ Replaces the entry of the encoded ``old`` value with the ``new``
+        one (None when the document is absent or deleted) """
+        if old == new:
+            return
+
+        if old is not None:
+            tx.delete(self.entry(old, key))
+
+        if new is not None:
+            tx.set(self.entry(new, key))
+
+    def keys(self, start=None, stop=None, inclusive=True, limit=None,
+             order='>='):
+        """ ``(value, primary key)`` pairs of the entries which values are
+        between ``start`` and ``stop`` (python values) in the value order """
+        query = {}
+
+        if start is not None:
+            query[self.field] = start
+
+        cursor = self.db.cursor(
+            order=order,
+            stop=None if stop is None else {self.field: stop},
+            inclusive=inclusive,
+            limit=limit,
+            keys_only=True,
+            **query
+        )
+
+        for key in cursor:
+            yield key[0], key[1:]
+
+
+__all__ = ('SecondaryIndex', 'index_name', 'index_schema')
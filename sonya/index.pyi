@@ -0,0 +1,26 @@
+from typing import Any, Generator, Optional, Tuple, Union
+
+from . import sophia
+from .db import Database
+from .schema import Schema
+
+
+def index_name(db_name: str, field_name: str) -> str: ...
+def index_schema(schema: Schema, name: str) -> Schema: ...
+
+
+class SecondaryIndex(object):
+    field = ...     # type: str
+    position = ...  # type: int
+    db = ...        # type: Database
+
+    def __init__(self, primary: Database, field: str, db: Database): ...
+    def entry(self, value: Union[bytes, int],
+              key: tuple) -> sophia.Document: ...
+    def update(self, tx: sophia.Transaction, key: tuple,
+               old: Optional[Union[bytes, int]],
+               new: Optional[Union[bytes, int]]): ...
+    def keys(
+        self, start: Any = None, stop: Any = None, inclusive: bool = True,
+        limit: int = None, order: str = '>='
+    ) -> Generator[Tuple[Any, tuple], None, None]: ...
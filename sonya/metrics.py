@@ -0,0 +1,233 @@
+import time
+from collections import OrderedDict, namedtuple
+
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+
+Histogram = namedtuple('Histogram', ('min', 'max', 'avg'))
+
+
+# (attribute, configuration key, kind)
+DATABASE_METRICS = (
+    ('documents', 'stat.documents', GAUGE),
+    ('documents_used', 'stat.documents_used', GAUGE),
+    ('set', 'stat.set', COUNTER),
+    ('set_latency', 'stat.set_latency', HISTOGRAM),
+    ('delete', 'stat.delete', COUNTER),
+    ('delete_latency', 'stat.delete_latency', HISTOGRAM),
+    ('upsert', 'stat.upsert', COUNTER),
+    ('upsert_latency', 'stat.upsert_latency', HISTOGRAM),
+    ('get', 'stat.get', COUNTER),
+    ('get_latency', 'stat.get_latency', HISTOGRAM),
+    ('get_read_disk', 'stat.get_read_disk', HISTOGRAM),
+    ('get_read_cache', 'stat.get_read_cache', HISTOGRAM),
+    ('pread', 'stat.pread', COUNTER),
+    ('pread_latency', 'stat.pread_latency', HISTOGRAM),
+    ('cursor', 'stat.cursor', COUNTER),
+    ('cursor_latency', 'stat.cursor_latency', HISTOGRAM),
+    ('cursor_read_disk', 'stat.cursor_read_disk', HISTOGRAM),
+    ('cursor_read_cache', 'stat.cursor_read_cache', HISTOGRAM),
+    ('cursor_ops', 'stat.cursor_ops', HISTOGRAM),
+    ('memory_used', 'index.memory_used', GAUGE),
+    ('size', 'index.size', GAUGE),
+    ('size_uncompressed', 'index.size_uncompressed', GAUGE),
+    ('count', 'index.count', GAUGE),
+    ('count_dup', 'index.count_dup', GAUGE),
+    ('read_disk', 'index.read_disk', COUNTER),
+    ('read_cache', 'index.read_cache', COUNTER),
+    ('node_count', 'index.node_count', GAUGE),
+    ('page_count', 'index.page_count', GAUGE),
+)
+
+ENVIRONMENT_METRICS = (
+    ('tx_online_rw', 'transaction.online_rw', GAUGE),
+    ('tx_online_ro', 'transaction.online_ro', GAUGE),
+    ('tx_commit', 'transaction.commit', COUNTER),
+    ('tx_rollback', 'transaction.rollback', COUNTER),
+    ('tx_conflict', 'transaction.conflict', COUNTER),
+    ('tx_lock', 'transaction.lock', COUNTER),
+    ('tx_latency', 'transaction.latency', HISTOGRAM),
+    ('tx_log', 'transaction.log', HISTOGRAM),
+    ('tx_gc', 'transaction.gc', GAUGE),
+    ('lsn', 'metric.lsn', COUNTER),
+    ('log_files', 'log.files', GAUGE),
+)
+
+
+def _parse(kind, value):
+    if value is None:
+        return None
+
+    if kind == HISTOGRAM:
+        low, high, avg = value.split()
+        return Histogram(int(low), int(high), float(avg))
+
+    return int(value)
+
+
+def _subtract(spec, new, old):
+    result = []
+
+    for (_, _, kind), a, b in zip(spec, new, old):
+        if kind == COUNTER and a is not None and b is not None:
+            result.append(a - b)
+        else:
+            result.append(a)
+
+    return result
+
+
+class DatabaseMetrics(namedtuple(
+    'DatabaseMetrics', [name for name, _, _ in DATABASE_METRICS]
+)):
+    """ Statistics of the one database. Counters of the :func:`delta`
+    result hold the increments. """
+
+    __slots__ = ()
+
+    @property
+    def cache_hit_ratio(self):
+        """ Share of the reads served from the cache """
+        total = self.read_cache + self.read_disk
+        return self.read_cache / float(total) if total else None
+
+    @property
+    def read_amplification(self):
+        """ Disk reads per get """
+        return self.read_disk / float(self.get) if self.get else None
+
+
+class EnvironmentMetrics(namedtuple(
+    'EnvironmentMetrics',
+    ['time'] + [name for name, _, _ in ENVIRONMENT_METRICS] + ['databases']
+)):
+    """ Snapshot of the environment and its databases statistics.
+    ``time`` is the timestamp of the snapshot, or the interval in seconds
+    for the :func:`delta` result. """
+
+    __slots__ = ()
+
+    def __sub__(self, other):
+        return delta(other, self)
+
+
+def _read(env, key, kind):
+    """ Direct lookup of the setting, the histograms are strings """
+    if kind != HISTOGRAM:
+        return env.get_int(key)
+
+    try:
+        return env.get_string(key).decode()
+    except KeyError:
+        return None
+
+
+def snapshot(env):
+    """ Reads the statistics of the :class:`sonya.Environment` and
+    all its databases by the direct lookups of the fixed keys """
+    native = env.env
+    databases = {}
+
+    for name in env.databases:
+        base = 'db.%s.' % name
+        databases[name] = DatabaseMetrics(*[
+            _parse(kind, _read(native, base + key, kind))
+            for _, key, kind in DATABASE_METRICS
+        ])
+
+    environment = [
+        _parse(kind, _read(native, key, kind))
+        for _, key, kind in ENVIRONMENT_METRICS
+    ]
+
+    return EnvironmentMetrics(time.time(), *environment + [databases])
+
+
+def delta(old, new):
+    """ Difference of the two snapshots. Counters are subtracted, gauges
+    and histograms are taken from the ``new`` one. """
+    databases = {}
+
+    for name, metrics in new.databases.items():
+        previous = old.databases.get(name)
+
+        if previous is None:
+            databases[name] = metrics
+        else:
+            databases[name] = DatabaseMetrics(
+                *_subtract(DATABASE_METRICS, metrics, previous)
+            )
+
+    return EnvironmentMetrics(
+        new.time - old.time,
+        *_subtract(ENVIRONMENT_METRICS, new[1:-1], old[1:-1]) + [databases]
+    )
+
+
+def _prometheus_lines(prefix, spec, values, labels):
+    for (name, _, kind), value in zip(spec, values):
+        if value is None:
+            continue
+
+        metric = '_'.join((prefix, name))
+
+        if kind == HISTOGRAM:
+            for stat, item in zip(Histogram._fields, value):
+                yield metric, GAUGE, dict(labels, stat=stat), item
+        elif kind == COUNTER:
+            yield metric + '_total', COUNTER, labels, value
+        else:
+            yield metric, GAUGE, labels, value
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+
+    return '{%s}' % ','.join(
+        '%s="%s"' % (
+            key, str(value).replace('\\', '\\\\').replace('"', '\\"')
+        )
+        for key, value in sorted(labels.items())
+    )
+
+
+def to_prometheus(metrics, prefix='sophia'):
+    """ Formats the snapshot in the Prometheus text exposition format """
+    lines = list(_prometheus_lines(
+        prefix, ENVIRONMENT_METRICS, metrics[1:-1], {}
+    ))
+
+    for name in sorted(metrics.databases):
+        lines.extend(_prometheus_lines(
+            prefix, DATABASE_METRICS, metrics.databases[name], {'db': name}
+        ))
+
+    groups = OrderedDict()
+
+    for metric, kind, labels, value in lines:
+        groups.setdefault((metric, kind), []).append((labels, value))
+
+    result = []
+
+    for (metric, kind), samples in groups.items():
+        result.append('# TYPE %s %s' % (metric, kind))
+        result.extend(
+            '%s%s %s' % (metric, _format_labels(labels), value)
+            for labels, value in samples
+        )
+
+    return '\n'.join(result) + '\n'
+
+
+__all__ = (
+    'DatabaseMetrics',
+    'EnvironmentMetrics',
+    'Histogram',
+    'delta',
+    'snapshot',
+    'to_prometheus',
+)
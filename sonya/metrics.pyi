@@ -0,0 +1,77 @@
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .env import Environment
+
+
+COUNTER = ...       # type: str
+GAUGE = ...         # type: str
+HISTOGRAM = ...     # type: str
+
+DATABASE_METRICS = ...      # type: Tuple[Tuple[str, str, str], ...]
+ENVIRONMENT_METRICS = ...   # type: Tuple[Tuple[str, str, str], ...]
+
+
+class Histogram(NamedTuple):
+    min: int
+    max: int
+    avg: float
+
+
+class DatabaseMetrics(tuple):
+    documents = ...             # type: Optional[int]
+    documents_used = ...        # type: Optional[int]
+    set = ...                   # type: Optional[int]
+    set_latency = ...           # type: Optional[Histogram]
+    delete = ...                # type: Optional[int]
+    delete_latency = ...        # type: Optional[Histogram]
+    upsert = ...                # type: Optional[int]
+    upsert_latency = ...        # type: Optional[Histogram]
+    get = ...                   # type: Optional[int]
+    get_latency = ...           # type: Optional[Histogram]
+    get_read_disk = ...         # type: Optional[Histogram]
+    get_read_cache = ...        # type: Optional[Histogram]
+    pread = ...                 # type: Optional[int]
+    pread_latency = ...         # type: Optional[Histogram]
+    cursor = ...                # type: Optional[int]
+    cursor_latency = ...        # type: Optional[Histogram]
+    cursor_read_disk = ...      # type: Optional[Histogram]
+    cursor_read_cache = ...     # type: Optional[Histogram]
+    cursor_ops = ...            # type: Optional[Histogram]
+    memory_used = ...           # type: Optional[int]
+    size = ...                  # type: Optional[int]
+    size_uncompressed = ...     # type: Optional[int]
+    count = ...                 # type: Optional[int]
+    count_dup = ...             # type: Optional[int]
+    read_disk = ...             # type: Optional[int]
+    read_cache = ...            # type: Optional[int]
+    node_count = ...            # type: Optional[int]
+    page_count = ...            # type: Optional[int]
+
+    @property
+    def cache_hit_ratio(self) -> Optional[float]: ...
+    @property
+    def read_amplification(self) -> Optional[float]: ...
+
+
+class EnvironmentMetrics(tuple):
+    time = ...                  # type: float
+    tx_online_rw = ...          # type: Optional[int]
+    tx_online_ro = ...          # type: Optional[int]
+    tx_commit = ...             # type: Optional[int]
+    tx_rollback = ...           # type: Optional[int]
+    tx_conflict = ...           # type: Optional[int]
+    tx_lock = ...               # type: Optional[int]
+    tx_latency = ...            # type: Optional[Histogram]
+    tx_log = ...                # type: Optional[Histogram]
+    tx_gc = ...                 # type: Optional[int]
+    lsn = ...                   # type: Optional[int]
+    log_files = ...             # type: Optional[int]
+    databases = ...             # type: Dict[str, DatabaseMetrics]
+
+    def __sub__(self, other: 'EnvironmentMetrics') -> 'EnvironmentMetrics': ...
+
+
+def snapshot(env: Environment) -> EnvironmentMetrics: ...
+def delta(old: EnvironmentMetrics,
+          new: EnvironmentMetrics) -> EnvironmentMetrics: ...
+def to_prometheus(metrics: EnvironmentMetrics, prefix: str = 'sophia') -> str: ...
@@ -0,0 +1,246 @@
+from collections import namedtuple
+
+
+Option = namedtuple('Option', ('name', 'key', 'type', 'check'))
+
+KiB = 1024
+MiB = 1024 * KiB
+GiB = 1024 * MiB
+
+
+def choice(*values):
+    def check(value):
+        if value not in values:
+            raise ValueError('Expected one of %r got %r' % (values, value))
+    return check
+
+
+def between(low, high=None):
+    def check(value):
+        if value < low or (high is not None and value > high):
+            raise ValueError('Value %r is out of range [%r, %r]' % (
+                value, low, high
+            ))
+    return check
+
+
+def positive(value):
+    if value <= 0:
+        raise ValueError('Value must be positive got %r' % value)
+
+
+class Options(object):
+    """ Typed set of the engine settings. Unset options (None) keep
+    the engine defaults. """
+
+    __slots__ = ()
+
+    OPTIONS = ()
+    PRESETS = {}
+
+    def __init__(self, preset=None, **kwargs):
+        for option in self.OPTIONS:
+            setattr(self, option.name, None)
+
+        if preset is not None:
+            if preset not in self.PRESETS:
+                raise ValueError('Unknown preset %r, expected one of %r' % (
+                    preset, tuple(sorted(self.PRESETS))
+                ))
+
+            self.update(**self.PRESETS[preset])
+
+        self.update(**kwargs)
+
+    @classmethod
+    def create(cls, options=None, **kwargs):
+        """ Builds the options from the instance, preset name or dict
+        and the keyword overrides """
+        if options is None:
+            return cls(**kwargs)
+        elif isinstance(options, cls):
+            return options.copy(**kwargs)
+        elif isinstance(options, str):
+            return cls(preset=options, **kwargs)
+
+        result = cls(**options)
+        result.update(**kwargs)
+        return result
+
+    @classmethod
+    def names(cls):
+        return tuple(option.name for option in cls.OPTIONS)
+
+    def update(self, **kwargs):
+        options = {option.name: option for option in self.OPTIONS}
+
+        for name, value in kwargs.items():
+            option = options.get(name)
+
+            if option is None:
+                raise TypeError('Unknown option %r for %s' % (
+                    name, type(self).__name__
+                ))
+
+            setattr(self, name, self.validate(option, value))
+
+        return self
+
+    @staticmethod
+    def validate(option, value):
+        if value is None:
+            return None
+
+        if option.type is bool:
+            if not isinstance(value, (bool, int)):
+                raise TypeError('Option %r expects bool got %r' % (
+                    option.name, type(value)
+                ))
+
+            return bool(value)
+
+        if option.type is int and isinstance(value, bool):
+            raise TypeError('Option %r expects int got bool' % option.name)
+
+        if not isinstance(value, option.type):
+            raise TypeError('Option %r expects %s got %r' % (
+                option.name, option.type.__name__, type(value)
+            ))
+
+        if option.check is not None:
+            option.check(value)
+
+        return value
+
+    def copy(self, **kwargs):
+        result = type(self)(**dict(self))
+        result.update(**kwargs)
+        return result
+
+    def items(self, prefix=''):
+        """ Engine keys and native values of the set options """
+        for option in self.OPTIONS:
+            value = getattr(self, option.name)
+
+            if value is None:
+                continue
+            elif option.type is bool:
+                value = int(value)
+            elif option.type is str:
+                value = value.encode()
+
+            yield prefix + option.key, value
+
+    def apply(self, environment, prefix=''):
+        """ Writes the options to the :class:`sonya.Environment` """
+        for key, value in self.items(prefix):
+            environment[key] = value
+
+    @classmethod
+    def read(cls, environment, prefix=''):
+        """ Effective values read back from the :class:`sonya.Environment` """
+        result = cls()
+
+        for option in cls.OPTIONS:
+            value = environment[prefix + option.key]
+
+            if option.type is bool:
+                value = bool(value)
+
+            setattr(result, option.name, value)
+
+        return result
+
+    def __iter__(self):
+        for option in self.OPTIONS:
+            value = getattr(self, option.name)
+
+            if value is not None:
+                yield option.name, value
+
+    def __eq__(self, other):
+        return type(self) is type(other) and dict(self) == dict(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            '%s=%r' % item for item in self
+        ))
+
+
+class DatabaseOptions(Options):
+    """ Storage settings of the database. Read-heavy workloads profit
+    from the smaller pages (less data read per lookup), write-heavy ones
+    from the larger nodes and compaction cache (less frequent merges). """
+
+    OPTIONS = (
+        Option(
+            'compression', 'compression', str, choice('none', 'lz4', 'zstd')
+        ),
+        Option('mmap', 'mmap', bool, None),
+        Option('direct_io', 'direct_io', bool, None),
+        Option('sync', 'sync', bool, None),
+        Option('cache', 'compaction.cache', int, positive),
+        Option('node_size', 'compaction.node_size', int, positive),
+        Option('page_size', 'compaction.page_size', int, positive),
+        Option('page_checksum', 'compaction.page_checksum', bool, None),
+        Option('gc_wm', 'compaction.gc_wm', int, between(0, 100)),
+        Option('gc_period', 'compaction.gc_period', int, between(0)),
+    )
+
+    __slots__ = tuple(option.name for option in OPTIONS)
+
+    PRESETS = {
+        'read-heavy': dict(
+            compression='lz4', mmap=True, direct_io=False,
+            page_size=64 * KiB, node_size=64 * MiB,
+        ),
+        'write-heavy': dict(
+            compression='lz4', mmap=False, page_size=128 * KiB,
+            node_size=128 * MiB, cache=8 * GiB, gc_wm=50,
+        ),
+        'low-memory': dict(
+            compression='zstd', mmap=False, page_size=64 * KiB,
+            node_size=32 * MiB, cache=256 * MiB,
+        ),
+    }
+
+    def update(self, **kwargs):
+        super(DatabaseOptions, self).update(**kwargs)
+
+        if (
+            self.page_size is not None and self.node_size is not None and
+            self.page_size > self.node_size
+        ):
+            raise ValueError('Page size must not exceed the node size')
+
+        return self
+
+
+class EnvironmentOptions(Options):
+    """ Engine wide settings. ``log_sync`` trades the durability of
+    the last transactions for the write throughput. """
+
+    OPTIONS = (
+        Option('scheduler_threads', 'scheduler.threads', int, between(0)),
+        Option('log_enable', 'log.enable', bool, None),
+        Option('log_path', 'log.path', str, None),
+        Option('log_sync', 'log.sync', bool, None),
+        Option('log_rotate_wm', 'log.rotate_wm', int, positive),
+        Option('log_rotate_sync', 'log.rotate_sync', bool, None),
+    )
+
+    __slots__ = tuple(option.name for option in OPTIONS)
+
+    PRESETS = {
+        'read-heavy': dict(scheduler_threads=2),
+        'write-heavy': dict(
+            scheduler_threads=8, log_sync=False, log_rotate_wm=1000000,
+        ),
+        'low-memory': dict(scheduler_threads=1, log_rotate_wm=100000),
+    }
+
+
+__all__ = ('DatabaseOptions', 'EnvironmentOptions', 'Options')
@@ -0,0 +1,74 @@
+from typing import (
+    Any, Callable, Dict, Generator, NamedTuple, Optional, Tuple, Union,
+)
+
+
+KiB = ...   # type: int
+MiB = ...   # type: int
+GiB = ...   # type: int
+
+Check = Callable[[Any], None]
+
+
+class Option(NamedTuple):
+    name: str
+    key: str
+    type: type
+    check: Optional[Check]
+
+
+def choice(*values: Any) -> Check: ...
+def between(low: int, high: int = None) -> Check: ...
+def positive(value: int): ...
+
+
+class Options(object):
+    OPTIONS = ...   # type: Tuple[Option, ...]
+    PRESETS = ...   # type: Dict[str, Dict[str, Any]]
+
+    def __init__(self, preset: str = None, **kwargs): ...
+
+    @classmethod
+    def create(cls, options: Union['Options', str, Dict[str, Any]] = None,
+               **kwargs) -> 'Options': ...
+
+    @classmethod
+    def names(cls) -> Tuple[str, ...]: ...
+
+    def update(self, **kwargs) -> 'Options': ...
+
+    @staticmethod
+    def validate(option: Option, value: Any) -> Any: ...
+
+    def copy(self, **kwargs) -> 'Options': ...
+    def items(
+        self, prefix: str = ''
+    ) -> Generator[Tuple[str, Union[bytes, int]], None, None]: ...
+    def apply(self, environment, prefix: str = ''): ...
+
+    @classmethod
+    def read(cls, environment, prefix: str = '') -> 'Options': ...
+
+    def __iter__(self) -> Generator[Tuple[str, Any], None, None]: ...
+
+
+class DatabaseOptions(Options):
+    compression = ...       # type: Optional[str]
+    mmap = ...              # type: Optional[bool]
+    direct_io = ...         # type: Optional[bool]
+    sync = ...              # type: Optional[bool]
+    cache = ...             # type: Optional[int]
+    node_size = ...         # type: Optional[int]
+    page_size = ...         # type: Optional[int]
+    page_checksum = ...     # type: Optional[bool]
+    gc_wm = ...             # type: Optional[int]
+    gc_period = ...         # type: Optional[int]
+
+
+class EnvironmentOptions(Options):
+    scheduler_threads = ... # type: Optional[int]
+    log_enable = ...        # type: Optional[bool]
+    log_path = ...          # type: Optional[str]
+    log_sync = ...          # type: Optional[bool]
+    log_rotate_wm = ...     # type: Optional[int]
+    log_rotate_sync = ...   # type: Optional[bool]
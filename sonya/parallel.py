@@ -0,0 +1,128 @@
+import struct
+from functools import reduce
+
+
+_UNSET = object()
+
+
+def interpolate(low, high, fraction):
+    """ Native key value between ``low`` and ``high`` (integers or bytes
+    compared by the first differing 8 bytes) """
+    if not isinstance(low, bytes):
+        return low + int((high - low) * fraction)
+
+    prefix = 0
+    limit = min(len(low), len(high))
+
+    while prefix < limit and low[prefix] == high[prefix]:
+        prefix += 1
+
+    def number(value):
+        chunk = value[prefix:prefix + 8]
+        return struct.unpack('>Q', chunk + b'\x00' * (8 - len(chunk)))[0]
+
+    start = number(low)
+    value = start + int((number(high) - start) * fraction)
+    return low[:prefix] + struct.pack('>Q', value)
+
+
+def _first_key(db, order='>=', **query):
+    query['order'] = order
+    cursor = db.db.cursor(
+        query, keys=db._key_spec(), keys_only=True, limit=1,
+    )
+
+    for key in cursor:
+        return tuple(key)
+
+    return None
+
+
+def sample_boundaries(db, partitions):
+    """ Native full keys splitting the database into up to ``partitions``
+    ranges. Probe values are spread between the first and the last values
+    of the first key field, every probe is moved to the next stored key,
+    so the boundaries are the real keys and the empty gaps collapse. """
+    first = _first_key(db)
+
+    if first is None or partitions <= 1:
+        return []
+
+    last = _first_key(db, order='<=')
+    name = db.schema.key_fields[0][0]
+    boundaries = []
+
+    for idx in range(1, partitions):
+        probe = interpolate(first[0], last[0], float(idx) / partitions)
+        key = _first_key(db, **{name: probe})
+
+        if key is None or key == first:
+            continue
+
+        if boundaries and boundaries[-1] == key:
+            continue
+
+        boundaries.append(key)
+
+    return boundaries
+
+
+def parallel_scan(db, fn, workers=4, reducer=None, initial=_UNSET,
+                  ordered=True, batch_size=1024, partitions=None,
+                  keys_only=False):
+    """ Scans the database by ``workers`` threads. The key space is split
+    into ``partitions`` ranges (``workers * 4`` by default, so the busy
+    threads pick up the rest) by :func:`sample_boundaries`, every range
+    is read by its own native cursor fetching the batches with the GIL
+    released.
+
+    :param fn: called with every batch (list of row tuples in the schema
+               field order, or the key tuples with ``keys_only``) in
+               the worker threads
+    :param reducer: ``reducer(accumulated, result)`` combines ``fn``
+                    results in the calling thread, the list of the results
+                    is returned without it
+    :param ordered: combine the results in the key order, otherwise
+                    as the ranges complete
+    """
+    if workers < 1:
+        raise ValueError('Workers must be positive')
+
+    if batch_size < 1:
+        raise ValueError('Batch size must be positive')
+
+    # imported here, sonya.db imports the module and python 2 has
+    # concurrent.futures only with the futures backport
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    boundaries = sample_boundaries(db, partitions or workers * 4)
+    ranges = list(zip([None] + boundaries, boundaries + [None]))
+
+    def scan(start, stop):
+        cursor = db._range_cursor(start, stop, keys_only)
+
+        try:
+            return [fn(batch) for batch in cursor.iter_batches(batch_size)]
+        finally:
+            cursor.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(scan, start, stop) for start, stop in ranges
+        ]
+
+        results = []
+
+        for future in (futures if ordered else as_completed(futures)):
+            results.extend(future.result())
+
+    if reducer is None:
+        return results
+
+    if initial is _UNSET:
+        return reduce(reducer, results)
+
+    return reduce(reducer, results, initial)
+
+
+__all__ = ('interpolate', 'parallel_scan', 'sample_boundaries')
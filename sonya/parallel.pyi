@@ -0,0 +1,20 @@
+from typing import Any, Callable, List, Optional, TypeVar, Union
+
+from .db import Database
+
+
+T = TypeVar('T')
+NativeValue = Union[bytes, int]
+
+
+def interpolate(low: NativeValue, high: NativeValue,
+                fraction: float) -> NativeValue: ...
+def _first_key(db: Database, order: str = '>=',
+               **query) -> Optional[tuple]: ...
+def sample_boundaries(db: Database, partitions: int) -> List[tuple]: ...
+def parallel_scan(
+    db: Database, fn: Callable[[List[tuple]], T], workers: int = 4,
+    reducer: Callable[[Any, T], Any] = None, initial: Any = ...,
+    ordered: bool = True, batch_size: int = 1024, partitions: int = None,
+    keys_only: bool = False
+) -> Union[List[T], Any]: ...
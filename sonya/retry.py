@@ -0,0 +1,179 @@
+import random
+import time
+from collections import Counter, namedtuple
+from threading import Lock
+from timeit import default_timer as clock
+
+from . import sophia
+
+
+ConflictCounters = namedtuple('ConflictCounters', (
+    'transactions', 'commits', 'conflicts', 'locks', 'retries', 'failures',
+    'lock_wait', 'backoff',
+))
+
+
+def backoff_delay(attempt, base, cap):
+    """ Full jitter exponential backoff: a random delay up to
+    ``base * 2 ** attempt`` seconds bounded by ``cap`` """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class ConflictStats(object):
+    """ Counters of the transactions run by :func:`run_in_transaction`.
+
+    ``conflicts`` counts the commits rolled back by the engine,
+    ``locks`` the commits waiting for the concurrent transaction,
+    ``lock_wait`` is the time (seconds) spent waiting after the locks and
+    ``backoff`` the total backoff time. Keys written by the conflicting
+    transactions are counted by :meth:`hot_keys`. """
+
+    __slots__ = (
+        'transactions', 'commits', 'conflicts', 'locks', 'retries',
+        'failures', 'lock_wait', 'backoff', 'max_keys', '_keys', '_lock',
+    )
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.transactions = 0
+            self.commits = 0
+            self.conflicts = 0
+            self.locks = 0
+            self.retries = 0
+            self.failures = 0
+            self.lock_wait = 0.0
+            self.backoff = 0.0
+            self._keys = Counter()
+
+    def snapshot(self):
+        with self._lock:
+            return ConflictCounters(
+                self.transactions, self.commits, self.conflicts, self.locks,
+                self.retries, self.failures, self.lock_wait, self.backoff,
+            )
+
+    @property
+    def conflict_ratio(self):
+        """ Conflicts and locks per committed transaction """
+        if not self.commits:
+            return None
+
+        return float(self.conflicts + self.locks) / self.commits
+
+    def hot_keys(self, count=10):
+        """ ``(key, conflicts)`` pairs of the most conflicting keys
+        (native values of the key fields) """
+        with self._lock:
+            return self._keys.most_common(count)
+
+    def record(self, committed=False, conflict=False, locked=False,
+               retry=False, failed=False, delay=0.0, keys=()):
+        with self._lock:
+            if committed:
+                self.commits += 1
+
+            if conflict:
+                self.conflicts += 1
+
+            if locked:
+                self.locks += 1
+                self.lock_wait += delay
+
+            if retry:
+                self.retries += 1
+                self.backoff += delay
+
+            if failed:
+                self.failures += 1
+
+            if keys and (conflict or locked):
+                self._keys.update(keys)
+
+                # keep the memory bounded by the most conflicting keys
+                if len(self._keys) > self.max_keys:
+                    self._keys = Counter(dict(
+                        self._keys.most_common(self.max_keys // 2)
+                    ))
+
+    def started(self):
+        with self._lock:
+            self.transactions += 1
+
+    def __repr__(self):
+        return '<%s %s>' % (
+            type(self).__name__, ' '.join(
+                '%s=%r' % item for item in self.snapshot()._asdict().items()
+            )
+        )
+
+
+def run_in_transaction(db, fn, retries=5, backoff=0.001, max_backoff=0.1,
+                       stats=None):
+    """ Calls ``fn(tx)`` in a new transaction of the ``db`` and commits it.
+    The whole call is repeated up to ``retries`` times when the commit
+    raises :class:`sophia.TransactionRollback` or
+    :class:`sophia.TransactionLocked`, sleeping the jittered exponential
+    backoff (``backoff * 2 ** attempt`` up to ``max_backoff`` seconds)
+    between the attempts. Other exceptions roll back and propagate.
+
+    :return: the ``fn`` result of the committed attempt
+    """
+    if retries < 0:
+        raise ValueError('Retries must not be negative')
+
+    stats = db.conflict_stats if stats is None else stats
+    stats.started()
+    attempt = 0
+
+    while True:
+        tx = db.transaction(track_keys=True)
+
+        try:
+            result = fn(tx)
+        except BaseException:
+            tx.rollback()
+            raise
+
+        keys = list(tx.written_keys)
+
+        try:
+            tx.commit()
+        except (sophia.TransactionRollback, sophia.TransactionLocked) as e:
+            locked = isinstance(e, sophia.TransactionLocked)
+
+            if locked:
+                tx.rollback()
+
+            if attempt >= retries:
+                stats.record(
+                    conflict=not locked, locked=locked, failed=True, keys=keys
+                )
+                raise
+
+            delay = backoff_delay(attempt, backoff, max_backoff)
+            started = clock()
+            time.sleep(delay)
+            delay = clock() - started
+
+            stats.record(
+                conflict=not locked, locked=locked, retry=True,
+                delay=delay, keys=keys,
+            )
+            attempt += 1
+            continue
+
+        stats.record(committed=True)
+        return result
+
+
+__all__ = (
+    'ConflictCounters',
+    'ConflictStats',
+    'backoff_delay',
+    'run_in_transaction',
+)
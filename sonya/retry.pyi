@@ -0,0 +1,51 @@
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from .db import Database, Transaction
+
+
+ConflictCounters = NamedTuple('ConflictCounters', [
+    ('transactions', int),
+    ('commits', int),
+    ('conflicts', int),
+    ('locks', int),
+    ('retries', int),
+    ('failures', int),
+    ('lock_wait', float),
+    ('backoff', float),
+])
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float: ...
+
+
+class ConflictStats(object):
+    transactions = ...  # type: int
+    commits = ...       # type: int
+    conflicts = ...     # type: int
+    locks = ...         # type: int
+    retries = ...       # type: int
+    failures = ...      # type: int
+    lock_wait = ...     # type: float
+    backoff = ...       # type: float
+    max_keys = ...      # type: int
+
+    def __init__(self, max_keys: int = 10000): ...
+    def reset(self): ...
+    def snapshot(self) -> ConflictCounters: ...
+
+    @property
+    def conflict_ratio(self) -> Optional[float]: ...
+
+    def hot_keys(self, count: int = 10) -> List[Tuple[tuple, int]]: ...
+    def record(self, committed: bool = False, conflict: bool = False,
+               locked: bool = False, retry: bool = False,
+               failed: bool = False, delay: float = 0.0,
+               keys: Iterable[tuple] = ()): ...
+    def started(self): ...
+
+
+def run_in_transaction(
+    db: Database, fn: Callable[[Transaction], Any], retries: int = 5,
+    backoff: float = 0.001, max_backoff: float = 0.1,
+    stats: ConflictStats = None
+) -> Any: ...
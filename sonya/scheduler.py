@@ -0,0 +1,49 @@
+import threading
+
+from . import sophia
+
+
+class SchedulerWorker(threading.Thread):
+    """ Background thread running the engine scheduler steps of the
+    :class:`sonya.Environment`. Up to ``rate`` steps per second are
+    performed while the scheduler has the work, the thread sleeps
+    ``idle_interval`` seconds otherwise. Useful with
+    ``scheduler.threads = 0`` to keep the compaction under control. """
+
+    def __init__(self, env, rate=100, idle_interval=0.1):
+        if rate <= 0:
+            raise ValueError('Rate must be positive')
+
+        super(SchedulerWorker, self).__init__(name='sonya-scheduler')
+        self.daemon = True
+
+        self.env = env
+        self.rate = rate
+        self.idle_interval = idle_interval
+        self.steps = 0
+        self._stop_event = threading.Event()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                done = self.env.run_scheduler(1)
+            except sophia.SophiaClosed:
+                return
+
+            self.steps += done
+            self._stop_event.wait(
+                1.0 / self.rate if done else self.idle_interval
+            )
+
+
+__all__ = ('SchedulerWorker',)
@@ -0,0 +1,19 @@
+import threading
+
+from .env import Environment
+
+
+class SchedulerWorker(threading.Thread):
+    env = ...               # type: Environment
+    rate = ...              # type: float
+    idle_interval = ...     # type: float
+    steps = ...             # type: int
+
+    def __init__(self, env: Environment, rate: float = 100,
+                 idle_interval: float = 0.1): ...
+
+    @property
+    def stopped(self) -> bool: ...
+
+    def stop(self, timeout: float = None): ...
+    def run(self): ...
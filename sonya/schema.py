@@ -1,10 +1,26 @@
 from six import with_metaclass
-from sonya.fields import BaseField
+from sonya.codec import SchemaCodec
+from sonya.fields import BaseField, ExpireField
+
+
+# fields number limit of the engine database scheme
+MAX_FIELDS = 8
 
 
 class SchemaBase(object):
+    # documents lifetime in seconds, requires the ExpireField
+    ttl = None
+    # seconds between the expire passes of the scheduler, ttl by default
+    expire_period = None
+
     def __init__(self, *args, **kwargs):
         self.__keys = None
+        self.__key_fields = None
+        self.__codec = None
+
+        for option in ('ttl', 'expire_period'):
+            if kwargs.get(option) is not None:
+                setattr(self, option, kwargs[option])
 
     def __iter__(self):
         for field_name, field in self._fields.items():
@@ -19,10 +35,67 @@ class SchemaBase(object):
 
         return self.__keys
 
+    @property
+    def key_fields(self):
+        """ Key fields as ``(name, field)`` pairs in the index order """
+        if self.__key_fields is None:
+            keys = [
+                (k, v) for k, v in self._fields.items() if v.index is not None
+            ]
+            self.__key_fields = tuple(
+                sorted(keys, key=lambda item: item[1].index)
+            )
+
+        return self.__key_fields
+
+    @property
+    def codec(self):
+        """ :class:`sonya.codec.SchemaCodec` for the schema fields """
+        if self._fields is type(self)._fields:
+            return type(self)._codec
+
+        if self.__codec is None or self.__codec[0] is not self._fields:
+            self.__codec = (self._fields, SchemaCodec(self._fields.items()))
+
+        return self.__codec[1]
+
+    @property
+    def secondary_fields(self):
+        """ Fields declared with ``secondary=True`` as ``(name, field)``
+        pairs sorted by name """
+        return tuple(sorted(
+            (name, field) for name, field in self._fields.items()
+            if field.secondary
+        ))
+
+    @property
+    def expire_field(self):
+        """ Name of the :class:`sonya.fields.ExpireField` or None """
+        for name, field in self:
+            if isinstance(field, ExpireField):
+                return name
+
     @property
     def fields(self):
         return dict(self._fields)
 
+    @property
+    def merge_operators(self):
+        """ Upsert operators in the field order or None when no one
+        field declares the ``merge`` operator """
+        if not any(field.merge for _, field in self):
+            return None
+
+        result = []
+
+        for _, field in self:
+            if field.index is not None:
+                result.append((None, False))
+            else:
+                result.append((field.merge or 'replace', field.SIGNED))
+
+        return result
+
 
 class SchemaMeta(type):
     def __new__(meta, name, bases, dct):
@@ -43,8 +116,18 @@ class SchemaMeta(type):
                 if idx not in keys:
                     raise KeyError('Key fields must be numbered continuously')
 
+        # the databases with the merge operators keep the hidden upsert
+        # mask field (see sonya.db.MERGE_MASK)
+        if (any(field.merge for field in fields.values()) and
+                len(fields) >= MAX_FIELDS):
+            raise ValueError(
+                'Schema with the merge operators is limited to %d fields, '
+                '%s declares %d' % (MAX_FIELDS - 1, name, len(fields))
+            )
+
         dct['_fields'] = fields
         dct['_keys'] = keys
+        dct['_codec'] = SchemaCodec(fields.items())
 
         return super(SchemaMeta, meta).__new__(meta, name, bases, dct)
 
@@ -1,20 +1,45 @@
-from typing import Generator, FrozenSet, Dict
+from typing import Generator, FrozenSet, Dict, List, Optional, Tuple
+from .codec import SchemaCodec
 from .fields import BaseField
 
 
+MAX_FIELDS = ...    # type: int
+
+
 class SchemaBase(object):
     _fields = ...   # type: Dict[str, BaseField]
+    _codec = ...    # type: SchemaCodec
+    ttl = ...       # type: Optional[int]
+    expire_period = ...     # type: Optional[int]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, ttl: int = None, expire_period: int = None,
+                 **kwargs):
         self.__keys = ...   # type: FrozenSet[str]
+        self.__key_fields = ...     # type: Tuple[Tuple[str, BaseField], ...]
+        self.__codec = ...  # type: Tuple[Dict[str, BaseField], SchemaCodec]
 
     def __iter__(self) -> Generator[str, BaseField]: ...
 
     @property
     def keys(self) -> FrozenSet[str]: ...
 
+    @property
+    def key_fields(self) -> Tuple[Tuple[str, BaseField], ...]: ...
+
+    @property
+    def codec(self) -> SchemaCodec: ...
+
+    @property
+    def expire_field(self) -> Optional[str]: ...
+
+    @property
+    def secondary_fields(self) -> Tuple[Tuple[str, BaseField], ...]: ...
+
     @property
     def fields(self) -> Dict[str, BaseField]: ...
 
+    @property
+    def merge_operators(self) -> Optional[List[Tuple[Optional[str], bool]]]: ...
+
 
 class Schema(SchemaBase): ...
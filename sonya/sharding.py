@@ -0,0 +1,543 @@
+import heapq
+import multiprocessing
+import threading
+import zlib
+from bisect import bisect_right
+
+from .db import BatchResult
+from .env import Environment
+
+
+class HashPartitioner(object):
+    """ Spreads the keys evenly by the CRC32 of the encoded key fields.
+    The hash does not depend on the process, so the shards are stable
+    across restarts. """
+
+    __slots__ = 'count',
+
+    def __init__(self, count):
+        if count < 1:
+            raise ValueError('Shard count must be positive')
+
+        self.count = count
+
+    def bind(self, schema):
+        return self
+
+    def shard(self, key):
+        """ Shard number of the native key values """
+        digest = 0
+
+        for value in key:
+            if not isinstance(value, bytes):
+                value = str(value).encode()
+
+            digest = zlib.crc32(value + b'\x00', digest)
+
+        return (digest & 0xffffffff) % self.count
+
+
+class RangePartitioner(object):
+    """ Splits the first key field values by the sorted ``boundaries``:
+    the shard ``i`` holds the values below ``boundaries[i]``, the last one
+    the rest. Keeps the neighbour keys in the same shard. """
+
+    __slots__ = 'boundaries', 'count', '_encoded'
+
+    def __init__(self, boundaries):
+        self.boundaries = tuple(boundaries)
+        self.count = len(self.boundaries) + 1
+        self._encoded = None
+
+    def bind(self, schema):
+        _, field = schema.key_fields[0]
+        encoded = [field.from_python(value) for value in self.boundaries]
+
+        if encoded != sorted(encoded):
+            raise ValueError('Boundaries must be sorted')
+
+        self._encoded = encoded
+        return self
+
+    def shard(self, key):
+        if self._encoded is None:
+            raise RuntimeError('Partitioner is not bound to the schema')
+
+        return bisect_right(self._encoded, key[0])
+
+
+class LocalShard(object):
+    """ Shard served by the environment of the current process """
+
+    def __init__(self, path, name, schema, kwargs):
+        self.path = path
+        self.name = name
+        self.schema = schema
+        self.kwargs = kwargs
+        self.env = None
+        self.db = None
+
+    def open(self):
+        self.env = Environment(self.path)
+        self.db = self.env.database(self.name, self.schema, **self.kwargs)
+        self.env.open()
+
+    def close(self):
+        if self.env is not None:
+            self.env.close()
+
+        self.env = None
+        self.db = None
+
+    def submit(self, method, *args):
+        try:
+            return True, getattr(self, method)(*args)
+        except Exception as e:
+            return False, e
+
+    def result(self, pending):
+        ok, value = pending
+
+        if not ok:
+            raise value
+
+        return value
+
+    def call(self, method, *args):
+        return self.result(self.submit(method, *args))
+
+    # operations
+
+    def get_many(self, keys):
+        return [
+            None if doc is None else dict(doc)
+            for doc in self.db.get_many(keys)
+        ]
+
+    def set_many(self, rows):
+        return self.db.set_many(rows)
+
+    def delete_keys(self, keys):
+        names = tuple(name for name, _ in self.schema.key_fields)
+
+        with self.db.transaction() as tx:
+            for key in keys:
+                tx.delete(**dict(zip(names, key)))
+
+        return len(keys)
+
+    def scan(self, order, query, stop, inclusive, limit):
+        return [
+            dict(doc) for doc in self.db.cursor(
+                order=order, stop=stop, inclusive=inclusive, limit=limit,
+                **query
+            )
+        ]
+
+    def count(self, exact):
+        return self.db.count(exact)
+
+
+def serve(conn, path, name, schema, kwargs):
+    """ Worker process loop of the :class:`ProcessShard` """
+    shard = LocalShard(path, name, schema, kwargs)
+
+    try:
+        shard.open()
+    except Exception as e:
+        conn.send((False, e))
+        return
+
+    conn.send((True, None))
+
+    try:
+        while True:
+            message = conn.recv()
+
+            if message is None:
+                break
+
+            method, args = message
+            conn.send(shard.submit(method, *args))
+    finally:
+        shard.close()
+        conn.close()
+
+
+class ProcessShard(object):
+    """ Shard served by the own worker process, so the writes to the
+    different shards run in parallel without sharing the GIL. Requests
+    are serialized per shard. """
+
+    def __init__(self, path, name, schema, kwargs, context=None):
+        self.path = path
+        self.name = name
+        self.schema = schema
+        self.kwargs = kwargs
+        self.context = context or multiprocessing.get_context()
+        self.process = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        self._conn, child = self.context.Pipe()
+        self.process = self.context.Process(
+            target=serve,
+            args=(child, self.path, self.name, self.schema, self.kwargs),
+            name='sonya-shard',
+        )
+        self.process.daemon = True
+        self.process.start()
+        child.close()
+
+        ok, error = self._conn.recv()
+
+        if not ok:
+            self.process.join()
+            raise error
+
+    def close(self, timeout=5):
+        if self.process is None:
+            return
+
+        with self._lock:
+            try:
+                self._conn.send(None)
+            except (EOFError, OSError):
+                pass
+
+            self.process.join(timeout)
+
+            if self.process.is_alive():
+                self.process.terminate()
+
+            self._conn.close()
+            self.process = None
+
+    def submit(self, method, *args):
+        """ Sends the request, the shard is locked until :meth:`result` """
+        self._lock.acquire()
+
+        try:
+            self._conn.send((method, args))
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def result(self, pending=None):
+        try:
+            ok, value = self._conn.recv()
+        finally:
+            self._lock.release()
+
+        if not ok:
+            raise value
+
+        return value
+
+    def call(self, method, *args):
+        return self.result(self.submit(method, *args))
+
+
+class ShardedDatabase(object):
+    """ Database of the ``schema`` partitioned across the environments
+    in ``paths``. Documents are passed as dicts, the cursor merges
+    the shards preserving the key order.
+
+    :param partitioner: :class:`HashPartitioner` (default) or
+                        :class:`RangePartitioner`
+    :param processes: serve every shard by the own worker process
+    :param kwargs: :meth:`sonya.Environment.database` arguments
+    """
+
+    def __init__(self, paths, name, schema, partitioner=None,
+                 processes=False, **kwargs):
+        self.paths = tuple(paths)
+        self.name = name
+        self.schema = schema
+        self.partitioner = (
+            partitioner or HashPartitioner(len(self.paths))
+        ).bind(schema)
+
+        if self.partitioner.count != len(self.paths):
+            raise ValueError('Partitioner expects %d shards got %d' % (
+                self.partitioner.count, len(self.paths)
+            ))
+
+        shard_class = ProcessShard if processes else LocalShard
+        self.shards = [
+            shard_class(path, name, schema, kwargs) for path in self.paths
+        ]
+
+        self._key_fields = schema.key_fields
+        self._key_names = tuple(name for name, _ in self._key_fields)
+        self._reverse = tuple(
+            field.TYPE.value.endswith(b'_rev') for _, field in self._key_fields
+        )
+
+    def open(self):
+        try:
+            for shard in self.shards:
+                shard.open()
+        except Exception:
+            self.close()
+            raise
+
+        return self
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _key(self, values):
+        """ Python key tuple of the dict (or tuple in the key order) """
+        if isinstance(values, dict):
+            try:
+                return tuple(values[name] for name in self._key_names)
+            except KeyError:
+                raise ValueError('Not enough key fields')
+
+        if not isinstance(values, (tuple, list)):
+            values = (values,)
+
+        values = tuple(values)
+
+        if len(values) != len(self._key_names):
+            raise ValueError('Not enough key fields')
+
+        return values
+
+    def _native(self, key):
+        return tuple(
+            field.from_python(value)
+            for (_, field), value in zip(self._key_fields, key)
+        )
+
+    def shard_of(self, key):
+        """ Shard number of the key (dict or tuple of the key fields) """
+        return self.partitioner.shard(self._native(self._key(key)))
+
+    def _sort_key(self, row):
+        # the engine order: bytes by memcmp, integers by value
+        return tuple(
+            -value if reverse else value
+            for reverse, value in zip(
+                self._reverse, self._native(self._key(row))
+            )
+        )
+
+    def _fanout(self, requests):
+        """ Sends ``{shard: (method, args)}`` requests to all shards before
+        waiting for the results, so the worker processes run in parallel """
+        pending = []
+        error = None
+
+        for idx, (method, args) in sorted(requests.items()):
+            shard = self.shards[idx]
+            pending.append((idx, shard, shard.submit(method, *args)))
+
+        results = {}
+
+        for idx, shard, handle in pending:
+            try:
+                results[idx] = shard.result(handle)
+            except Exception as e:
+                error = error or e
+
+        if error is not None:
+            raise error
+
+        return results
+
+    def _group(self, items, key):
+        groups = {}
+
+        for position, item in enumerate(items):
+            try:
+                shard = self.shard_of(key(item))
+            except Exception as e:
+                groups.setdefault(None, []).append((position, e))
+                continue
+
+            groups.setdefault(shard, []).append((position, item))
+
+        return groups
+
+    def get(self, **key):
+        document = self.get_many([self._key(key)])[0]
+
+        if document is None:
+            raise LookupError
+
+        return document
+
+    def get_many(self, keys):
+        """ Documents (dicts) in the ``keys`` order, None for missing """
+        keys = [self._key(key) for key in keys]
+        groups = self._group(keys, lambda key: key)
+
+        if None in groups:
+            raise groups[None][0][1]
+
+        results = self._fanout({
+            shard: ('get_many', ([key for _, key in items],))
+            for shard, items in groups.items()
+        })
+
+        documents = [None] * len(keys)
+
+        for shard, items in groups.items():
+            for (position, _), document in zip(items, results[shard]):
+                documents[position] = document
+
+        return documents
+
+    def set(self, **values):
+        result = self.set_many([values])
+
+        if result.errors:
+            raise result.errors[0][1]
+
+    def set_many(self, rows):
+        """ Writes the dicts (or tuples in the schema field order) grouped
+        by the shards. Broken rows are reported in ``errors`` with their
+        positions in ``rows``. """
+        codec = self.schema.codec
+        positions = [codec.position(name) for name in self._key_names]
+
+        def key(row):
+            if isinstance(row, dict):
+                return row
+            return tuple(row[idx] for idx in positions)
+
+        groups = self._group(list(rows), key)
+        errors = groups.pop(None, [])
+
+        results = self._fanout({
+            shard: ('set_many', ([row for _, row in items],))
+            for shard, items in groups.items()
+        })
+
+        count = 0
+
+        for shard, items in groups.items():
+            result = results[shard]
+            count += result.count
+            errors.extend(
+                (items[idx][0], exc) for idx, exc in result.errors
+            )
+
+        errors.sort(key=lambda item: item[0])
+        return BatchResult(count, errors)
+
+    def delete(self, **key):
+        return self.delete_many([self._key(key)])
+
+    def delete_many(self, keys):
+        """ Deletes the documents by the key tuples, every shard deletes
+        its keys in one transaction """
+        groups = self._group([self._key(key) for key in keys], lambda k: k)
+
+        if None in groups:
+            raise groups[None][0][1]
+
+        results = self._fanout({
+            shard: ('delete_keys', ([key for _, key in items],))
+            for shard, items in groups.items()
+        })
+
+        return sum(results.values())
+
+    def count(self, exact=False):
+        """ Sum of :meth:`sonya.Database.count` of the shards """
+        return sum(self._fanout({
+            idx: ('count', (exact,)) for idx in range(len(self.shards))
+        }).values())
+
+    def __len__(self):
+        return self.count(exact=True)
+
+    def _scan(self, shard, order, query, stop, inclusive, batch_size):
+        """ Rows of the shard read by ``batch_size`` requests, every next
+        batch starts after the last key of the previous one """
+        following = '>' if order.startswith('>') else '<'
+
+        while True:
+            rows = shard.call(
+                'scan', order, query, stop, inclusive, batch_size
+            )
+
+            for row in rows:
+                yield row
+
+            if len(rows) < batch_size:
+                return
+
+            order = following
+            query = dict(zip(self._key_names, self._key(rows[-1])))
+
+    def cursor(self, order='>=', stop=None, inclusive=False, limit=None,
+               batch_size=256, **query):
+        """ Iterates the documents of all shards in the key order like
+        :meth:`sonya.Database.cursor` does (k-way merge) """
+        if batch_size <= 0:
+            raise ValueError('Batch size must be positive')
+
+        descending = order.startswith('<')
+        heap = []
+        streams = [
+            self._scan(shard, order, query, stop, inclusive, batch_size)
+            for shard in self.shards
+        ]
+
+        def push(idx):
+            for row in streams[idx]:
+                key = self._sort_key(row)
+                heapq.heappush(
+                    heap, (Descending(key) if descending else key, idx, row)
+                )
+                return
+
+        for idx in range(len(streams)):
+            push(idx)
+
+        count = 0
+
+        while heap and (limit is None or count < limit):
+            _, idx, row = heapq.heappop(heap)
+            yield row
+            count += 1
+            push(idx)
+
+    def __iter__(self):
+        return self.cursor()
+
+
+class Descending(object):
+    """ Inverts the ordering of the wrapped key for the heap """
+
+    __slots__ = 'key',
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+__all__ = (
+    'HashPartitioner',
+    'LocalShard',
+    'ProcessShard',
+    'RangePartitioner',
+    'ShardedDatabase',
+)
@@ -0,0 +1,105 @@
+import multiprocessing
+from typing import (
+    Any, Dict, Generator, Iterable, List, Optional, Sequence, Tuple, Union
+)
+
+from .db import BatchResult, Database
+from .env import Environment
+from .schema import Schema
+
+
+Key = Union[Dict[str, Any], Sequence[Any], Any]
+
+
+class HashPartitioner(object):
+    count = ...     # type: int
+
+    def __init__(self, count: int): ...
+    def bind(self, schema: Schema) -> 'HashPartitioner': ...
+    def shard(self, key: Tuple[Union[bytes, int], ...]) -> int: ...
+
+
+class RangePartitioner(object):
+    boundaries = ...    # type: tuple
+    count = ...         # type: int
+
+    def __init__(self, boundaries: Iterable[Any]): ...
+    def bind(self, schema: Schema) -> 'RangePartitioner': ...
+    def shard(self, key: Tuple[Union[bytes, int], ...]) -> int: ...
+
+
+Partitioner = Union[HashPartitioner, RangePartitioner]
+
+
+class LocalShard(object):
+    path = ...      # type: str
+    name = ...      # type: str
+    schema = ...    # type: Schema
+    kwargs = ...    # type: dict
+    env = ...       # type: Optional[Environment]
+    db = ...        # type: Optional[Database]
+
+    def __init__(self, path: str, name: str, schema: Schema,
+                 kwargs: dict): ...
+    def open(self): ...
+    def close(self): ...
+    def submit(self, method: str, *args) -> Tuple[bool, Any]: ...
+    def result(self, pending: Tuple[bool, Any]) -> Any: ...
+    def call(self, method: str, *args) -> Any: ...
+    def get_many(self, keys: List[tuple]) -> List[Optional[dict]]: ...
+    def set_many(self, rows: List[Any]) -> BatchResult: ...
+    def delete_keys(self, keys: List[tuple]) -> int: ...
+    def scan(self, order: str, query: dict, stop: Optional[dict],
+             inclusive: bool, limit: Optional[int]) -> List[dict]: ...
+    def count(self, exact: bool) -> int: ...
+
+
+def serve(conn: Any, path: str, name: str, schema: Schema,
+          kwargs: dict): ...
+
+
+class ProcessShard(object):
+    path = ...      # type: str
+    name = ...      # type: str
+    schema = ...    # type: Schema
+    kwargs = ...    # type: dict
+    context = ...   # type: Any
+    process = ...   # type: Optional[multiprocessing.Process]
+
+    def __init__(self, path: str, name: str, schema: Schema, kwargs: dict,
+                 context: Any = None): ...
+    def open(self): ...
+    def close(self, timeout: float = 5): ...
+    def submit(self, method: str, *args) -> None: ...
+    def result(self, pending: Any = None) -> Any: ...
+    def call(self, method: str, *args) -> Any: ...
+
+
+class ShardedDatabase(object):
+    paths = ...         # type: Tuple[str, ...]
+    name = ...          # type: str
+    schema = ...        # type: Schema
+    partitioner = ...   # type: Partitioner
+    shards = ...        # type: List[Union[LocalShard, ProcessShard]]
+
+    def __init__(self, paths: Iterable[str], name: str, schema: Schema,
+                 partitioner: Partitioner = None, processes: bool = False,
+                 **kwargs): ...
+    def open(self) -> 'ShardedDatabase': ...
+    def close(self): ...
+    def __enter__(self) -> 'ShardedDatabase': ...
+    def __exit__(self, exc_type, exc_val, exc_tb): ...
+    def shard_of(self, key: Key) -> int: ...
+    def get(self, **key) -> dict: ...
+    def get_many(self, keys: Iterable[Key]) -> List[Optional[dict]]: ...
+    def set(self, **values): ...
+    def set_many(self, rows: Iterable[Union[dict, tuple]]) -> BatchResult: ...
+    def delete(self, **key) -> int: ...
+    def delete_many(self, keys: Iterable[Key]) -> int: ...
+    def count(self, exact: bool = False) -> int: ...
+    def __len__(self) -> int: ...
+    def cursor(
+        self, order: str = '>=', stop: dict = None, inclusive: bool = False,
+        limit: int = None, batch_size: int = 256, **query
+    ) -> Generator[dict, None, None]: ...
+    def __iter__(self) -> Generator[dict, None, None]: ...
@@ -1,4 +1,7 @@
-from typing import Union, Dict, Iterable
+from array import array
+from typing import (
+    Any, Callable, Dict, Iterable, List, Optional, Tuple, Union,
+)
 
 
 class SophiaError(Exception): ...
@@ -17,6 +20,14 @@ class IndexType:
     def __new__(cls, value: str, is_bytes: bool): ...
 
 
+MERGE_OPERATORS = ...   # type: Dict[str, int]
+
+
+class MergeOperators:
+    def __init__(self, operators: List[Tuple[Optional[str], bool]],
+                 mask: int = -1): ...
+
+
 class Types:
     string = ...    # type: IndexType
     u64 = ...       # type: IndexType
@@ -42,11 +53,14 @@ class Environment:
     def open(self) -> int: ...
     def close(self) -> int: ...
     def get_string(self, key: str) -> bytes: ...
-    def get_int(self, key: str) -> bytes: ...
+    def get_int(self, key: str) -> int: ...
+    def get(self, key: str) -> Union[str, int]: ...
     def set_string(self, key: str, value: bytes) -> int: ...
     def set_int(self, key: str, value: int) -> int: ...
+    def set_upsert(self, name: str, operators: MergeOperators) -> int: ...
     def get_object(self, name: str) -> Database: ...
     def transaction(self) -> Transaction: ...
+    def last_error(self, rc: int = -1) -> SophiaError: ...
 
 
 class Transaction:
@@ -57,9 +71,17 @@ class Transaction:
     def closed(self) -> bool: ...
 
     def set(self, document: Document) -> int: ...
+    def set_many(
+        self, db: Database, fields: Tuple[Tuple[str, bool], ...], rows: list
+    ) -> Tuple[int, List[Tuple[int, Exception]]]: ...
+    def get_many(
+        self, db: Database, fields: Tuple[Tuple[str, bool], ...],
+        keys: List[tuple], sort: bool = False
+    ) -> List[Optional[Document]]: ...
+    def upsert(self, document: Document) -> int: ...
     def delete(self, document: Document) -> int: ...
     def get(self, query: Document) -> Document: ...
-    def commit(self) -> int: ...
+    def commit(self) -> int: ...    # open after TransactionLocked
     def rollback(self) -> int: ...
     def __enter__(self) -> Transaction: ...
     def __exit__(self, exc_type, exc_val, exc_tb): ...
@@ -74,11 +96,29 @@ class Database:
 
     def get(self, query: Document) -> Document: ...
     def set(self, document: Document) -> int: ...
+    def set_many(
+        self, fields: Tuple[Tuple[str, bool], ...], rows: list
+    ) -> Tuple[int, List[Tuple[int, Exception]]]: ...
+    def get_many(
+        self, fields: Tuple[Tuple[str, bool], ...], keys: List[tuple],
+        sort: bool = False
+    ) -> List[Optional[Document]]: ...
+    def upsert(self, document: Document) -> int: ...
     def delete(self, query: Document) -> int: ...
-    def cursor(self, query: dict) -> Cursor: ...
+    def count(self, exact: bool = False) -> int: ...
+    def __len__(self) -> int: ...
+    def cursor(self, query: dict, **kwargs) -> Cursor: ...
     def transaction(self) -> Transaction: ...
     def document(self) -> Document: ...
-    def delete_many(self, **query) -> int: ...
+    @property
+    def key_fields(self) -> Tuple[Tuple[str, bool, bool], ...]: ...
+
+    def delete_many(
+        self, query: dict = None, stop: tuple = None,
+        inclusive: bool = False, limit: int = None, batch_size: int = 0,
+        progress: Callable[[int, int], Any] = None,
+        keys: Tuple[Tuple[str, bool, bool], ...] = None, **kwargs
+    ) -> int: ...
 
 
 class Cursor:
@@ -91,8 +131,61 @@ class Cursor:
     @property
     def query(self) -> dict: ...
 
-    def __init__(self, env: Environment, query: dict, db: Database): ...
-    def __iter__(self) -> Iterable[Document]: ...
+    @property
+    def keys(self) -> Tuple[Tuple[str, bool, bool], ...]: ...
+
+    @property
+    def stop(self) -> tuple: ...
+
+    @property
+    def inclusive(self) -> bool: ...
+
+    @property
+    def keys_only(self) -> bool: ...
+
+    @property
+    def limit(self) -> Optional[int]: ...
+
+    @property
+    def count(self) -> int: ...
+
+    def __init__(self, env: Environment, query: dict, db: Database,
+                 keys: Tuple[Tuple[str, bool, bool], ...] = (),
+                 stop: tuple = None, inclusive: bool = False,
+                 keys_only: bool = False, limit: int = None): ...
+    def fetch(
+        self, size: int, fields: Tuple[Tuple[str, bool, Optional[str]], ...],
+        columnar: bool = False
+    ) -> Union[List[tuple], List[Union[list, array]]]: ...
+    def open(self): ...
+    def close(self): ...
+    def __iter__(self) -> Iterable[Union[Document, tuple]]: ...
+
+
+class Codec:
+    @property
+    def names(self) -> Tuple[str, ...]: ...
+
+    @property
+    def positions(self) -> Dict[str, int]: ...
+
+    def __init__(self, fields: Tuple[Tuple[str, bool], ...],
+                 views: Tuple[int, ...] = ()): ...
+    def __len__(self) -> int: ...
+    def encode(self, document: Document, values: tuple,
+               positions: Tuple[int, ...] = None) -> int: ...
+    def set(self, document: Document, pos: int,
+            value: Union[bytes, int]) -> int: ...
+    def get(self, document: Document,
+            pos: int) -> Optional[Union[bytes, int]]: ...
+    def decode(self, document: Document) -> tuple: ...
+
+
+class DocumentBuffer:
+    @property
+    def document(self) -> 'Document': ...
+
+    def __len__(self) -> int: ...
 
 
 class Document:
@@ -102,6 +195,9 @@ class Document:
     @property
     def closed(self) -> bool: ...
 
+    @property
+    def exports(self) -> int: ...
+
     def get_string(self, key: str) -> bytes: ...
     def get_int(self, key: str) -> int: ...
     def set_string(self, key: str, value: bytes) -> int: ...
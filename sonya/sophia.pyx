@@ -1,8 +1,14 @@
 from cpython cimport bool
-from libc.stdint cimport int64_t, int32_t
-from libc.stdlib cimport calloc, free
+from cpython.buffer cimport PyBuffer_FillInfo
+from cpython.bytes cimport PyBytes_AS_STRING, PyBytes_GET_SIZE
+from libc.stdint cimport (
+    int8_t, int16_t, int32_t, int64_t, uint8_t, uint16_t, uint32_t, uint64_t,
+)
+from libc.stdlib cimport calloc, free, malloc, realloc
 from libc.string cimport memcpy, memcmp
 
+import re
+from array import array
 from collections import namedtuple
 
 cdef extern from "src/sophia.h" nogil:
@@ -38,6 +44,7 @@ class TransactionLocked(TransactionError): pass
 
 
 IndexType = namedtuple('IndexType', ('value', 'is_bytes'))
+KEY_INDEX = re.compile(r'key\((\d+)\)')
 
 
 cdef class Types:
@@ -52,6 +59,175 @@ cdef class Types:
     u8_rev = IndexType(b'u8_rev', False)
 
 
+cdef enum:
+    MERGE_KEEP = 0
+    MERGE_REPLACE = 1
+    MERGE_ADD = 2
+    MERGE_MAX = 3
+    MERGE_MIN = 4
+    MERGE_APPEND = 5
+
+
+MERGE_OPERATORS = {
+    'replace': MERGE_REPLACE,
+    'add': MERGE_ADD,
+    'max': MERGE_MAX,
+    'min': MERGE_MIN,
+    'append': MERGE_APPEND,
+}
+
+
+cdef struct merge_spec:
+    int count
+    int *ops
+    char *is_signed
+    # position of the u64 field with the bits of the fields set by
+    # the upsert statement or -1 when all of them are set
+    int mask
+
+
+cdef inline int64_t read_number(char *ptr, uint32_t size,
+                                char is_signed) noexcept nogil:
+    if is_signed:
+        if size == 1:
+            return (<int8_t*>ptr)[0]
+        elif size == 2:
+            return (<int16_t*>ptr)[0]
+        elif size == 4:
+            return (<int32_t*>ptr)[0]
+    else:
+        if size == 1:
+            return (<uint8_t*>ptr)[0]
+        elif size == 2:
+            return (<uint16_t*>ptr)[0]
+        elif size == 4:
+            return (<uint32_t*>ptr)[0]
+
+    return (<int64_t*>ptr)[0]
+
+
+cdef inline void write_number(char *ptr, uint32_t size,
+                              int64_t value) noexcept nogil:
+    if size == 1:
+        (<uint8_t*>ptr)[0] = <uint8_t>value
+    elif size == 2:
+        (<uint16_t*>ptr)[0] = <uint16_t>value
+    elif size == 4:
+        (<uint32_t*>ptr)[0] = <uint32_t>value
+    else:
+        (<uint64_t*>ptr)[0] = <uint64_t>value
+
+
+cdef int merge_callback(int count,
+                        char **src, uint32_t *src_size,
+                        char **upsert, uint32_t *upsert_size,
+                        char **result, uint32_t *result_size,
+                        void *arg) noexcept nogil:
+    """ Upsert callback executed by the engine. Returns the merged
+    fields in ``result``, the buffers are released by the engine. """
+
+    cdef merge_spec *spec = <merge_spec*>arg
+    cdef int i
+    cdef int op
+    cdef char *buf
+    cdef uint32_t size
+    cdef int64_t a, b
+    cdef char is_signed
+    cdef uint64_t mask = <uint64_t> -1
+
+    # No previous version, the upserted document is stored as is
+    if src == NULL:
+        return 0
+
+    if 0 <= spec.mask < count:
+        mask = <uint64_t> read_number(
+            upsert[spec.mask], upsert_size[spec.mask], 0
+        )
+
+    for i in range(min(count, spec.count)):
+        op = spec.ops[i]
+
+        # the fields omitted by the upsert keep the stored values
+        if op == MERGE_KEEP or (i < 64 and not (mask >> i) & 1):
+            continue
+
+        if op == MERGE_APPEND:
+            size = src_size[i] + upsert_size[i]
+        else:
+            size = upsert_size[i]
+
+        buf = <char*> malloc(size + 1)
+        if buf == NULL:
+            return -1
+
+        if op == MERGE_APPEND:
+            memcpy(buf, src[i], src_size[i])
+            memcpy(buf + src_size[i], upsert[i], upsert_size[i])
+        elif op == MERGE_REPLACE:
+            memcpy(buf, upsert[i], size)
+        else:
+            is_signed = spec.is_signed[i]
+            a = read_number(src[i], src_size[i], is_signed)
+            b = read_number(upsert[i], upsert_size[i], is_signed)
+
+            if op == MERGE_ADD:
+                a = <int64_t>(<uint64_t>a + <uint64_t>b)
+            elif op == MERGE_MAX:
+                if is_signed and b > a:
+                    a = b
+                elif not is_signed and <uint64_t>b > <uint64_t>a:
+                    a = b
+            elif op == MERGE_MIN:
+                if is_signed and b < a:
+                    a = b
+                elif not is_signed and <uint64_t>b < <uint64_t>a:
+                    a = b
+
+            write_number(buf, size, a)
+
+        result[i] = buf
+        result_size[i] = size
+
+    return 0
+
+
+cdef class MergeOperators:
+    """ Per-field merge operators of the database upsert callback.
+
+    ``operators`` is a list of ``(operator, is_signed)`` pairs in the scheme
+    field order, ``None`` keeps the stored value (used for key fields).
+    ``mask`` is the position of the u64 field with the bits of the fields
+    set by the upsert statement, the other fields keep the stored values.
+    """
+
+    cdef merge_spec spec
+
+    def __cinit__(self, list operators, int mask=-1):
+        self.spec.mask = mask
+        self.spec.count = len(operators)
+        self.spec.ops = <int*> calloc(self.spec.count, sizeof(int))
+        self.spec.is_signed = <char*> calloc(self.spec.count, sizeof(char))
+
+        if self.spec.ops == NULL or self.spec.is_signed == NULL:
+            raise MemoryError
+
+        for idx, item in enumerate(operators):
+            name, is_signed = item
+
+            if name is None:
+                self.spec.ops[idx] = MERGE_KEEP
+            elif name in MERGE_OPERATORS:
+                self.spec.ops[idx] = MERGE_OPERATORS[name]
+            else:
+                raise ValueError('Unknown merge operator %r' % name)
+
+            self.spec.is_signed[idx] = 1 if is_signed else 0
+
+    def __dealloc__(self):
+        free(self.spec.ops)
+        free(self.spec.is_signed)
+
+
 cdef class cstring:
     """ Simple lazy string on dynamic memory """
 
@@ -100,6 +276,8 @@ cdef class Environment(object):
     cdef void *env
     cdef readonly bool _closed
     cdef readonly Configuration _configuration
+    cdef readonly dict _merge_operators
+    cdef dict _config_types
 
     def __check_error(self, int rc):
         if rc != -1:
@@ -116,10 +294,25 @@ cdef class Environment(object):
         if self._closed:
             raise SophiaClosed("Environment closed")
 
+    def last_error(self, int rc=-1):
+        if rc == 1:
+            return TransactionRollback()
+        elif rc == 2:
+            return TransactionLocked()
+
+        try:
+            error = self.get_string('sophia.error').decode('utf-8', 'ignore')
+        except KeyError:
+            error = 'unknown error occurred.'
+
+        return SophiaError(error)
+
     def __cinit__(self):
         self.env = sp_env()
         self._closed = None
         self._configuration = Configuration(self)
+        self._merge_operators = {}
+        self._config_types = {}
 
     @property
     def configuration(self) -> dict:
@@ -172,8 +365,11 @@ cdef class Environment(object):
         if buf == NULL:
             raise KeyError("Key %r not found in document" % key)
 
-        value = buf[:nlen]
-        return value
+        # the configuration strings are the NUL-terminated malloc'ed copies
+        try:
+            return buf[:nlen - 1 if nlen > 0 else 0]
+        finally:
+            free(buf)
 
     def get_int(self, str key) -> int:
         self.check_closed()
@@ -186,6 +382,47 @@ cdef class Environment(object):
 
         return result
 
+    def get(self, str key):
+        """ Reads the single setting by the direct lookup. The setting type
+        is remembered, so the following reads take one engine call. """
+        self.check_closed()
+
+        cdef char* buf
+        cdef int nlen = 0
+        cdef int64_t result
+        cdef cstring ckey = cstring.from_string(key)
+
+        kind = self._config_types.get(key)
+
+        if kind is not int:
+            with nogil:
+                buf = <char *>sp_getstring(self.env, ckey.c_str, &nlen)
+
+            if buf != NULL:
+                try:
+                    value = buf[:nlen - 1 if nlen > 0 else 0].decode()
+                finally:
+                    free(buf)
+
+                self._config_types[key] = str
+                return value
+
+        if kind is not str:
+            with nogil:
+                result = sp_getint(self.env, ckey.c_str)
+
+            if result != -1:
+                self._config_types[key] = int
+                return result
+
+        # unset string, -1 or unknown key
+        values = self._configuration.select((key,))
+
+        if key not in values:
+            raise KeyError(key)
+
+        return config_value(values[key] or '')
+
     def set_string(self, str key, bytes value) -> int:
         self.check_closed()
 
@@ -213,6 +450,32 @@ cdef class Environment(object):
         self.__check_error(rc)
         return rc
 
+    def set_upsert(self, str name, MergeOperators operators) -> int:
+        """ Installs the native upsert callback for the database ``name``.
+        The environment keeps the operators alive until it will be
+        destroyed. """
+        self.check_closed()
+
+        cdef int rc
+        cdef cstring ckey = cstring.from_string('db.%s.upsert' % name)
+        cdef cstring carg = cstring.from_string('db.%s.upsert_arg' % name)
+
+        with nogil:
+            rc = sp_setstring(
+                self.env, ckey.c_str, <void*> merge_callback, sizeof(void*)
+            )
+
+        self.__check_error(rc)
+
+        with nogil:
+            rc = sp_setstring(
+                self.env, carg.c_str, <void*> &operators.spec, sizeof(void*)
+            )
+
+        self.__check_error(rc)
+        self._merge_operators[name] = operators
+        return rc
+
     def get_object(self, str name) -> Database:
         self.check_closed()
         cdef cstring cname = cstring.from_string(name)
@@ -231,6 +494,16 @@ cdef class Environment(object):
         return Transaction(self)
 
 
+CONFIG_INT = re.compile(r'^-?\d+$')
+
+
+cdef object config_value(str value):
+    """ Configuration cursor serializes all the values as strings """
+    if CONFIG_INT.match(value):
+        return int(value)
+    return value
+
+
 cdef class Configuration:
     cdef readonly Environment env
 
@@ -255,8 +528,8 @@ cdef class Configuration:
 
 
         cdef char *key, *value
-        cdef int key_len, value_len
-        cdef void* obj
+        cdef int key_len = 0, value_len = 0
+        cdef void* obj = NULL
 
         try:
             while True:
@@ -264,7 +537,7 @@ cdef class Configuration:
                     obj = sp_get(cursor, obj)
 
                 if obj == NULL:
-                    raise StopIteration
+                    return
 
                 with nogil:
                     key = <char*> sp_getstring(obj, 'key', &key_len)
@@ -282,16 +555,301 @@ cdef class Configuration:
                 key_len = 0
                 value_len = 0
 
-                if v.isdigit():
-                    v = int(v)
-
-                yield k, v
+                yield k, config_value(v)
 
         finally:
             if cursor != NULL:
                 with nogil:
                     sp_destroy(cursor)
 
+    def select(self, tuple prefixes) -> dict:
+        """ Reads the settings which keys start with one of the ``prefixes``
+        in one pass over the configuration. Values are not converted. """
+        self.env.check_closed()
+
+        cdef tuple encoded = tuple(prefix.encode() for prefix in prefixes)
+        cdef void *cursor
+        cdef void *obj = NULL
+        cdef char *key
+        cdef char *value
+        cdef int key_len = 0
+        cdef int value_len = 0
+
+        with nogil:
+            cursor = sp_getobject(self.env.env, NULL)
+
+        if cursor == NULL:
+            raise self.env.last_error(-1)
+
+        result = {}
+
+        try:
+            while True:
+                with nogil:
+                    obj = sp_get(cursor, obj)
+
+                    if obj != NULL:
+                        key = <char*> sp_getstring(obj, 'key', &key_len)
+
+                if obj == NULL:
+                    break
+
+                # the length includes the trailing zero
+                bkey = key[:key_len - 1 if key_len > 0 else 0]
+                key_len = 0
+
+                if not bkey.startswith(encoded):
+                    continue
+
+                value = <char*> sp_getstring(obj, 'value', &value_len)
+
+                if value == NULL:
+                    result[bkey.decode()] = None
+                else:
+                    result[bkey.decode()] = value[
+                        :value_len - 1 if value_len > 0 else 0
+                    ].decode()
+
+                value_len = 0
+
+            return result
+        finally:
+            with nogil:
+                sp_destroy(cursor)
+
+
+cdef object write_many(void* target, Database db, tuple fields, list rows):
+    """ Builds native documents for the encoded ``rows`` and writes them
+    to the ``target`` (database or transaction) in the one nogil block.
+
+    Returns the number of written rows and a list of
+    ``(row_index, exception)`` pairs for the failed ones.
+    """
+    cdef size_t nfields = len(fields)
+    cdef size_t nrows = len(rows)
+    cdef size_t total = nfields * nrows
+    cdef size_t i, j, pos
+    cdef int rc
+    cdef void* obj
+
+    errors = []
+
+    if nrows == 0:
+        return 0, errors
+
+    cdef char **ckeys = <char**> calloc(nfields, sizeof(char*))
+    cdef char *is_bytes = <char*> calloc(nfields, sizeof(char))
+    cdef char **values = <char**> calloc(total, sizeof(char*))
+    cdef int *sizes = <int*> calloc(total, sizeof(int))
+    cdef int64_t *numbers = <int64_t*> calloc(total, sizeof(int64_t))
+    cdef int *results = <int*> calloc(nrows, sizeof(int))
+
+    try:
+        if (ckeys == NULL or is_bytes == NULL or values == NULL or
+                sizes == NULL or numbers == NULL or results == NULL):
+            raise MemoryError
+
+        for j in range(nfields):
+            ckeys[j] = db.key(fields[j][0])
+            is_bytes[j] = 1 if fields[j][1] else 0
+
+        for i in range(nrows):
+            row = rows[i]
+
+            try:
+                if len(row) != nfields:
+                    raise BadQuery(
+                        'Expected %d fields got %d' % (nfields, len(row))
+                    )
+
+                for j in range(nfields):
+                    pos = i * nfields + j
+                    value = row[j]
+
+                    if is_bytes[j]:
+                        if not isinstance(value, bytes):
+                            raise BadQuery(
+                                'Expected bytes got %r' % type(value)
+                            )
+
+                        values[pos] = PyBytes_AS_STRING(value)
+                        sizes[pos] = PyBytes_GET_SIZE(value)
+                    else:
+                        numbers[pos] = value
+            except Exception as e:
+                results[i] = -2
+                errors.append((i, e))
+
+        with nogil:
+            for i in range(nrows):
+                if results[i] == -2:
+                    continue
+
+                obj = sp_document(db.db)
+
+                if obj == NULL:
+                    rc = -1
+                else:
+                    rc = 0
+
+                    for j in range(nfields):
+                        pos = i * nfields + j
+
+                        if is_bytes[j]:
+                            rc = sp_setstring(
+                                obj, ckeys[j], values[pos], sizes[pos]
+                            )
+                        else:
+                            rc = sp_setint(obj, ckeys[j], numbers[pos])
+
+                        if rc == -1:
+                            break
+
+                    if rc == -1:
+                        sp_destroy(obj)
+                    else:
+                        rc = sp_set(target, obj)
+
+                results[i] = rc
+
+                if rc != 0:
+                    with gil:
+                        errors.append((i, db.env.last_error(rc)))
+
+        errors.sort(key=lambda item: item[0])
+        return nrows - len(errors), errors
+    finally:
+        free(ckeys)
+        free(is_bytes)
+        free(values)
+        free(sizes)
+        free(numbers)
+        free(results)
+
+
+cdef list read_many(void* source, Database db, tuple fields, list keys,
+                    sort=False):
+    """ Reads the documents by the encoded key tuples from the ``source``
+    (database or transaction) in the one nogil block.
+
+    Returns the list of documents in the ``keys`` order,
+    None stands for the missing ones. With ``sort`` the lookups are
+    performed in the key order.
+    """
+    cdef size_t nfields = len(fields)
+    cdef size_t nkeys = len(keys)
+    cdef size_t total = nfields * nkeys
+    cdef size_t i, j, pos, idx
+    cdef int rc = 0
+    cdef void* obj = NULL
+
+    if nkeys == 0:
+        return []
+
+    if sort:
+        order = sorted(range(nkeys), key=keys.__getitem__)
+    else:
+        order = range(nkeys)
+
+    cdef char **ckeys = <char**> calloc(nfields, sizeof(char*))
+    cdef char *is_bytes = <char*> calloc(nfields, sizeof(char))
+    cdef char **values = <char**> calloc(total, sizeof(char*))
+    cdef int *sizes = <int*> calloc(total, sizeof(int))
+    cdef int64_t *numbers = <int64_t*> calloc(total, sizeof(int64_t))
+    cdef size_t *indexes = <size_t*> calloc(nkeys, sizeof(size_t))
+    cdef void **results = <void**> calloc(nkeys, sizeof(void*))
+
+    try:
+        if (ckeys == NULL or is_bytes == NULL or values == NULL or
+                sizes == NULL or numbers == NULL or indexes == NULL or
+                results == NULL):
+            raise MemoryError
+
+        for j in range(nfields):
+            ckeys[j] = db.key(fields[j][0])
+            is_bytes[j] = 1 if fields[j][1] else 0
+
+        for i, idx in enumerate(order):
+            indexes[i] = idx
+            key = keys[idx]
+
+            if len(key) != nfields:
+                raise BadQuery(
+                    'Expected %d key fields got %d' % (nfields, len(key))
+                )
+
+            for j in range(nfields):
+                pos = idx * nfields + j
+                value = key[j]
+
+                if is_bytes[j]:
+                    if not isinstance(value, bytes):
+                        raise BadQuery('Expected bytes got %r' % type(value))
+
+                    values[pos] = PyBytes_AS_STRING(value)
+                    sizes[pos] = PyBytes_GET_SIZE(value)
+                else:
+                    numbers[pos] = value
+
+        with nogil:
+            for i in range(nkeys):
+                idx = indexes[i]
+                obj = sp_document(db.db)
+
+                if obj == NULL:
+                    break
+
+                rc = 0
+
+                for j in range(nfields):
+                    pos = idx * nfields + j
+
+                    if is_bytes[j]:
+                        rc = sp_setstring(
+                            obj, ckeys[j], values[pos], sizes[pos]
+                        )
+                    else:
+                        rc = sp_setint(obj, ckeys[j], numbers[pos])
+
+                    if rc == -1:
+                        break
+
+                if rc == -1:
+                    sp_destroy(obj)
+                    break
+
+                # sp_get destroys the query document
+                results[idx] = sp_get(source, obj)
+
+        result = [None] * nkeys
+
+        for i in range(nkeys):
+            if results[i] == NULL:
+                continue
+
+            document = Document(db, external=True, readonly=True)
+            document.obj = results[i]
+            document.external = False
+            results[i] = NULL
+            result[i] = document
+
+        if obj == NULL or rc == -1:
+            raise db.env.last_error(-1)
+
+        return result
+    finally:
+        for i in range(nkeys):
+            if results != NULL and results[i] != NULL:
+                sp_destroy(results[i])
+
+        free(ckeys)
+        free(is_bytes)
+        free(values)
+        free(sizes)
+        free(numbers)
+        free(indexes)
+        free(results)
+
 
 cdef class Transaction:
     cdef void* tx
@@ -335,21 +893,47 @@ cdef class Transaction:
         if document.closed:
             raise DocumentClosed
 
+        check_exports(document)
+
         cdef int rc
 
         with nogil:
             rc = sp_set(self.tx, document.obj)
         document.obj = NULL
 
-        self.__check_error(rc)
-        self.__refs.append(Document)
-        return rc
+        return self.__check_error(rc)
+
+    def set_many(self, Database db, tuple fields, list rows):
+        self.__check_closed()
+        return write_many(self.tx, db, fields, rows)
+
+    def get_many(self, Database db, tuple fields, list keys, sort=False):
+        self.__check_closed()
+        return read_many(self.tx, db, fields, keys, sort)
+
+    def upsert(self, Document document) -> int:
+        self.__check_closed()
+
+        if document.closed:
+            raise DocumentClosed
+
+        check_exports(document)
+
+        cdef int rc
+
+        with nogil:
+            rc = sp_upsert(self.tx, document.obj)
+            document.obj = NULL
+
+        return self.__check_error(rc)
 
     def get(self, Document query) -> Document:
         cdef void* result_ptr = NULL
 
         cdef Database db = query.db
 
+        check_exports(query)
+
         with nogil:
             result_ptr = sp_get(self.tx, query.obj)
             # sp_get destroy object inside
@@ -366,6 +950,8 @@ cdef class Transaction:
     def delete(self, Document query):
         cdef int rc
 
+        check_exports(query)
+
         with nogil:
             rc = sp_delete(self.tx, query.obj)
             query.obj = NULL
@@ -373,6 +959,11 @@ cdef class Transaction:
         return self.__check_error(rc)
 
     def commit(self) -> int:
+        """ Commits the transaction and closes it. Raises
+        :class:`TransactionRollback` (closed) on the conflict and
+        :class:`TransactionLocked` when the concurrent transaction holds
+        the keys. The locked transaction stays open: the commit may be
+        retried or the transaction rolled back. """
         self.__check_closed()
 
         cdef int rc
@@ -382,15 +973,18 @@ cdef class Transaction:
 
         self.__check_error(rc)
 
+        if rc == 2:
+            # waits for the concurrent transaction, the commit may be
+            # retried later or the transaction rolled back
+            raise TransactionLocked
+
         self.closed = True
         self.tx = NULL
 
-        if rc == 0:
-            return 0
-        elif rc == 1:
+        if rc == 1:
             raise TransactionRollback
-        elif rc == 2:
-            raise TransactionLocked
+
+        return 0
 
     def rollback(self) -> int:
         self.__check_closed()
@@ -411,17 +1005,43 @@ cdef class Transaction:
             self.rollback()
             return
 
-        self.commit()
+        try:
+            self.commit()
+        except TransactionLocked:
+            self.rollback()
+            raise
+
+    def __dealloc__(self):
+        if self.tx != NULL and not self.env.is_closed:
+            with nogil:
+                sp_destroy(self.tx)
+
+        self.tx = NULL
 
 
 cdef class Database:
     cdef readonly str name
     cdef readonly Environment env
     cdef void* db
+    cdef dict __keys
+    cdef tuple __key_fields
 
     def __cinit__(self, Environment env, str name):
         self.name = name
         self.env = env
+        self.__keys = {}
+        self.__key_fields = None
+
+    cdef char* key(self, str name) except NULL:
+        # field names are encoded once per database and reused by
+        # all documents
+        cdef cstring ckey = self.__keys.get(name)
+
+        if ckey is None:
+            ckey = cstring.from_string(name)
+            self.__keys[name] = ckey
+
+        return ckey.c_str
 
     def __check_error(self, int rc):
         if rc != -1:
@@ -435,16 +1055,13 @@ cdef class Database:
         raise SophiaError(error)
 
     def document(self) -> Document:
-        doc = Document(self)
-
-        with nogil:
-            doc.obj = sp_document(self.db)
-
-        return doc
+        return Document(self)
 
     def get(self, Document query) -> Document:
         cdef void* result_ptr = NULL
 
+        check_exports(query)
+
         with nogil:
             result_ptr = sp_get(self.db, query.obj)
             # sp_get destroy object inside
@@ -464,25 +1081,53 @@ cdef class Database:
         if document.closed:
             raise DocumentClosed
 
+        check_exports(document)
+
         with nogil:
             rc = sp_set(self.db, document.obj)
             document.obj = NULL
 
         return self.__check_error(rc)
 
+    def set_many(self, tuple fields, list rows):
+        self.env.check_closed()
+        return write_many(self.db, self, fields, rows)
+
+    def get_many(self, tuple fields, list keys, sort=False):
+        self.env.check_closed()
+        return read_many(self.db, self, fields, keys, sort)
+
+    def upsert(self, Document document) -> int:
+        cdef int rc
+
+        if document.closed:
+            raise DocumentClosed
+
+        check_exports(document)
+
+        with nogil:
+            rc = sp_upsert(self.db, document.obj)
+            document.obj = NULL
+
+        return self.__check_error(rc)
+
     def delete(self, Document document) -> int:
         cdef int rc
 
+        check_exports(document)
+
         with nogil:
             rc = sp_delete(self.db, document.obj)
             document.obj = NULL
 
         return self.__check_error(rc)
 
-    cdef int32_t get_length(self) nogil:
+    cdef int64_t get_length(self) noexcept nogil:
+        """ Counts documents walking the cursor. The cursor reads only
+        the database of the first query document. """
         cdef void* obj
         cdef void* cursor
-        cdef size_t result = 0
+        cdef int64_t result = 0
 
         obj = sp_document(self.db)
 
@@ -492,6 +1137,7 @@ cdef class Database:
         cursor = sp_cursor(self.env.env)
 
         if not cursor:
+            sp_destroy(obj)
             return -1
 
         while True:
@@ -507,145 +1153,214 @@ cdef class Database:
 
         return result
 
-    def __len__(self) -> int:
-        cdef int32_t result = 0
+    def count(self, exact=False) -> int:
+        """ Returns number of the documents from the index statistics.
 
-        with nogil:
-            result = self.get_length()
+        The statistics counts every stored version including deletes and
+        duplicates which are not merged by the compaction yet. Pass
+        ``exact=True`` to count the documents by the full scan.
+        """
+        cdef int64_t result = 0
 
-        return self.__check_error(result)
+        if not exact:
+            result = self.env.get_int('%s.index.count' % self.name)
+        else:
+            with nogil:
+                result = self.get_length()
 
-    def cursor(self, dict query) -> Cursor:
-        return Cursor(self.env, query, self)
+        if result == -1:
+            self.__check_error(-1)
 
-    def transaction(self) -> Transaction:
-        self.env.check_closed()
-        return self.env.transaction()
+        return result
 
-    def delete_many(self, **query):
-        query.setdefault('order', '>=')
+    def __len__(self) -> int:
+        # the statistics counts the deletes, so the length is exact
+        return self.count(exact=True)
 
-        if query['order'] not in ('>=', '<=', '>', '<'):
-            raise ValueError('Invalid order')
+    def cursor(self, dict query, **kwargs) -> Cursor:
+        return Cursor(self.env, query, self, **kwargs)
 
-        cdef void* obj
+    def transaction(self) -> Transaction:
+        self.env.check_closed()
+        return self.env.transaction()
 
-        with nogil:
-            obj = sp_document(self.db)
+    @property
+    def key_fields(self) -> tuple:
+        """ Key fields in the index order as ``(name, is_bytes, is_reverse)``
+        triples. Read from the scheme settings of the database once,
+        ``sonya.Database`` passes them from the schema instead. """
 
-        if obj == NULL:
-            self.__check_error(-1)
+        if self.__key_fields is not None:
+            return self.__key_fields
 
         prefix = '%s.scheme.' % self.name
-        key_fields = []
+        fields = []
 
-        for key, value in self.env._configuration:
-            if not key.startswith(prefix):
-                continue
+        for key, value in self.env._configuration.select((prefix,)).items():
+            match = KEY_INDEX.search(value or '')
 
-            if isinstance(value, int):
+            if match is None:
                 continue
 
-            if ',key(' not in value:
-                continue
-
-            key_fields.append((
-                key.replace(prefix, '').encode(),
-                'string' in value
+            fields.append((
+                int(match.group(1)), key[len(prefix):],
+                value.startswith('string'), '_rev' in value,
             ))
 
-        cdef size_t key_num = len(key_fields)
+        self.__key_fields = tuple(item[1:] for item in sorted(fields))
+        return self.__key_fields
+
+    def delete_many(self, dict query=None, tuple stop=None, inclusive=False,
+                    limit=None, Py_ssize_t batch_size=0, progress=None,
+                    tuple keys=None, **kwargs) -> int:
+        """ Deletes the documents matched by the cursor ``query`` (keyword
+        arguments are merged into it). With ``batch_size`` the deletes are
+        committed every ``batch_size`` documents, so the other writers
+        wait on the short commits only. ``progress(deleted, batches)`` is
+        called after each commit. ``keys`` are the key fields like
+        :attr:`key_fields` returns.
+
+        Returns the number of deleted documents.
+        """
+        query = dict(query or {})
+        query.update(kwargs)
+        query.setdefault('order', '>=')
 
-        cdef char **keys = <char**> calloc(sizeof(char*), key_num)
-        cdef char *str_key = <char*> calloc(sizeof(char), key_num)
+        if query['order'] not in ('>=', '<=', '>', '<'):
+            raise ValueError('Invalid order')
 
-        for idx, item in enumerate(key_fields):
-            key, is_str = item
+        if batch_size < 0:
+            raise ValueError('batch_size must not be negative')
 
-            keys[idx] = key
-            str_key[idx] = is_str
+        cdef Cursor cursor = Cursor(
+            self.env, query, self, keys=keys or self.key_fields, stop=stop,
+            inclusive=inclusive, limit=limit,
+        )
 
-        document = Document(self, external=True)
-        document.obj = obj
+        cdef size_t i
+        cdef size_t deleted = 0
+        cdef size_t pending = 0
+        cdef size_t batches = 0
+        cdef int rc = 0
+        cdef int nlen
+        cdef char *buf
+        cdef void *rm_obj
+        cdef void *tx = NULL
 
-        for key, value in query.items():
-            if not isinstance(key, str):
-                raise BadQuery("Bad key. Key must be str %r %r" % (
-                    key, type(key)
-                ))
+        cursor.open()
 
-            if isinstance(value, int):
-                document.set_int(key, value)
-            elif isinstance(value, bytes):
-                document.set_string(key, value)
-            elif isinstance(value, str):
-                document.set_string(key, value.encode())
-            else:
-                raise BadQuery(
-                    "Bad value. Value must be bytes or int not %r %r" % (
-                        value, type(value)
-                    )
-                )
+        try:
+            while True:
+                with nogil:
+                    tx = sp_begin(self.env.env)
 
-        document.obj = NULL
+                if tx == NULL:
+                    raise self.env.last_error(-1)
 
-        cdef void* tx
-        cdef void* cursor
+                with nogil:
+                    while cursor.advance():
+                        rm_obj = sp_document(self.db)
 
-        with nogil:
-            cursor = sp_cursor(self.env.env)
-            tx = sp_begin(self.env.env)
+                        if rm_obj == NULL:
+                            rc = -1
+                            break
 
-        if tx == NULL or cursor == NULL:
-            self.__check_error(-1)
+                        for i in range(cursor.nkeys):
+                            if cursor.key_bytes[i]:
+                                nlen = 0
+                                buf = <char*> sp_getstring(
+                                    cursor.obj, cursor.ckeys[i], &nlen
+                                )
+                                rc = sp_setstring(
+                                    rm_obj, cursor.ckeys[i], buf, nlen
+                                )
+                            else:
+                                rc = sp_setint(
+                                    rm_obj, cursor.ckeys[i],
+                                    sp_getint(cursor.obj, cursor.ckeys[i])
+                                )
 
-        cdef size_t result = 0
-        cdef void *rm_obj
-        cdef char* str_v
-        cdef int64_t int_v
-        cdef int nlen
+                            if rc == -1:
+                                break
 
-        with nogil:
-            while True:
-                obj = sp_get(cursor, obj)
+                        if rc == -1:
+                            sp_destroy(rm_obj)
+                            break
 
-                if obj == NULL:
-                    if cursor != NULL:
-                        sp_destroy(cursor)
-                    break
+                        rc = sp_delete(tx, rm_obj)
 
-                rm_obj = sp_document(self.db)
+                        if rc == -1:
+                            break
 
-                for i in range(key_num):
-                    k = keys[i]
+                        deleted += 1
+                        pending += 1
 
-                    if str_key[i]:
-                        str_v = <char *>sp_getstring(obj, keys[i], &nlen)
+                        if batch_size and pending >= <size_t> batch_size:
+                            break
 
-                        sp_setstring(rm_obj, keys[i], str_v, nlen)
-                        nlen = 0
-                    else:
-                        int_v = sp_getint(obj, keys[i])
-                        sp_setint(rm_obj, keys[i], int_v)
+                    if rc != -1:
+                        rc = sp_commit(tx)
 
-                    str_v = b''
-                    int_v = 0
+                        # locked transaction is still alive
+                        if rc != 2:
+                            tx = NULL
 
-                sp_delete(tx, rm_obj)
-                result += 1
+                if rc != 0:
+                    raise self.env.last_error(rc)
 
-            sp_commit(tx)
+                if pending:
+                    batches += 1
+                    pending = 0
 
-        free(str_key)
-        free(keys)
+                    if progress is not None:
+                        progress(deleted, batches)
 
-        return result
+                if cursor.finished:
+                    return deleted
+        finally:
+            if tx != NULL:
+                sp_destroy(tx)
+
+            cursor.close()
 
 
 cdef class Cursor:
+    """ Native cursor over the database.
+
+    ``keys`` describes the key fields in the index order as
+    ``(name, is_bytes, is_reverse)`` triples. It is required for the
+    ``stop`` bound (a tuple of the first key values) and for the
+    ``keys_only`` mode which yields tuples of the raw key values instead
+    of the documents. ``prefix`` and ``limit`` are handled by the engine
+    and by the native loop respectively.
+    """
+
     cdef readonly Environment env
     cdef readonly Database db
     cdef readonly dict query
+    cdef readonly tuple keys
+    cdef readonly tuple stop
+    cdef readonly bool inclusive
+    cdef readonly bool keys_only
+    cdef readonly object limit
+    cdef readonly Py_ssize_t count
+
+    cdef void* cursor
+    cdef void* obj
+    cdef char forward
+    cdef char finished
+    cdef char cinclusive
+    cdef Py_ssize_t climit
+    cdef size_t nkeys
+    cdef size_t nstop
+    cdef char **ckeys
+    cdef char *key_bytes
+    cdef char *key_reverse
+    cdef char **stop_str
+    cdef int *stop_size
+    cdef int64_t *stop_int
+    cdef list __refs
+    cdef Document document
 
     def __raise_error(self):
         try:
@@ -657,79 +1372,698 @@ cdef class Cursor:
 
         raise SophiaError(error)
 
-    def __cinit__(self, Environment env, dict query, Database db):
+    def __cinit__(self, Environment env, dict query, Database db,
+                  *args, **kwargs):
         self.db = db
         self.env = env
         self.query = query
+        self.cursor = NULL
+        self.obj = NULL
+        self.finished = 0
+        self.count = 0
+        self.__refs = []
 
-    def __init__(self, Environment env, dict query, Database db):
+    def __init__(self, Environment env, dict query, Database db,
+                 tuple keys=(), tuple stop=None, inclusive=False,
+                 keys_only=False, limit=None):
         self.query.setdefault('order', '>=')
 
         if self.query['order'] not in ('>=', '<=', '>', '<'):
             raise ValueError('Invalid order')
 
-    def __iter__(self):
+        if limit is not None and limit < 0:
+            raise ValueError('Limit must be positive')
+
+        stop = stop or ()
+
+        if len(stop) > len(keys):
+            raise BadQuery('Stop bound has more values than key fields')
+
+        if keys_only and not keys:
+            raise BadQuery('Key fields required for keys only cursor')
+
+        self.keys = keys
+        self.stop = stop
+        self.inclusive = bool(inclusive)
+        self.keys_only = bool(keys_only)
+        self.limit = limit
+        self.cinclusive = 1 if inclusive else 0
+        self.forward = 1 if self.query['order'] in ('>=', '>') else 0
+        self.climit = -1 if limit is None else limit
+
+        self.nkeys = len(keys)
+        self.nstop = len(stop)
+
+        self.ckeys = <char**> calloc(self.nkeys + 1, sizeof(char*))
+        self.key_bytes = <char*> calloc(self.nkeys + 1, sizeof(char))
+        self.key_reverse = <char*> calloc(self.nkeys + 1, sizeof(char))
+        self.stop_str = <char**> calloc(self.nstop + 1, sizeof(char*))
+        self.stop_size = <int*> calloc(self.nstop + 1, sizeof(int))
+        self.stop_int = <int64_t*> calloc(self.nstop + 1, sizeof(int64_t))
+
+        if (self.ckeys == NULL or self.key_bytes == NULL or
+                self.key_reverse == NULL or self.stop_str == NULL or
+                self.stop_size == NULL or self.stop_int == NULL):
+            raise MemoryError
+
+        for idx, item in enumerate(keys):
+            name, is_bytes, is_reverse = item
+
+            self.ckeys[idx] = self.db.key(name)
+            self.key_bytes[idx] = 1 if is_bytes else 0
+            self.key_reverse[idx] = 1 if is_reverse else 0
+
+        for idx, value in enumerate(stop):
+            if self.key_bytes[idx]:
+                if not isinstance(value, bytes):
+                    raise BadQuery(
+                        'Bad stop value. Expected bytes got %r' % type(value)
+                    )
+
+                self.__refs.append(value)
+                self.stop_str[idx] = PyBytes_AS_STRING(value)
+                self.stop_size[idx] = PyBytes_GET_SIZE(value)
+            else:
+                self.stop_int[idx] = value
+
+    def __dealloc__(self):
+        self.close()
+
+        free(self.ckeys)
+        free(self.key_bytes)
+        free(self.key_reverse)
+        free(self.stop_str)
+        free(self.stop_size)
+        free(self.stop_int)
+
+    cdef int compare_stop(self, void *obj) noexcept nogil:
+        """ Compares the document key with the stop bound in the index
+        order. Only the key parts present in the bound are compared. """
+
+        cdef size_t i
+        cdef int result
+        cdef int nlen
+        cdef char *buf
+        cdef uint64_t a, b
+
+        for i in range(self.nstop):
+            if self.key_bytes[i]:
+                buf = <char*> sp_getstring(obj, self.ckeys[i], &nlen)
+                result = memcmp(
+                    buf, self.stop_str[i],
+                    nlen if nlen < self.stop_size[i] else self.stop_size[i]
+                )
+
+                if result == 0:
+                    result = nlen - self.stop_size[i]
+            else:
+                a = <uint64_t> sp_getint(obj, self.ckeys[i])
+                b = <uint64_t> self.stop_int[i]
+                result = (a > b) - (a < b)
+
+            if result != 0:
+                return -result if self.key_reverse[i] else result
+
+        return 0
+
+    cdef int advance(self) noexcept nogil:
+        """ Moves the cursor to the next document.
+
+        Returns 1 when ``self.obj`` points to the document in range,
+        0 when the cursor is exhausted. """
+
+        cdef int cmp
+
+        if self.finished:
+            return 0
+
+        if self.climit >= 0 and self.count >= self.climit:
+            self.finished = 1
+            return 0
+
+        self.obj = sp_get(self.cursor, self.obj)
+
+        if self.obj == NULL:
+            self.finished = 1
+            return 0
+
+        if self.nstop:
+            cmp = self.compare_stop(self.obj)
+
+            if not self.forward:
+                cmp = -cmp
+
+            if cmp > 0 or (cmp == 0 and not self.cinclusive):
+                self.finished = 1
+                return 0
+
+        self.count += 1
+        return 1
+
+    cdef tuple read_keys(self):
+        cdef size_t i
+        cdef int nlen
+        cdef char *buf
+
+        result = []
+
+        for i in range(self.nkeys):
+            if self.key_bytes[i]:
+                buf = <char*> sp_getstring(self.obj, self.ckeys[i], &nlen)
+                result.append(buf[:nlen])
+            else:
+                result.append(sp_getint(self.obj, self.ckeys[i]))
+
+        return tuple(result)
+
+    def fetch(self, Py_ssize_t size, tuple fields, columnar=False):
+        """ Reads up to ``size`` documents in the one nogil loop.
+
+        ``fields`` is a tuple of ``(name, is_bytes, typecode)`` triples.
+        Returns a list of tuples of the raw field values or, when
+        ``columnar`` is set, a list of columns. Integer columns with
+        the ``typecode`` are returned as ``array.array``.
+        """
+        if size < 0:
+            raise ValueError('Size must be positive')
+
+        self.open()
+
+        cdef size_t nfields = len(fields)
+        cdef size_t i, j, pos
+        cdef Py_ssize_t rows = 0
+        cdef int nlen
+        cdef char *buf
+        cdef char *tmp
+        cdef size_t used = 0
+        cdef size_t capacity = 4096
+        cdef char failed = 0
+
+        cdef char **ckeys = <char**> calloc(nfields + 1, sizeof(char*))
+        cdef char *is_bytes = <char*> calloc(nfields + 1, sizeof(char))
+        cdef int64_t *numbers = <int64_t*> calloc(
+            size * nfields + 1, sizeof(int64_t)
+        )
+        cdef int *lengths = <int*> calloc(size * nfields + 1, sizeof(int))
+        cdef char *data = <char*> malloc(capacity)
+
+        try:
+            if (ckeys == NULL or is_bytes == NULL or numbers == NULL or
+                    lengths == NULL or data == NULL):
+                raise MemoryError
+
+            for j in range(nfields):
+                ckeys[j] = self.db.key(fields[j][0])
+                is_bytes[j] = 1 if fields[j][1] else 0
+
+            with nogil:
+                while rows < size and not failed and self.advance():
+                    for j in range(nfields):
+                        # column-major layout, so columns are contiguous
+                        pos = j * size + rows
+
+                        if not is_bytes[j]:
+                            numbers[pos] = sp_getint(self.obj, ckeys[j])
+                            continue
+
+                        nlen = 0
+                        buf = <char*> sp_getstring(self.obj, ckeys[j], &nlen)
+
+                        if used + nlen > capacity:
+                            while used + nlen > capacity:
+                                capacity *= 2
+
+                            tmp = <char*> realloc(data, capacity)
+
+                            if tmp == NULL:
+                                failed = 1
+                                break
+
+                            data = tmp
+
+                        if nlen > 0:
+                            memcpy(data + used, buf, nlen)
+
+                        lengths[pos] = nlen
+                        numbers[pos] = used
+                        used += nlen
+
+                    rows += 1
+
+            if failed:
+                raise MemoryError
+
+            columns = []
+
+            for j in range(nfields):
+                pos = j * size
+
+                if is_bytes[j]:
+                    column = []
+
+                    for i in range(rows):
+                        used = numbers[pos + i]
+                        column.append(data[used:used + lengths[pos + i]])
+                elif columnar and fields[j][2]:
+                    column = array(fields[j][2])
+                    column.frombytes(
+                        (<char*> (numbers + pos))[:rows * sizeof(int64_t)]
+                    )
+                else:
+                    column = [numbers[pos + i] for i in range(rows)]
+
+                columns.append(column)
+
+            if self.finished:
+                self.close()
+
+            if columnar:
+                return columns
+
+            return list(zip(*columns)) if columns else [()] * rows
+        finally:
+            free(ckeys)
+            free(is_bytes)
+            free(numbers)
+            free(lengths)
+            free(data)
+
+    def open(self):
+        if self.cursor != NULL or self.finished:
+            return
+
         document = Document(self.db, external=True)
 
         cdef void* obj
+
         with nogil:
             obj = sp_document(self.db.db)
 
         if obj == NULL:
             self.__raise_error()
 
-        cdef void* cursor
-
-        with nogil:
-            cursor = sp_cursor(self.env.env)
-
-        if not cursor:
-            self.__raise_error()
-
         document.obj = obj
 
         for key, value in self.query.items():
             if not isinstance(key, str):
+                document.obj = NULL
+                sp_destroy(obj)
                 raise BadQuery("Bad key. Key must be str %r %r" % (
                     key, type(key)
                 ))
 
-            if isinstance(value, int):
-                document.set_int(key, value)
-            elif isinstance(value, bytes):
-                document.set_string(key, value)
-            elif isinstance(value, str):
-                document.set_string(key, value.encode())
-            else:
-                raise BadQuery(
-                    "Bad value. Value must be bytes or int not %r %r" % (
-                        value, type(value)
+            try:
+                if isinstance(value, int):
+                    document.set_int(key, value)
+                elif isinstance(value, bytes):
+                    document.set_string(key, value)
+                elif isinstance(value, str):
+                    document.set_string(key, value.encode())
+                else:
+                    raise BadQuery(
+                        "Bad value. Value must be bytes or int not %r %r" % (
+                            value, type(value)
+                        )
                     )
-                )
+            except Exception:
+                document.obj = NULL
+                sp_destroy(obj)
+                raise
+
+        with nogil:
+            self.cursor = sp_cursor(self.env.env)
+
+        if self.cursor == NULL:
+            document.obj = NULL
+            sp_destroy(obj)
+            self.__raise_error()
+
+        # Keeps query values alive until the first sp_get call
+        self.document = document
+        self.obj = obj
+        document.obj = NULL
+
+    def close(self):
+        with nogil:
+            if self.obj != NULL:
+                sp_destroy(self.obj)
+
+            if self.cursor != NULL:
+                sp_destroy(self.cursor)
+
+        self.obj = NULL
+        self.cursor = NULL
+        self.finished = 1
+
+    def __iter__(self):
+        self.open()
+
+        cdef int rc
+        document = Document(self.db, external=True, readonly=True)
 
         try:
             while True:
                 with nogil:
-                    obj = sp_get(cursor, obj)
+                    rc = self.advance()
 
-                if obj == NULL:
-                    raise StopIteration
+                if not rc:
+                    break
+
+                if self.keys_only:
+                    yield self.read_keys()
                 else:
-                    document.obj = obj
+                    document.obj = self.obj
                     yield document
                     document.obj = NULL
         finally:
-            if cursor != NULL:
-                with nogil:
-                    sp_destroy(cursor)
+            document.obj = NULL
+            self.close()
+
+
+cdef struct field_slot:
+    size_t idx
+    char *ptr
+    int size
+    int64_t number
+
+
+cdef enum:
+    # the schemas with more fields allocate the slots on the heap
+    STACK_FIELDS = 16
+
+
+cdef class Codec:
+    """ Field table of the schema with the pre-encoded C key strings.
+
+    ``fields`` is a tuple of ``(name, is_bytes)`` pairs. Values are
+    the native ones (bytes or int), the conversion from and to the python
+    types is the schema business.
+    """
+
+    cdef readonly tuple names
+    cdef readonly dict positions
+    cdef size_t count
+    cdef char **ckeys
+    cdef char *is_bytes
+    cdef char *is_view
+    cdef list __keys
+
+    def __cinit__(self, tuple fields, tuple views=()):
+        self.count = len(fields)
+        self.ckeys = <char**> calloc(self.count or 1, sizeof(char*))
+        self.is_bytes = <char*> calloc(self.count or 1, sizeof(char))
+        self.is_view = <char*> calloc(self.count or 1, sizeof(char))
+
+        if (self.ckeys == NULL or self.is_bytes == NULL or
+                self.is_view == NULL):
+            raise MemoryError
+
+        self.names = tuple(name for name, _ in fields)
+        self.positions = {name: idx for idx, name in enumerate(self.names)}
+        self.__keys = []
+
+        cdef cstring ckey
+
+        for idx, item in enumerate(fields):
+            name, is_bytes = item
+            ckey = cstring.from_string(name)
+
+            self.__keys.append(ckey)
+            self.ckeys[idx] = ckey.c_str
+            self.is_bytes[idx] = 1 if is_bytes else 0
+            self.is_view[idx] = 0
+
+        for idx in views:
+            if not 0 <= idx < self.count or not self.is_bytes[idx]:
+                raise ValueError('Field %r is not a bytes field' % (idx,))
+
+            self.is_view[idx] = 1
+
+    def __dealloc__(self):
+        free(self.ckeys)
+        free(self.is_bytes)
+        free(self.is_view)
+
+    def __len__(self):
+        return self.count
+
+    cdef bint views_allowed(self, Document document):
+        # only the result documents are never written or passed to
+        # the engine again, the cursor ones are reused by the next fetch
+        return document.readonly and not document.external
+
+    cdef check_writable(self, Document document):
+        if document.obj == NULL:
+            raise DocumentClosed
+
+        if document.readonly:
+            raise RuntimeError('read-only document')
+
+    def encode(self, Document document, tuple values,
+               tuple positions=None) -> int:
+        """ Writes the fields to the document in one native pass.
+
+        ``values`` are written to the fields with the ``positions``
+        indexes or to all fields in order when ``positions`` is None.
+        """
+        self.check_writable(document)
+
+        cdef size_t count = len(values)
+
+        if positions is None and count != self.count:
+            raise ValueError('Expected %d values got %d' % (
+                self.count, count
+            ))
+        elif positions is not None and count != len(positions):
+            raise ValueError('Values and positions length mismatch')
+
+        if count > self.count:
+            raise ValueError('Too many values')
+
+        cdef field_slot stack[STACK_FIELDS]
+        cdef field_slot *slots = stack
+        cdef size_t i, j
+        cdef int rc = 0
+
+        if count > STACK_FIELDS:
+            slots = <field_slot*> malloc(count * sizeof(field_slot))
+
+            if slots == NULL:
+                raise MemoryError
+
+        try:
+            for i in range(count):
+                if positions is None:
+                    j = i
+                else:
+                    j = positions[i]
+
+                    if j >= self.count:
+                        raise IndexError(j)
+
+                slots[i].idx = j
+                value = values[i]
+
+                if self.is_bytes[j]:
+                    if not isinstance(value, bytes):
+                        raise BadQuery(
+                            'Bad value. Expected bytes got %r' % type(value)
+                        )
+
+                    slots[i].ptr = PyBytes_AS_STRING(value)
+                    slots[i].size = PyBytes_GET_SIZE(value)
+                else:
+                    slots[i].number = value
+
+            with nogil:
+                for i in range(count):
+                    j = slots[i].idx
+
+                    if self.is_bytes[j]:
+                        rc = sp_setstring(
+                            document.obj, self.ckeys[j],
+                            slots[i].ptr, slots[i].size
+                        )
+                    else:
+                        rc = sp_setint(
+                            document.obj, self.ckeys[j], slots[i].number
+                        )
+
+                    if rc == -1:
+                        break
+
+            for i in range(count):
+                j = slots[i].idx
+
+                if self.is_bytes[j]:
+                    document.pin(self.names[j], values[i])
+        finally:
+            if slots != stack:
+                free(slots)
+
+        if rc == -1:
+            raise document.db.env.last_error(rc)
+
+        return rc
+
+    def set(self, Document document, Py_ssize_t pos, value) -> int:
+        self.check_writable(document)
+
+        cdef int rc
+        cdef char *ptr
+        cdef int size
+        cdef int64_t number
+
+        if pos < 0 or pos >= <Py_ssize_t> self.count:
+            raise IndexError(pos)
+
+        if self.is_bytes[pos]:
+            if not isinstance(value, bytes):
+                raise BadQuery(
+                    'Bad value. Expected bytes got %r' % type(value)
+                )
+
+            ptr = PyBytes_AS_STRING(value)
+            size = PyBytes_GET_SIZE(value)
+
+            with nogil:
+                rc = sp_setstring(document.obj, self.ckeys[pos], ptr, size)
+
+            document.pin(self.names[pos], value)
+        else:
+            number = value
+
+            with nogil:
+                rc = sp_setint(document.obj, self.ckeys[pos], number)
+
+        if rc == -1:
+            raise document.db.env.last_error(rc)
+
+        return rc
+
+    def get(self, Document document, Py_ssize_t pos):
+        """ Returns the native field value or None when it's not set """
+        if document.obj == NULL:
+            raise DocumentClosed
+
+        if pos < 0 or pos >= <Py_ssize_t> self.count:
+            raise IndexError(pos)
+
+        cdef char *buf
+        cdef int nlen = 0
+
+        if not self.is_bytes[pos]:
+            return sp_getint(document.obj, self.ckeys[pos])
+
+        buf = <char*> sp_getstring(document.obj, self.ckeys[pos], &nlen)
+
+        if buf == NULL:
+            return None
+
+        if self.is_view[pos] and self.views_allowed(document):
+            return memoryview(DocumentBuffer.create(document, buf, nlen))
+
+        return buf[:nlen]
+
+    def decode(self, Document document) -> tuple:
+        """ Reads all fields of the document in one native pass.
+        Missing bytes fields are returned as None """
+
+        if document.obj == NULL:
+            raise DocumentClosed
+
+        cdef field_slot stack[STACK_FIELDS]
+        cdef field_slot *slots = stack
+        cdef size_t i
+        cdef bint views = self.views_allowed(document)
+
+        if self.count > STACK_FIELDS:
+            slots = <field_slot*> malloc(self.count * sizeof(field_slot))
+
+            if slots == NULL:
+                raise MemoryError
+
+        try:
+            with nogil:
+                for i in range(self.count):
+                    if self.is_bytes[i]:
+                        slots[i].size = 0
+                        slots[i].ptr = <char*> sp_getstring(
+                            document.obj, self.ckeys[i], &slots[i].size
+                        )
+                    else:
+                        slots[i].number = sp_getint(
+                            document.obj, self.ckeys[i]
+                        )
+
+            result = []
+
+            for i in range(self.count):
+                if not self.is_bytes[i]:
+                    result.append(slots[i].number)
+                elif slots[i].ptr == NULL:
+                    result.append(None)
+                elif views and self.is_view[i]:
+                    result.append(memoryview(DocumentBuffer.create(
+                        document, slots[i].ptr, slots[i].size
+                    )))
+                else:
+                    result.append(slots[i].ptr[:slots[i].size])
+        finally:
+            if slots != stack:
+                free(slots)
+
+        return tuple(result)
+
+
+cdef class DocumentBuffer:
+    """ Read-only buffer over the field value stored in the engine memory
+    of the result document. The buffer references the document, so the
+    engine object is alive until the last view is released. """
+
+    cdef readonly Document document
+    cdef char *ptr
+    cdef Py_ssize_t size
+
+    @staticmethod
+    cdef DocumentBuffer create(Document document, char *ptr, int size):
+        cdef DocumentBuffer result = DocumentBuffer.__new__(DocumentBuffer)
+        result.document = document
+        result.ptr = ptr
+        result.size = size
+        document.exports += 1
+        return result
+
+    def __dealloc__(self):
+        if self.document is not None:
+            self.document.exports -= 1
+
+    def __len__(self):
+        return self.size
+
+    def __getbuffer__(self, Py_buffer *buffer, int flags):
+        PyBuffer_FillInfo(buffer, self, self.ptr, self.size, 1, flags)
+
+    def __releasebuffer__(self, Py_buffer *buffer):
+        pass
+
+
+cdef int check_exports(Document document) except -1:
+    # the engine frees the document passed to set/get/delete
+    if document.exports:
+        raise BufferError(
+            'Document is referenced by %d field views' % document.exports
+        )
+    return 0
 
 
 cdef class Document:
     cdef void* obj
     cdef readonly Database db
     cdef char external
-    cdef readonly list __refs
+    cdef dict __refs
     cdef readonly bool readonly
+    cdef readonly Py_ssize_t exports
 
     def __check_closed(self):
         if self.closed:
@@ -741,7 +2075,7 @@ cdef class Document:
     def __cinit__(self, Database db, external=False, readonly=False):
         self.db = db
         self.external = 1 if external else 0
-        self.__refs = []
+        self.__refs = {}
         self.readonly = readonly
 
         if not self.external:
@@ -756,13 +2090,21 @@ cdef class Document:
             with nogil:
                 sp_destroy(self.obj)
 
-        self.__refs[:] = []
+        if self.__refs is not None:
+            self.__refs.clear()
+
         self.obj = NULL
 
     @property
     def closed(self) -> bool:
         return self.obj == NULL
 
+    cdef pin(self, str key, value):
+        # the engine keeps pointers to the values until the document is
+        # written, so the python objects must be alive until then.
+        # Rewritten field releases the previous value.
+        self.__refs[key] = value
+
     def __check_error(self, int rc):
         if rc != -1:
             return
@@ -782,11 +2124,10 @@ cdef class Document:
 
         cdef char* buf
         cdef int nlen
-        cdef bytes bkey
-        cdef cstring ckey = cstring.from_string(key)
+        cdef char* ckey = self.db.key(key)
 
         with nogil:
-            buf = <char *>sp_getstring(self.obj, ckey.c_str, &nlen)
+            buf = <char *>sp_getstring(self.obj, ckey, &nlen)
 
         if buf == NULL:
             raise KeyError('Key %r not found in the document' % key)
@@ -797,11 +2138,11 @@ cdef class Document:
     def get_int(self, str key) -> int:
         self.__check_closed()
 
-        cdef cstring ckey = cstring.from_string(key)
+        cdef char* ckey = self.db.key(key)
         cdef int64_t result
 
         with nogil:
-            result = sp_getint(self.obj, ckey.c_str)
+            result = sp_getint(self.obj, ckey)
 
         return result
 
@@ -812,15 +2153,15 @@ cdef class Document:
         self.__check_closed()
 
         cdef int rc
-        cdef cstring ckey = cstring.from_string(key)
-        cdef cstring cvalue = cstring(value)
+        cdef char* ckey = self.db.key(key)
+        cdef char* cvalue = PyBytes_AS_STRING(value)
+        cdef int size = PyBytes_GET_SIZE(value)
 
         with nogil:
-            rc = sp_setstring(self.obj, ckey.c_str, cvalue.c_str, cvalue.size)
+            rc = sp_setstring(self.obj, ckey, cvalue, size)
 
         self.__check_error(rc)
-        self.__refs.append(ckey)
-        self.__refs.append(cvalue)
+        self.pin(key, value)
         return rc
 
     def set_int(self, str key, int value) -> int:
@@ -830,10 +2171,10 @@ cdef class Document:
         self.__check_closed()
 
         cdef int rc
-        cdef cstring ckey = cstring.from_string(key)
+        cdef char* ckey = self.db.key(key)
         cdef int64_t cvalue = value
 
         with nogil:
-            rc = sp_setint(self.obj, ckey.c_str, cvalue)
+            rc = sp_setint(self.obj, ckey, cvalue)
 
         return self.__check_error(rc)
@@ -0,0 +1,205 @@
+import threading
+from collections import deque
+from concurrent.futures import Future
+from timeit import default_timer as clock
+
+from .document import Document
+
+
+class GroupCommitWriter(object):
+    """ Collects the writes of many threads and commits them by groups of
+    up to ``max_rows`` writes in a single transaction. A group is committed
+    when it's full or ``max_delay`` seconds after its first write, so every
+    write waits at most ``max_delay`` plus the commit time.
+
+    Each write returns the :class:`concurrent.futures.Future` resolved when
+    its group is committed (the commit is durable according to the
+    ``log.sync`` environment setting) or failed with the write or commit
+    error. Writes are applied in the submission order.
+    """
+
+    def __init__(self, db, max_rows=1000, max_delay=0.0005):
+        if max_rows <= 0:
+            raise ValueError('Max rows must be positive')
+
+        if max_delay < 0:
+            raise ValueError('Max delay must not be negative')
+
+        self.db = db
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+
+        # committed groups and writes
+        self.groups = 0
+        self.writes = 0
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._flush = False
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name='sonya-group-commit',
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        """ Number of the writes waiting for the commit """
+        return len(self._queue)
+
+    def _submit(self, method, document):
+        future = Future()
+        key = self.db.schema.codec.key(document.value)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Writer is closed')
+
+            self._queue.append((method, document, key, future))
+
+            if len(self._queue) == 1 or len(self._queue) >= self.max_rows:
+                self._condition.notify()
+
+        return future
+
+    def set(self, document):
+        if not isinstance(document, Document):
+            raise ValueError
+
+        return self._submit('set', document)
+
+    def upsert(self, **kwargs):
+        return self._submit('_upsert', self.db._upsert_document(kwargs))
+
+    def delete(self, **kwargs):
+        return self._submit('_delete', self.db.document(**kwargs))
+
+    def flush(self, timeout=None):
+        """ Commits the queued writes without waiting for ``max_delay``
+        and waits for them """
+        with self._condition:
+            if not self._queue:
+                return
+
+            last = self._queue[-1][-1]
+            self._flush = True
+            self._condition.notify()
+
+        try:
+            last.exception(timeout)
+        except Exception:
+            pass
+
+    def close(self, timeout=None):
+        """ Commits the queued writes and stops the writer thread """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _take(self):
+        """ Waits for the next group, returns None when closed """
+        with self._condition:
+            while not self._queue:
+                if self._closed:
+                    return None
+
+                self._condition.wait()
+
+            deadline = clock() + self.max_delay
+
+            while (
+                len(self._queue) < self.max_rows and
+                not (self._flush or self._closed)
+            ):
+                remaining = deadline - clock()
+
+                if remaining <= 0:
+                    break
+
+                self._condition.wait(remaining)
+
+            group = []
+            written = set()
+            upserted = set()
+
+            # the engine allows no other statements on the upserted key
+            # within the transaction, such a write opens the next group
+            while self._queue and len(group) < self.max_rows:
+                method, document, key, future = self._queue[0]
+
+                if key in upserted:
+                    break
+
+                if method == '_upsert':
+                    if key in written:
+                        break
+
+                    upserted.add(key)
+
+                written.add(key)
+
+                group.append(self._queue.popleft())
+
+            if not self._queue:
+                self._flush = False
+
+            return group
+
+    def _commit(self, group):
+        tx = self.db.transaction()
+        applied = []
+
+        for method, document, _, future in group:
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                getattr(tx, method)(document)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+
+            applied.append(future)
+
+        try:
+            tx.commit()
+        except Exception as e:
+            for future in applied:
+                future.set_exception(e)
+            return
+
+        self.groups += 1
+        self.writes += len(applied)
+
+        for future in applied:
+            future.set_result(None)
+
+    def _run(self):
+        while True:
+            group = self._take()
+
+            if group is None:
+                return
+
+            try:
+                self._commit(group)
+            except Exception as e:
+                for _, _, _, future in group:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+__all__ = ('GroupCommitWriter',)
@@ -0,0 +1,27 @@
+from concurrent.futures import Future
+
+from .db import Database
+from .document import Document
+
+
+class GroupCommitWriter(object):
+    db = ...            # type: Database
+    max_rows = ...      # type: int
+    max_delay = ...     # type: float
+    groups = ...        # type: int
+    writes = ...        # type: int
+
+    def __init__(self, db: Database, max_rows: int = 1000,
+                 max_delay: float = 0.0005): ...
+
+    @property
+    def closed(self) -> bool: ...
+
+    def __len__(self) -> int: ...
+    def set(self, document: Document) -> Future: ...
+    def upsert(self, **kwargs) -> Future: ...
+    def delete(self, **kwargs) -> Future: ...
+    def flush(self, timeout: float = None): ...
+    def close(self, timeout: float = None): ...
+    def __enter__(self) -> 'GroupCommitWriter': ...
+    def __exit__(self, exc_type, exc_val, exc_tb): ...
@@ -1,3 +1,5 @@
+import sys
+
 import pytest
 
 try:
@@ -8,6 +10,11 @@ except ImportError:
 from sonya import Schema, Environment, fields
 
 
+if sys.version_info < (3, 5):
+    # sonya.aio is not installed without the async/await syntax
+    collect_ignore = ['test_aio.py']
+
+
 @pytest.fixture()
 def sonya_env():
     with TemporaryDirectory() as env_path:
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from sonya import fields, Schema
+from sonya.aio import AsyncEnvironment
+
+
+class KeyValueSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    value = fields.StringField()
+
+
+@pytest.fixture()
+def loop():
+    loop = asyncio.new_event_loop()
+
+    try:
+        yield loop
+    finally:
+        loop.close()
+
+
+@pytest.fixture()
+def aio_env(loop, tmp_path):
+    env = AsyncEnvironment(str(tmp_path), max_workers=2, loop=loop)
+
+    try:
+        yield env
+    finally:
+        loop.run_until_complete(env.close())
+
+
+def test_get_set(loop, aio_env):
+    db = aio_env.database('kv', KeyValueSchema())
+
+    async def run():
+        await aio_env.open()
+        await db.set(db.document(key=1, value='one'))
+
+        doc = await db.get(key=1)
+        assert doc['value'] == 'one'
+
+        with pytest.raises(LookupError):
+            await db.get(key=2)
+
+        await db.delete(key=1)
+        assert await db.count(exact=True) == 0
+
+    loop.run_until_complete(run())
+
+
+def test_coalesced_get(loop, aio_env):
+    db = aio_env.database('kv', KeyValueSchema(), batch_size=16)
+    calls = []
+
+    async def run():
+        await aio_env.open()
+        await db.set_many((i, str(i)) for i in range(100))
+
+        get_batch = db._get_batch
+
+        def counted(queries):
+            calls.append(len(queries))
+            return get_batch(queries)
+
+        db._get_batch = counted
+
+        docs = await asyncio.gather(*[db.get(key=i) for i in range(100)])
+        assert [doc['value'] for doc in docs] == [str(i) for i in range(100)]
+
+        results = await asyncio.gather(
+            db.get(key=1), db.get(key=1000), return_exceptions=True
+        )
+
+        assert results[0]['value'] == '1'
+        assert isinstance(results[1], LookupError)
+
+    loop.run_until_complete(run())
+    assert calls == [16] * 6 + [4, 2]
+
+
+def test_transaction_and_cursor(loop, aio_env):
+    db = aio_env.database('kv', KeyValueSchema())
+
+    async def run():
+        await aio_env.open()
+
+        async with db.transaction() as tx:
+            for i in range(10):
+                await tx.set(db.document(key=i, value=str(i)))
+
+        keys = [doc['key'] async for doc in db.cursor(batch_size=3)]
+        assert keys == list(range(10))
+
+        cursor = db.cursor(key=5)
+        assert await cursor.fetchmany(2) == [(5, '5'), (6, '6')]
+
+    loop.run_until_complete(run())
@@ -0,0 +1,123 @@
+import json
+import os
+from contextlib import contextmanager
+
+import pytest
+
+from sonya import Environment, Schema, fields
+from sonya.bulk import load, read_marker
+
+
+class ItemSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    name = fields.StringField()
+
+
+def items(count, start=0):
+    return [{'key': i, 'name': 'item-%d' % i} for i in range(start, count)]
+
+
+@pytest.fixture()
+def items_db(sonya_env):
+    db = sonya_env.database('items', ItemSchema())
+    sonya_env.open()
+    return db
+
+
+@contextmanager
+def reopened(env):
+    """ Database read from the disk by the new environment """
+    env.close()
+    other = Environment(env.path)
+    db = other.database('items', ItemSchema())
+    other.open()
+
+    try:
+        yield db
+    finally:
+        other.close()
+        env.open()
+
+
+def test_load(items_db, sonya_env):
+    loaded = []
+    result = load(
+        items_db, items(2500) + [{'key': 'broken'}], batch_size=1000,
+        progress=lambda count: loaded.append(
+            (count, sonya_env['log.enable'])
+        ),
+    )
+
+    assert result.count == 2500
+    assert [idx for idx, _ in result.errors] == [2500]
+    assert loaded == [(1000, 0), (2000, 0), (2500, 0)]
+
+    # the log is enabled again
+    assert sonya_env['log.enable'] == 1
+    assert items_db.get(key=2499)['name'] == 'item-2499'
+
+    with reopened(sonya_env) as db:
+        assert db.count(exact=True) == 2500
+
+
+def test_load_unsorted(items_db):
+    rows = items(100)[::-1]
+    result = load(items_db, rows, sorted=False, batch_size=30, wal=True)
+
+    assert result.count == 100
+    assert [doc['key'] for doc in items_db.cursor()] == list(range(100))
+
+
+def test_load_files(items_db, tmpdir):
+    path = str(tmpdir.join('items.ndjson'))
+
+    with open(path, 'w') as fp:
+        for row in items(50):
+            fp.write(json.dumps(row) + '\n')
+
+        fp.write('\n')
+
+    assert load(items_db, path).count == 50
+    assert items_db.get(key=49)['name'] == 'item-49'
+
+    msgpack = pytest.importorskip('msgpack')
+    path = str(tmpdir.join('items.bin'))
+
+    with open(path, 'wb') as fp:
+        for row in items(80, 50):
+            fp.write(msgpack.packb(row, use_bin_type=True))
+
+    assert load(items_db, path, format='msgpack').count == 30
+    assert items_db.count(exact=True) == 80
+
+    with pytest.raises(ValueError):
+        load(items_db, str(tmpdir.join('items.csv')))
+
+
+def test_resume(items_db, sonya_env, tmpdir):
+    marker = str(tmpdir.join('marker.json'))
+
+    def interrupted():
+        for idx, row in enumerate(items(1000)):
+            if idx == 750:
+                raise KeyboardInterrupt
+
+            yield row
+
+    with pytest.raises(KeyboardInterrupt):
+        load(
+            items_db, interrupted(), batch_size=100, checkpoint_every=200,
+            resume=marker,
+        )
+
+    assert read_marker(marker) == 600
+    assert sonya_env['log.enable'] == 1
+
+    result = load(items_db, items(1000), batch_size=100, resume=marker)
+
+    assert result.skipped == 600
+    assert result.count == 400
+    assert not os.path.exists(marker)
+
+    with reopened(sonya_env) as db:
+        assert db.count(exact=True) == 1000
@@ -0,0 +1,102 @@
+import pytest
+
+from sonya import fields, Schema
+from sonya.cache import LRUCache
+from sonya.document import CachedDocument
+
+
+class KeyValueSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    value = fields.StringField()
+
+
+@pytest.fixture()
+def db(sonya_env):
+    db = sonya_env.database('kv', KeyValueSchema())
+    sonya_env.open()
+    return db
+
+
+def test_lru_bounds():
+    cache = LRUCache(max_entries=2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+
+    assert cache.get(1) == 'a'
+
+    cache.put(3, 'c')
+
+    assert 2 not in cache
+    assert cache.get(2) is None
+    assert cache.stats()[:4] == (1, 1, 1, 2)
+
+    cache = LRUCache(max_bytes=10)
+    cache.put(1, 'a', 6)
+    cache.put(2, 'b', 6)
+    cache.put(3, 'c', 11)
+
+    assert len(cache) == 1
+    assert cache.stats().bytes == 6
+
+    with pytest.raises(ValueError):
+        LRUCache()
+
+
+def test_generation(db):
+    cache = db.enable_cache(max_entries=100)
+    db.set(db.document(key=1, value='one'))
+
+    # the value read before the concurrent write is not cached
+    generation = cache.generation
+    db.set(db.document(key=1, value='uno'))
+    cache.put((1,), {'key': 1, 'value': 'one'}, generation=generation)
+
+    assert (1,) not in cache
+    assert db.get(key=1)['value'] == 'uno'
+    assert (1,) in cache
+
+    generation = cache.generation
+    db.delete(key=1)
+    assert cache.generation > generation
+    assert (1,) not in cache
+
+
+def test_read_through(db):
+    cache = db.enable_cache(max_entries=100)
+    db.set(db.document(key=1, value='one'))
+
+    doc = db.get(key=1)
+    assert isinstance(doc, CachedDocument)
+    assert doc['value'] == 'one'
+    assert db.get(key=1)['value'] == 'one'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    with pytest.raises(LookupError):
+        db.get(key=2)
+
+    db.set(db.document(key=1, value='uno'))
+    assert db.get(key=1)['value'] == 'uno'
+
+    db.set_many([(1, 'eins'), (2, 'zwei')])
+    docs = db.get_many([1, 2, 3])
+
+    assert [doc and doc['value'] for doc in docs] == ['eins', 'zwei', None]
+    assert len(cache) == 2
+
+    db.delete(key=2)
+
+    with pytest.raises(LookupError):
+        db.get(key=2)
+
+    with db.transaction() as tx:
+        tx.set(db.document(key=1, value='один'))
+        assert db.get(key=1)['value'] == 'eins'
+
+    assert db.get(key=1)['value'] == 'один'
+
+    db.delete_many(order='>=')
+    assert len(cache) == 0
+
+    db.disable_cache()
+    db.set(db.document(key=1, value='one'))
+    assert not isinstance(db.get(key=1), CachedDocument)
@@ -1,3 +1,5 @@
+import pytest
+
 from sonya import Database
 
 
@@ -13,3 +15,31 @@ def test_status(bytes_db):
     :type bytes_db: Database
     """
     assert bytes_db.environment['sophia.status'] == 'online'
+
+
+def test_direct_lookup(sonya_env):
+    assert sonya_env.get_string('sophia.version') == '2.2'
+    assert sonya_env.get_int('scheduler.threads') > 0
+    assert sonya_env['backup.path'] == ''
+
+    with pytest.raises(TypeError):
+        sonya_env.get_int('sophia.version')
+
+    with pytest.raises(TypeError):
+        sonya_env.get_string('scheduler.threads')
+
+    with pytest.raises(KeyError):
+        sonya_env['sophia.unknown_key']
+
+
+def test_cached_config(sonya_env):
+    config = sonya_env.config()
+
+    assert config is sonya_env.config()
+    assert config['sophia.version'] == '2.2'
+    assert isinstance(config['scheduler.threads'], int)
+
+    for key in ('sophia.version', 'scheduler.threads', 'sophia.path'):
+        assert sonya_env[key] == config[key]
+
+    assert sonya_env.config(refresh=True) is not config
@@ -0,0 +1,100 @@
+import pytest
+
+from sonya import Schema, fields
+
+
+class PeopleSchema(Schema):
+    name = fields.StringField(index=0)
+    age = fields.UInt8Field(secondary=True)
+    city = fields.StringField(secondary=True)
+    visits = fields.UInt32Field(merge='add')
+
+
+@pytest.fixture()
+def people(sonya_env):
+    db = sonya_env.database('people', PeopleSchema())
+    sonya_env.open()
+
+    db.set_many([
+        {'name': 'alice', 'age': 30, 'city': 'Paris'},
+        {'name': 'bob', 'age': 25, 'city': 'Berlin'},
+        {'name': 'carol', 'age': 30, 'city': 'Berlin'},
+        {'name': 'dave', 'age': 41, 'city': 'Rome'},
+    ])
+
+    return db
+
+
+def names(documents):
+    return [doc['name'] for doc in documents]
+
+
+def test_find_by(people):
+    assert sorted(people.indexes) == ['age', 'city']
+    assert names(people.find_by(age=30)) == ['alice', 'carol']
+    assert names(people.find_by(city='Berlin')) == ['bob', 'carol']
+    assert names(people.find_by(age=99)) == []
+    assert names(people.find_by(age=30, limit=1)) == ['alice']
+
+    with pytest.raises(KeyError):
+        list(people.find_by(name='alice'))
+
+
+def test_scan_by(people):
+    assert names(people.scan_by('age', 26, 41)) == ['alice', 'carol', 'dave']
+    assert names(
+        people.scan_by('age', 26, 41, inclusive=False)
+    ) == ['alice', 'carol']
+    assert names(people.scan_by('age', batch_size=1)) == [
+        'bob', 'alice', 'carol', 'dave'
+    ]
+
+
+def test_index_maintenance(people):
+    people.set(people.document(name='alice', age=26, city='Paris'))
+    people.upsert(name='bob', age=50, city='Oslo', visits=1)
+    people.delete(name='carol')
+
+    assert names(people.find_by(age=30)) == []
+    assert names(people.find_by(age=26)) == ['alice']
+    assert names(people.find_by(city='Berlin')) == []
+    assert names(people.find_by(city='Oslo')) == ['bob']
+    assert people.get(name='bob')['visits'] == 1
+
+    # the index is not left with the stale entries
+    assert len(list(people.indexes['age'].db)) == 3
+
+    assert people.delete_many(batch_size=1) == 3
+    assert names(people.scan_by('age')) == []
+    assert len(list(people.indexes['city'].db)) == 0
+
+
+def test_index_transaction(people):
+    with people.transaction() as tx:
+        tx.set(people.document(name='erin', age=30, city='Rome'))
+        tx.delete(name='alice')
+
+    assert names(people.find_by(age=30)) == ['carol', 'erin']
+
+    with pytest.raises(RuntimeError):
+        with people.transaction() as tx:
+            tx.set_many([{'name': 'frank', 'age': 30, 'city': 'Rome'}])
+            raise RuntimeError
+
+    assert names(people.find_by(age=30)) == ['carol', 'erin']
+
+
+def test_rebuild_indexes(people):
+    people.indexes['age'].db.delete_many()
+    assert names(people.find_by(age=30)) == []
+
+    assert people.rebuild_indexes() == 4
+    assert names(people.find_by(age=30)) == ['alice', 'carol']
+
+
+def test_secondary_validation():
+    with pytest.raises(ValueError):
+        fields.UInt8Field(index=0, secondary=True)
+
+    with pytest.raises(ValueError):
+        fields.UInt8Field(merge='add', secondary=True)
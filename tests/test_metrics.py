@@ -0,0 +1,49 @@
+import pytest
+
+from sonya import fields, metrics, Schema
+
+
+class SequenceSchema(Schema):
+    key = fields.UInt32Field(index=0)
+
+
+@pytest.fixture()
+def sequence(sonya_env):
+    db = sonya_env.database('sequence', SequenceSchema())
+    sonya_env.open()
+    return db
+
+
+def test_snapshot(sonya_env, sequence):
+    before = metrics.snapshot(sonya_env)
+    stats = before.databases['sequence']
+
+    assert stats.set == 0
+    assert stats.cache_hit_ratio is None
+    assert isinstance(stats.get_latency, metrics.Histogram)
+
+    sequence.set_many((i,) for i in range(10))
+    sequence.get(key=1)
+
+    after = metrics.snapshot(sonya_env)
+    diff = after - before
+    stats = diff.databases['sequence']
+
+    assert stats.set == 10
+    assert stats.get == 1
+    assert stats.count == 10
+    assert diff.time >= 0
+    assert diff.lsn == 10
+    assert after.databases['sequence'].cache_hit_ratio == 1.0
+
+
+def test_prometheus(sonya_env, sequence):
+    sequence.set(sequence.document(key=1))
+    text = metrics.to_prometheus(metrics.snapshot(sonya_env))
+
+    assert '# TYPE sophia_set_total counter\n' in text
+    assert 'sophia_set_total{db="sequence"} 1\n' in text
+    assert 'sophia_count{db="sequence"} 1\n' in text
+    assert 'sophia_get_latency{db="sequence",stat="avg"} 0.0\n' in text
+    assert '# TYPE sophia_tx_commit_total counter\n' in text
+    assert text.count('# TYPE sophia_set_total') == 1
@@ -0,0 +1,68 @@
+import pytest
+
+from sonya import DatabaseOptions, Environment, EnvironmentOptions, Schema
+from sonya import fields
+
+
+class KeySchema(Schema):
+    key = fields.UInt32Field(index=0)
+
+
+def test_validation():
+    with pytest.raises(ValueError):
+        DatabaseOptions(compression='gzip')
+
+    with pytest.raises(TypeError):
+        DatabaseOptions(page_size='64k')
+
+    with pytest.raises(TypeError):
+        DatabaseOptions(amqf=True)
+
+    with pytest.raises(ValueError):
+        DatabaseOptions(page_size=1024 * 1024, node_size=1024)
+
+    with pytest.raises(ValueError):
+        DatabaseOptions(preset='fast')
+
+    with pytest.raises(ValueError):
+        EnvironmentOptions(scheduler_threads=-1)
+
+
+def test_presets():
+    options = DatabaseOptions('read-heavy', page_size=32 * 1024)
+
+    assert options.compression == 'lz4'
+    assert options.page_size == 32 * 1024
+    assert options.sync is None
+    assert dict(options.items('db.test.'))['db.test.mmap'] == 1
+    assert DatabaseOptions.create('read-heavy') == DatabaseOptions(
+        'read-heavy'
+    )
+
+
+def test_read_back(sonya_env):
+    db = sonya_env.database(
+        'options', KeySchema(), options='low-memory', direct_io=False,
+    )
+
+    assert db.options.compression == 'zstd'
+
+    effective = db.effective_options
+    assert effective.compression == 'zstd'
+    assert effective.mmap is False
+    assert effective.cache == 256 * 1024 * 1024
+    assert effective.sync is True
+
+    sonya_env.open()
+    assert db.effective_options == effective
+
+
+def test_environment_options(tmpdir):
+    env = Environment(str(tmpdir), options='write-heavy', scheduler_threads=0)
+
+    try:
+        assert env.effective_options.scheduler_threads == 0
+        assert env.effective_options.log_sync is False
+        assert env.effective_options.log_rotate_wm == 1000000
+    finally:
+        env.close()
@@ -0,0 +1,112 @@
+import operator
+import threading
+
+import pytest
+
+from sonya import Schema, fields
+from sonya.parallel import interpolate, sample_boundaries
+
+
+class NumbersSchema(Schema):
+    key = fields.UInt64Field(index=0)
+    value = fields.UInt32Field()
+
+
+class WordsSchema(Schema):
+    word = fields.StringField(index=0)
+    page = fields.UInt16ReverseField(index=1)
+
+
+@pytest.fixture()
+def numbers(sonya_env):
+    db = sonya_env.database('numbers', NumbersSchema())
+    sonya_env.open()
+    # skewed: most of the keys are in the beginning
+    db.set_many(
+        [(i, i % 100) for i in range(3000)] +
+        [(10 ** 9 + i, 1) for i in range(10)]
+    )
+    return db
+
+
+def keys(rows):
+    return [row[0] for row in rows]
+
+
+def test_interpolate():
+    assert interpolate(0, 100, 0.25) == 25
+    assert interpolate(100, 0, 0.25) == 75
+
+    value = interpolate(b'abc', b'abz', 0.5)
+    assert b'abc' < value < b'abz'
+    assert b'a' < interpolate(b'a', b'b', 0.5) < b'b'
+
+
+def test_boundaries(numbers):
+    boundaries = sample_boundaries(numbers, 8)
+
+    assert boundaries
+    assert boundaries == sorted(set(boundaries))
+    assert len(boundaries) < 8
+
+
+def test_empty(sonya_env):
+    db = sonya_env.database('empty', NumbersSchema())
+    sonya_env.open()
+
+    assert sample_boundaries(db, 8) == []
+    assert db.parallel_scan(len) == []
+
+
+def test_parallel_scan(numbers):
+    threads = set()
+
+    def total(rows):
+        threads.add(threading.current_thread().name)
+        return sum(value for _, value in rows)
+
+    expected = sum(i % 100 for i in range(3000)) + 10
+
+    assert numbers.parallel_scan(
+        total, workers=4, reducer=operator.add, batch_size=100,
+    ) == expected
+    assert numbers.parallel_scan(
+        total, workers=2, reducer=operator.add, initial=0, ordered=False,
+        partitions=32,
+    ) == expected
+    assert threads and threading.current_thread().name not in threads
+
+    ordered = numbers.parallel_scan(keys, workers=4, batch_size=64)
+    assert [key for batch in ordered for key in batch] == sorted(
+        key for key, _ in numbers.cursor().fetchmany(10000)
+    )
+
+    unordered = numbers.parallel_scan(
+        keys, workers=4, keys_only=True, ordered=False,
+    )
+    assert sorted(
+        key for batch in unordered for key in batch
+    ) == [key for batch in ordered for key in batch]
+
+    with pytest.raises(ValueError):
+        numbers.parallel_scan(len, workers=0)
+
+
+def test_composite_keys(sonya_env):
+    db = sonya_env.database('words', WordsSchema())
+    sonya_env.open()
+
+    rows = [
+        ('%s%03d' % (prefix, i), page)
+        for prefix in ('apple', 'kiwi', 'zebra')
+        for i in range(50)
+        for page in range(3)
+    ]
+    db.set_many(rows)
+
+    result = db.parallel_scan(
+        list, workers=3, reducer=operator.add, batch_size=7, keys_only=True,
+    )
+
+    assert len(result) == len(rows)
+    assert result == list(db.cursor(keys_only=True))
@@ -0,0 +1,151 @@
+import pytest
+
+from sonya import Schema, fields
+from sonya.retry import ConflictStats, backoff_delay
+from sonya.sophia import TransactionRollback
+
+
+class CounterSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    value = fields.UInt64Field()
+
+
+@pytest.fixture()
+def counters(sonya_env):
+    db = sonya_env.database('counters', CounterSchema())
+    sonya_env.open()
+    db.set(db.document(key=1, value=0))
+    return db
+
+
+def increment(tx, key=1):
+    value = tx.get(key=key)['value']
+    tx.set(tx.db.document(key=key, value=value + 1))
+    return value + 1
+
+
+def test_backoff_delay():
+    assert 0 <= backoff_delay(0, 0.001, 0.1) <= 0.001
+    assert 0 <= backoff_delay(3, 0.001, 0.1) <= 0.008
+    assert 0 <= backoff_delay(30, 0.001, 0.1) <= 0.1
+
+
+def test_run_in_transaction(counters):
+    assert counters.run_in_transaction(increment) == 1
+    assert counters.get(key=1)['value'] == 1
+
+    stats = counters.conflict_stats.snapshot()
+    assert stats.transactions == 1
+    assert stats.commits == 1
+    assert stats.retries == 0
+
+
+def test_conflict_retry(counters):
+    attempts = []
+
+    def conflicting(tx):
+        attempts.append(tx)
+
+        if len(attempts) == 1:
+            # committed after the transaction began
+            counters.set(counters.document(key=1, value=10))
+
+        return increment(tx)
+
+    assert counters.run_in_transaction(conflicting, backoff=0.0001) == 11
+    assert len(attempts) == 2
+    assert counters.get(key=1)['value'] == 11
+
+    stats = counters.conflict_stats
+    assert stats.conflicts == 1
+    assert stats.retries == 1
+    assert stats.commits == 1
+    assert stats.conflict_ratio == 1
+    assert stats.hot_keys() == [((1,), 1)]
+
+
+def test_lock_retry(counters):
+    holders = []
+
+    def locked(tx):
+        if not holders:
+            holder = counters.transaction()
+            holder.set(counters.document(key=1, value=5))
+            holders.append(holder)
+        elif not holders[0].tx.closed:
+            # committed after the second attempt began, so it conflicts
+            holders[0].commit()
+
+        return increment(tx)
+
+    counters.run_in_transaction(locked, backoff=0.0001)
+
+    stats = counters.conflict_stats.snapshot()
+    assert stats.locks == 1
+    assert stats.conflicts == 1
+    assert stats.retries == 2
+    assert stats.lock_wait > 0
+    assert counters.get(key=1)['value'] == 6
+
+
+def test_give_up(counters):
+    def always_conflicting(tx):
+        counters.set(counters.document(key=1, value=10))
+        return increment(tx)
+
+    with pytest.raises(TransactionRollback):
+        counters.run_in_transaction(
+            always_conflicting, retries=2, backoff=0.0001
+        )
+
+    stats = counters.conflict_stats.snapshot()
+    assert stats.conflicts == 3
+    assert stats.retries == 2
+    assert stats.failures == 1
+
+    with pytest.raises(ValueError):
+        counters.run_in_transaction(increment, retries=-1)
+
+
+def test_errors_are_not_retried(counters):
+    calls = []
+
+    def broken(tx):
+        calls.append(tx)
+        tx.set(counters.document(key=2, value=1))
+        raise ZeroDivisionError
+
+    with pytest.raises(ZeroDivisionError):
+        counters.run_in_transaction(broken)
+
+    assert len(calls) == 1
+    assert calls[0].tx.closed
+
+    with pytest.raises(LookupError):
+        counters.get(key=2)
+
+
+def test_transactional(counters):
+    @counters.transactional(backoff=0.0001)
+    def add(tx, key, value):
+        tx.set(counters.document(key=key, value=value))
+        return key
+
+    assert add(2, value=20) == 2
+    assert counters.get(key=2)['value'] == 20
+    assert add.__name__ == 'add'
+
+
+def test_stats():
+    stats = ConflictStats(max_keys=4)
+
+    for key in range(1, 11):
+        stats.record(conflict=True, keys=[(key,), (0,)])
+
+    assert len(stats.hot_keys(100)) <= 4
+    assert stats.hot_keys(1) == [((0,), 10)]
+    assert stats.conflict_ratio is None
+
+    stats.reset()
+    assert stats.snapshot().conflicts == 0
+    assert 'conflicts=0' in repr(stats)
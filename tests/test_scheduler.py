@@ -0,0 +1,80 @@
+import os
+import time
+
+import pytest
+
+from sonya import fields, Schema
+
+
+class SequenceSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    value = fields.BytesField()
+
+
+@pytest.fixture()
+def sequence(sonya_env):
+    sonya_env['scheduler.threads'] = 0
+    db = sonya_env.database('sequence', SequenceSchema())
+    sonya_env.open()
+    db.set_many((i, os.urandom(64)) for i in range(1000))
+    return db
+
+
+def test_maintenance(sonya_env, sequence):
+    assert sonya_env.checkpoint() == 1
+    assert sonya_env.run_scheduler(100) > 0
+    assert sonya_env['db.sequence.index.node_count'] >= 1
+
+    assert sonya_env.gc(sequence) == 1
+    assert sonya_env.compact('sequence') == 1
+    sonya_env.run_scheduler(100)
+
+    assert sequence.count(exact=True) == 1000
+
+
+def test_backup(tmp_path):
+    from sonya import Environment
+
+    env = Environment(str(tmp_path / 'env'))
+    env.backup(str(tmp_path / 'backup'))
+    env['scheduler.threads'] = 0
+    db = env.database('sequence', SequenceSchema())
+    env.open()
+
+    try:
+        db.set_many((i, b'') for i in range(100))
+
+        with pytest.raises(RuntimeError):
+            env.backup(str(tmp_path / 'other'))
+
+        assert env.backup() is None
+        assert env.backup_active
+
+        while env.backup_active:
+            env.run_scheduler(10)
+
+        assert env['backup.last_complete'] == 1
+        assert env.backup(wait=True) == 2
+        assert sorted(os.listdir(str(tmp_path / 'backup'))) == ['1', '2']
+    finally:
+        env.close()
+
+
+def test_scheduler_worker(sonya_env, sequence):
+    worker = sonya_env.start_scheduler(rate=1000, idle_interval=0.01)
+
+    with pytest.raises(RuntimeError):
+        sonya_env.start_scheduler()
+
+    sonya_env.checkpoint()
+
+    deadline = time.time() + 5
+    while not worker.steps and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert worker.steps > 0
+
+    sonya_env.stop_scheduler()
+    assert worker.stopped
+    assert not worker.is_alive()
+    assert sonya_env.scheduler is None
@@ -0,0 +1,142 @@
+import os
+
+import pytest
+
+try:
+    from tempfile import TemporaryDirectory
+except ImportError:
+    from backports.tempfile import TemporaryDirectory
+
+from sonya import Schema, fields
+from sonya.sharding import HashPartitioner, RangePartitioner, ShardedDatabase
+
+
+class UserSchema(Schema):
+    group = fields.StringField(index=0)
+    id = fields.UInt32Field(index=1)
+    name = fields.StringField()
+
+
+class ReverseSchema(Schema):
+    key = fields.UInt32ReverseField(index=0)
+    value = fields.StringField()
+
+
+def rows(count):
+    return [
+        {'group': 'g%d' % (i % 7), 'id': i, 'name': 'user-%d' % i}
+        for i in range(count)
+    ]
+
+
+def keys(documents):
+    return [(doc['group'], doc['id']) for doc in documents]
+
+
+@pytest.fixture()
+def paths():
+    with TemporaryDirectory() as path:
+        yield [os.path.join(path, 'shard-%d' % i) for i in range(3)]
+
+
+@pytest.fixture(params=(False, True), ids=('local', 'processes'))
+def sharded(request, paths):
+    with ShardedDatabase(
+        paths, 'users', UserSchema(), processes=request.param
+    ) as db:
+        yield db
+
+
+def test_partitioners():
+    partitioner = HashPartitioner(4)
+    assert partitioner.shard((b'key', 1)) == partitioner.shard((b'key', 1))
+    assert {partitioner.shard((i,)) for i in range(100)} == {0, 1, 2, 3}
+
+    with pytest.raises(ValueError):
+        HashPartitioner(0)
+
+    partitioner = RangePartitioner(['h', 'p']).bind(UserSchema())
+    assert partitioner.count == 3
+    assert partitioner.shard((b'alice', 1)) == 0
+    assert partitioner.shard((b'h', 1)) == 1
+    assert partitioner.shard((b'zed', 1)) == 2
+
+    with pytest.raises(ValueError):
+        RangePartitioner(['p', 'h']).bind(UserSchema())
+
+
+def test_shard_count(paths):
+    with pytest.raises(ValueError):
+        ShardedDatabase(paths, 'users', UserSchema(), RangePartitioner(['a']))
+
+
+def test_crud(sharded):
+    result = sharded.set_many(rows(100) + [{'group': 'g0'}])
+    assert result.count == 100
+    assert [idx for idx, _ in result.errors] == [100]
+
+    assert len(sharded) == 100
+    assert all(len(shard.call('scan', '>=', {}, None, False, None))
+               for shard in sharded.shards)
+
+    assert sharded.get(group='g3', id=10)['name'] == 'user-10'
+
+    with pytest.raises(LookupError):
+        sharded.get(group='g3', id=11)
+
+    documents = sharded.get_many([('g3', 10), ('g0', 0), ('g0', 1)])
+    assert [doc and doc['id'] for doc in documents] == [10, 0, None]
+
+    sharded.set(group='g3', id=10, name='renamed')
+    assert sharded.get(group='g3', id=10)['name'] == 'renamed'
+
+    assert sharded.delete(group='g3', id=10) == 1
+    assert sharded.delete_many([('g0', 0), ('g1', 1)]) == 2
+    assert sharded.count(exact=True) == 97
+
+    with pytest.raises(LookupError):
+        sharded.get(group='g3', id=10)
+
+
+def test_cursor_order(sharded):
+    source = rows(200)
+    sharded.set_many(source)
+
+    expected = sorted(keys(source))
+    assert keys(sharded.cursor(batch_size=16)) == expected
+    assert keys(sharded.cursor(order='<=', batch_size=16)) == expected[::-1]
+    assert keys(sharded.cursor(limit=5)) == expected[:5]
+
+    assert keys(sharded.cursor(group='g3', id=0)) == [
+        key for key in expected if key >= ('g3', 0)
+    ]
+    assert keys(sharded.cursor(order='<', group='g3', id=0)) == [
+        key for key in expected if key < ('g3', 0)
+    ][::-1]
+
+
+def test_range_partitioner(paths):
+    partitioner = RangePartitioner(['g2', 'g5'])
+
+    with ShardedDatabase(paths, 'users', UserSchema(), partitioner) as db:
+        db.set_many(rows(70))
+
+        groups = [
+            {row['group'] for row in shard.call('scan', '>=', {}, None,
+                                                False, None)}
+            for shard in db.shards
+        ]
+
+        assert groups == [
+            {'g0', 'g1'}, {'g2', 'g3', 'g4'}, {'g5', 'g6'}
+        ]
+        assert keys(db.cursor()) == sorted(keys(rows(70)))
+
+
+def test_reverse_key_order(paths):
+    with ShardedDatabase(paths, 'reverse', ReverseSchema()) as db:
+        db.set_many([{'key': i, 'value': str(i)} for i in range(50)])
+
+        assert [doc['key'] for doc in db.cursor(batch_size=7)] == list(
+            range(49, -1, -1)
+        )
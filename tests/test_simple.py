@@ -1,3 +1,5 @@
+import sys
+import time
 import uuid
 from random import choice, randint
 
@@ -145,6 +147,18 @@ def test_length(users):
         )
 
 
+def test_stats(sequence):
+    sequence.set_many((i,) for i in range(100))
+    sequence.delete(key=0)
+
+    stats = sequence.stats()
+
+    # deletes are counted until the compaction
+    assert stats.count == sequence.count() == 101
+    assert stats.memory_used > 0
+    assert sequence.count(exact=True) == len(sequence) == 99
+
+
 def test_delete_many(sequence):
     for i in range(5000):
         sequence.set(sequence.document(key=i))
@@ -159,3 +173,465 @@ def test_delete_many(sequence):
     assert sequence.delete_many() == 3900
     assert len(sequence) == 0
 
+
+def test_delete_many_batches(sequence):
+    sequence.set_many((i,) for i in range(1000))
+    progress = []
+
+    deleted = sequence.delete_many(
+        key=100, stop=dict(key=350), batch_size=100,
+        progress=lambda *args: progress.append(args),
+    )
+
+    assert deleted == 250
+    assert progress == [(100, 1), (200, 2), (250, 3)]
+    assert sequence.count(exact=True) == 750
+
+    assert sequence.delete_many(order='<', key=100, limit=10) == 10
+    assert sequence.delete_many(key=500, stop=dict(key=600),
+                                inclusive=True, batch_size=1) == 101
+    assert sequence.count(exact=True) == 639
+
+
+def test_delete_many_prefix(users):
+    users.set_many([
+        ('Jane', 'Doe', SexEnum.female, 19),
+        ('John', 'Doe', SexEnum.male, 18),
+        ('Jim', 'Roe', SexEnum.male, 20),
+    ])
+
+    assert users.delete_many(prefix='J', batch_size=1) == 3
+    assert users.count(exact=True) == 0
+
+
+def test_native_key_fields(users):
+    assert users.db.key_fields == users._key_spec() == (
+        ('name', True, False), ('surname', True, False),
+    )
+
+    users.set_many([('Jane', 'Doe', SexEnum.female, 19)])
+    assert users.db.delete_many({'name': 'J'}) == 1
+
+
+def test_set_many(users):
+    result = users.set_many([
+        dict(name='Jane', surname='Doe', sex=SexEnum.female, age=19),
+        ('John', 'Doe', SexEnum.male, 18),
+        dict(name='Bad', surname='Row', age='old'),
+        dict(name='Jim', surname='Doe'),
+    ])
+
+    assert result.count == 3
+    assert [idx for idx, _ in result.errors] == [2]
+
+    assert users.get(name='John', surname='Doe')['age'] == 18
+    assert users.get(name='Jim', surname='Doe')['sex'] == SexEnum.male
+
+    with pytest.raises(LookupError):
+        users.get(name='Bad', surname='Row')
+
+
+def test_transaction_set_many(sequence):
+    with sequence.transaction() as tx:
+        result = tx.set_many((i,) for i in range(100))
+
+        assert result.count == 100
+        assert not result.errors
+
+    assert len(sequence) == 100
+
+
+class CounterSchema(Schema):
+    key = fields.StringField(index=0)
+    hits = fields.UInt64Field(merge='add')
+    delta = fields.Int16Field(merge='add')
+    high = fields.UInt32Field(merge='max')
+    low = fields.Int16Field(merge='min', default=100)
+    trail = fields.BytesField(merge='append')
+
+
+@pytest.fixture()
+def counters(sonya_env):
+    db = sonya_env.database('counters', CounterSchema())
+    sonya_env.open()
+    return db
+
+
+def test_upsert(counters):
+    for i in range(10):
+        counters.upsert(
+            key='foo', hits=1, delta=-1, high=i, low=i - 5, trail=b'%d' % i
+        )
+
+    document = counters.get(key='foo')
+
+    assert document['hits'] == 10
+    assert document['delta'] == -10
+    assert document['high'] == 9
+    assert document['low'] == -5
+    assert document['trail'] == b'0123456789'
+
+    with counters.transaction() as tx:
+        tx.upsert(key='foo', hits=5, high=1, trail=b'!')
+
+    document = counters.get(key='foo')
+    assert document['hits'] == 15
+    assert document['high'] == 9
+    assert document['trail'] == b'0123456789!'
+
+
+class ProfileSchema(Schema):
+    key = fields.StringField(index=0)
+    visits = fields.UInt32Field(merge='add')
+    best = fields.Int32Field(merge='min', default=1000)
+    name = fields.StringField()
+    city = fields.StringField(secondary=True)
+
+
+def test_upsert_omitted_fields(sonya_env):
+    db = sonya_env.database('profiles', ProfileSchema())
+    sonya_env.open()
+
+    # nothing is stored yet, omitted fields get defaults
+    db.upsert(key='a', visits=1)
+    assert dict(db.get(key='a')) == {
+        'key': 'a', 'visits': 1, 'best': 1000, 'name': '', 'city': '',
+    }
+
+    db.upsert(key='a', name='alice', city='Berlin', best=50)
+    db.upsert(key='a', visits=2)
+
+    with db.transaction() as tx:
+        tx.upsert(key='a', best=70)
+
+    with db.writer() as writer:
+        writer.upsert(key='a', visits=3).result()
+
+    assert dict(db.get(key='a')) == {
+        'key': 'a', 'visits': 6, 'best': 50, 'name': 'alice',
+        'city': 'Berlin',
+    }
+    assert [doc['key'] for doc in db.find_by(city='Berlin')] == ['a']
+
+    db.upsert(key='a', city='Paris')
+    assert not list(db.find_by(city='Berlin'))
+    assert db.get(key='a')['name'] == 'alice'
+
+
+def test_merge_validation():
+    with pytest.raises(ValueError):
+        fields.BytesField(merge='add')
+
+    with pytest.raises(ValueError):
+        fields.UInt32Field(merge='append')
+
+    with pytest.raises(ValueError):
+        fields.UInt32Field(index=0, merge='add')
+
+    for field in (fields.FloatField, fields.IPv4Field, fields.IPv6Field):
+        assert field(merge='replace').merge == 'replace'
+
+        for merge in ('add', 'max', 'min'):
+            with pytest.raises(ValueError):
+                field(merge=merge)
+
+
+def test_merge_fields_limit(sonya_env):
+    def schema(count, **kwargs):
+        return type('Counters%d' % count, (Schema,), dict(
+            [('key', fields.UInt32Field(index=0))] +
+            [('field%d' % i, fields.UInt32Field(**kwargs))
+             for i in range(count - 1)]
+        ))
+
+    # the hidden upsert mask takes the last of the engine fields
+    with pytest.raises(ValueError):
+        schema(8, merge='add')
+
+    plain = sonya_env.database('plain', schema(8)())
+    counters = sonya_env.database('counters', schema(7, merge='add')())
+    sonya_env.open()
+
+    plain.set(plain.document(key=1, field6=6))
+    assert plain.get(key=1)['field6'] == 6
+
+    counters.upsert(key=1, field0=1, field5=5)
+    counters.upsert(key=1, field5=5)
+    assert dict(counters.get(key=1)) == dict(
+        {'field%d' % i: 0 for i in range(6)}, key=1, field0=1, field5=10
+    )
+
+
+def test_cursor_range(sequence):
+    sequence.set_many((i,) for i in range(100))
+
+    keys = [doc['key'] for doc in sequence.cursor(key=10, stop={'key': 20})]
+    assert keys == list(range(10, 20))
+
+    keys = [
+        doc['key'] for doc in
+        sequence.cursor(key=10, stop={'key': 20}, inclusive=True)
+    ]
+    assert keys == list(range(10, 21))
+
+    keys = [
+        doc['key'] for doc in
+        sequence.cursor(order='<=', key=50, stop={'key': 45})
+    ]
+    assert keys == [50, 49, 48, 47, 46]
+
+    keys = list(sequence.cursor(order='>', key=90, limit=3, keys_only=True))
+    assert keys == [(91,), (92,), (93,)]
+
+    assert list(sequence.cursor(limit=0)) == []
+
+
+def test_cursor_prefix(users):
+    users.set_many([
+        ('Jane', 'Doe', SexEnum.female, 19),
+        ('Jack', 'Black', SexEnum.male, 42),
+        ('John', 'Doe', SexEnum.male, 18),
+        ('Alice', 'Smith', SexEnum.female, 25),
+    ])
+
+    keys = list(users.cursor(prefix='Ja', keys_only=True))
+    assert keys == [('Jack', 'Black'), ('Jane', 'Doe')]
+
+    keys = list(users.cursor(stop={'name': 'J'}, keys_only=True))
+    assert keys == [('Alice', 'Smith')]
+
+
+def test_prefix_requires_string_key(sequence):
+    sequence.set_many((i,) for i in range(10))
+
+    with pytest.raises(ValueError):
+        sequence.cursor(prefix=1)
+
+    with pytest.raises(ValueError):
+        sequence.delete_many(prefix=1)
+
+    assert len(list(sequence.cursor())) == 10
+
+
+def test_cursor_fetchmany(users):
+    users.set_many(
+        ('name-%03d' % i, 'surname', SexEnum.male, i % 100)
+        for i in range(250)
+    )
+
+    cursor = users.cursor()
+    assert cursor.fields == ('name', 'surname', 'sex', 'age')
+
+    rows = cursor.fetchmany(100)
+    assert len(rows) == 100
+    assert rows[0] == ('name-000', 'surname', SexEnum.male, 0)
+
+    assert len(cursor.fetchmany(1000)) == 150
+    assert cursor.fetchmany(10) == []
+
+    batches = list(users.cursor(keys_only=True).iter_batches(100))
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert batches[2][-1] == ('name-249', 'surname')
+
+
+def test_cursor_columns(sequence):
+    sequence.set_many((i,) for i in range(1000))
+
+    batches = list(
+        sequence.cursor(stop={'key': 300}).iter_batches(128, columnar=True)
+    )
+
+    assert len(batches) == 3
+    assert batches[0]['key'].typecode == 'Q'
+    assert sum(len(batch['key']) for batch in batches) == 300
+    assert list(batches[-1]['key'])[-1] == 299
+
+
+def test_codec(users):
+    codec = users.schema.codec
+
+    assert codec is UsersSchema._codec
+    assert codec.names == tuple(name for name, _ in users.schema)
+
+    doc = users.document(name='Jane', surname='Doe')
+    doc.update(sex=SexEnum.female, age=20)
+
+    assert dict(doc) == dict(
+        name='Jane', surname='Doe', sex=SexEnum.female, age=20
+    )
+
+    with pytest.raises(KeyError):
+        doc['unknown'] = 1
+
+    with pytest.raises(KeyError):
+        doc.update(unknown=1)
+
+    users.set(doc)
+    stored = users.get(name='Jane', surname='Doe')
+
+    assert 'age' in stored
+    assert 'unknown' not in stored
+    assert stored['age'] == 20
+
+    with pytest.raises(RuntimeError):
+        stored['age'] = 1
+
+
+def test_document_pins_last_value(users):
+    doc = users.document(name='Jane', surname='Doe')
+    value = uuid.uuid4().hex.encode()
+
+    doc.value.set_string('surname', value)
+    refs = sys.getrefcount(value)
+
+    for _ in range(100):
+        doc.value.set_string('surname', b'Doe')
+
+    assert sys.getrefcount(value) == refs - 1
+
+    users.set(doc)
+    assert users.get(name='Jane', surname='Doe')['surname'] == 'Doe'
+
+
+def test_get_many(users):
+    users.set_many([
+        ('Jane', 'Doe', SexEnum.female, 19),
+        ('John', 'Doe', SexEnum.male, 18),
+    ])
+
+    keys = [('John', 'Doe'), ('Jim', 'Doe'), ('Jane', 'Doe')]
+
+    for sort in (False, True):
+        docs = users.get_many(keys, sort=sort)
+
+        assert docs[0]['age'] == 18
+        assert docs[1] is None
+        assert docs[2]['age'] == 19
+
+    assert users.get_many([]) == []
+
+    with pytest.raises(ValueError):
+        users.get_many([('John',)])
+
+    with users.transaction() as tx:
+        tx.set(users.document(name='Jim', surname='Doe', age=20))
+        docs = tx.get_many(keys)
+
+        assert [doc['age'] for doc in docs] == [18, 20, 19]
+
+
+def test_get_many_scalar_keys(sequence):
+    sequence.set_many((i,) for i in range(0, 100, 2))
+
+    docs = sequence.get_many(range(10), sort=True)
+    assert [doc and doc['key'] for doc in docs] == [
+        0, None, 2, None, 4, None, 6, None, 8, None
+    ]
+
+
+class SessionSchema(Schema):
+    ttl = 60
+    key = fields.UInt32Field(index=0)
+    created = fields.ExpireField()
+
+
+def test_ttl(sonya_env):
+    db = sonya_env.database('sessions', SessionSchema())
+    sonya_env.open()
+
+    assert sonya_env['db.sessions.expire'] == 60
+    assert sonya_env['db.sessions.compaction.expire_period'] == 60
+
+    now = int(time.time())
+    db.set(db.document(key=1))
+    db.set_many([(2, None), (3, now - 100)])
+    db.set(db.document(key=4, created=now - 1000))
+
+    assert db.get(key=1)['created'] >= now
+    assert db.get(key=2)['created'] >= now
+
+    sonya_env.env.set_int('db.sessions.compaction.checkpoint', 0)
+    assert sonya_env.expire() == 1
+
+    for _ in range(100):
+        sonya_env.env.set_int('scheduler.run', 0)
+
+    assert [doc['key'] for doc in db] == [1, 2]
+
+
+def test_ttl_requires_expire_field(sonya_env):
+    with pytest.raises(ValueError):
+        sonya_env.database('sequence', SequenceSchema(ttl=10))
+
+
+class BlobSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    payload = fields.BytesField(zero_copy=True)
+    meta = fields.JSONField(zero_copy=True)
+    obj = fields.PickleField(zero_copy=True)
+
+
+def test_zero_copy(sonya_env):
+    db = sonya_env.database('blobs', BlobSchema())
+    sonya_env.open()
+
+    payload = b'x' * 65536
+    db.set(db.document(key=1, payload=payload, meta={'a': 1}, obj=[1, 2]))
+
+    doc = db.get(key=1)
+    view = doc['payload']
+
+    assert isinstance(view, memoryview)
+    assert view.readonly
+    assert view == payload
+    assert doc['meta'] == {'a': 1}
+    assert doc['obj'] == [1, 2]
+    assert dict(doc)['payload'] == payload
+
+    # the view keeps the engine document alive
+    del doc
+    assert bytes(view[:3]) == b'xxx'
+
+    # the document referenced by the views is not passed to the engine
+    doc = db.get(key=1)
+    view = doc['payload']
+
+    with pytest.raises(BufferError):
+        db.db.delete(doc.value)
+
+    view.release()
+    del view
+
+    # cursor documents are reused by the engine, the values are copied
+    assert [type(doc['payload']) for doc in db] == [bytes]
+
+    # get_many documents are owned by the caller, as the get result
+    docs = db.get_many([(1,), (2,)])
+    assert docs[1] is None
+
+    view = docs[0]['payload']
+    assert isinstance(view, memoryview)
+
+    del docs
+    assert view == payload
+    view.release()
+
+
+def test_zero_copy_writable_document(sonya_env):
+    db = sonya_env.database('blobs', BlobSchema())
+    sonya_env.open()
+
+    doc = db.document(key=1, payload=b'abc', meta={}, obj=None)
+
+    # the values of the documents being built are copied
+    assert doc['payload'] == b'abc'
+    assert isinstance(doc['payload'], bytes)
+    assert 'abc' in repr(doc)
+
+    db.set(doc)
+    assert isinstance(db.get(key=1)['payload'], memoryview)
+
+
+def test_zero_copy_key_field():
+    with pytest.raises(ValueError):
+        fields.BytesField(index=0, zero_copy=True)
@@ -0,0 +1,163 @@
+import pytest
+
+from sonya import Schema, fields
+from sonya.sophia import (
+    TransactionError, TransactionLocked, TransactionRollback,
+)
+
+
+class AccountSchema(Schema):
+    id = fields.UInt32Field(index=0)
+    balance = fields.Int64Field()
+
+
+class LogSchema(Schema):
+    id = fields.UInt32Field(index=0)
+    message = fields.StringField()
+
+
+@pytest.fixture()
+def bank(sonya_env):
+    accounts = sonya_env.database('accounts', AccountSchema())
+    log = sonya_env.database('journal', LogSchema())
+    sonya_env.open()
+
+    accounts.set_many([{'id': 1, 'balance': 100}, {'id': 2, 'balance': 0}])
+    return sonya_env, accounts, log
+
+
+def test_environment_transaction(bank):
+    env, accounts, log = bank
+
+    with env.transaction() as tx:
+        balance = tx.get(accounts, id=1)['balance']
+        tx.set(accounts, accounts.document(id=1, balance=balance - 30))
+        tx.set('accounts', accounts.document(id=2, balance=30))
+        tx.set_many(log, [{'id': 1, 'message': 'transfer'}])
+
+        assert tx['journal'] is tx[log]
+        assert tx.get('journal', id=1)['message'] == 'transfer'
+
+        with pytest.raises(LookupError):
+            log.get(id=1)
+
+    assert tx.statements_time is not None
+    assert tx.commit_time is not None
+    assert [doc['balance'] for doc in accounts.get_many([1, 2])] == [70, 30]
+    assert log.get(id=1)['message'] == 'transfer'
+
+    tx = env.transaction()
+    tx.delete(log, id=1)
+    tx.set(accounts, accounts.document(id=3, balance=1))
+    tx.rollback()
+
+    assert log.get(id=1)['message'] == 'transfer'
+
+    with pytest.raises(LookupError):
+        accounts.get(id=3)
+
+
+def test_rollback_on_error(bank):
+    env, accounts, log = bank
+
+    with pytest.raises(ZeroDivisionError):
+        with env.transaction() as tx:
+            tx.set(log, log.document(id=5, message='lost'))
+            tx.delete(accounts, id=1)
+            1 / 0
+
+    assert accounts.get(id=1)['balance'] == 100
+
+    with pytest.raises(LookupError):
+        log.get(id=5)
+
+
+def test_freeze(bank):
+    env, accounts, log = bank
+
+    tx = env.transaction()
+    tx.set(log, log.document(id=1, message='frozen'))
+    tx.freeze()
+
+    assert tx.frozen
+
+    with pytest.raises(TransactionError):
+        tx.set(log, log.document(id=2, message='late'))
+
+    # reads are still allowed
+    assert tx.get(log, id=1)['message'] == 'frozen'
+
+    tx.commit()
+    assert log.get(id=1)['message'] == 'frozen'
+
+    with pytest.raises(TransactionError):
+        tx.freeze()
+
+
+def test_conflicts(bank):
+    env, accounts, log = bank
+
+    first = env.transaction()
+    second = env.transaction()
+
+    first.set(accounts, accounts.document(id=1, balance=1))
+    second.set(accounts, accounts.document(id=1, balance=2))
+
+    # the first transaction holds the key, the second one may retry
+    with pytest.raises(TransactionLocked):
+        second.commit()
+
+    assert not second.tx.closed
+
+    first.commit()
+
+    with pytest.raises(TransactionRollback):
+        second.commit()
+
+    assert second.tx.closed
+    assert accounts.get(id=1)['balance'] == 1
+
+
+def test_unknown_database(bank):
+    env, accounts, log = bank
+
+    with pytest.raises(KeyError):
+        env.transaction()['missing']
+
+
+def test_locked_commit(bank):
+    env, accounts, log = bank
+
+    holder = accounts.transaction()
+    holder.set(accounts.document(id=1, balance=1))
+
+    locked = accounts.transaction()
+    locked.set(accounts.document(id=1, balance=2))
+
+    # the locked transaction stays open, so the commit may be retried
+    for _ in range(2):
+        with pytest.raises(TransactionLocked):
+            locked.commit()
+
+        assert not locked.tx.closed
+
+    locked.rollback()
+    assert locked.tx.closed
+
+    with pytest.raises(TransactionError):
+        locked.commit()
+
+    holder.commit()
+    assert accounts.get(id=1)['balance'] == 1
+
+    # the context manager rolls the locked transaction back
+    holder = accounts.transaction()
+    holder.set(accounts.document(id=2, balance=1))
+
+    with pytest.raises(TransactionLocked):
+        with accounts.transaction() as tx:
+            tx.set(accounts.document(id=2, balance=2))
+
+    assert tx.tx.closed
+    holder.rollback()
+    assert accounts.get(id=2)['balance'] == 0
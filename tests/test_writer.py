@@ -0,0 +1,100 @@
+import threading
+from concurrent.futures import wait
+
+import pytest
+
+from sonya import GroupCommitWriter, Schema, fields
+
+
+class CounterSchema(Schema):
+    key = fields.UInt32Field(index=0)
+    value = fields.UInt64Field(merge='add')
+
+
+@pytest.fixture()
+def counters(sonya_env):
+    db = sonya_env.database('counters', CounterSchema())
+    sonya_env.open()
+    return db
+
+
+def test_concurrent_writes(counters):
+    threads_count, per_thread = 8, 200
+
+    with counters.writer(max_rows=64, max_delay=0.01) as writer:
+        def work(offset):
+            futures = [
+                writer.set(counters.document(key=offset + i, value=i))
+                for i in range(per_thread)
+            ]
+            wait(futures)
+            assert all(f.exception() is None for f in futures)
+
+        threads = [
+            threading.Thread(target=work, args=(n * per_thread,))
+            for n in range(threads_count)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    assert writer.closed
+    assert writer.writes == threads_count * per_thread
+    assert writer.groups < writer.writes
+    assert counters.count(exact=True) == threads_count * per_thread
+    assert counters.get(key=per_thread + 5)['value'] == 5
+
+
+def test_flush_and_delay(counters):
+    writer = GroupCommitWriter(counters, max_rows=1000, max_delay=60)
+
+    try:
+        futures = [
+            writer.set(counters.document(key=i, value=i)) for i in range(10)
+        ]
+
+        assert len(writer) == 10
+        writer.flush(timeout=10)
+
+        assert all(f.done() for f in futures)
+        assert writer.groups == 1
+        assert counters.get(key=9)['value'] == 9
+    finally:
+        writer.close()
+
+    with pytest.raises(RuntimeError):
+        writer.set(counters.document(key=1, value=1))
+
+
+def test_upsert_and_delete(counters):
+    with counters.writer(max_rows=100, max_delay=0.05) as writer:
+        futures = [writer.upsert(key=1, value=1) for _ in range(5)]
+        futures.append(writer.delete(key=2))
+        futures.append(writer.upsert(key=2, value=10))
+
+    assert all(f.result() is None for f in futures)
+    # the upsert of the key written by the group opens the next one
+    assert writer.groups == 6
+    assert counters.get(key=1)['value'] == 5
+    assert counters.get(key=2)['value'] == 10
+
+
+def test_errors(counters):
+    with counters.writer(max_delay=0.01) as writer:
+        with pytest.raises(ValueError):
+            writer.set({'key': 1})
+
+        # documents are encoded by the calling thread
+        with pytest.raises(Exception):
+            writer.upsert(key=1, value=2 ** 65)
+
+        cancelled = writer.upsert(key=1, value=1)
+        cancelled.cancel()
+        ok = writer.upsert(key=2, value=1)
+
+    assert cancelled.cancelled()
+    assert ok.result() is None
+    assert counters.get_many([1, 2])[0] is None